@@ -2,7 +2,9 @@ import { JOBS_LIST_URL } from '../../../utils/const';
 import handleRequestResponse from '../../../utils/handleRequestResponse';
 
 export default async (req, res) => {
-  const url = JOBS_LIST_URL;
+  // Pagination, filters and field selection are passed on to the scheduler
+  const query = new URLSearchParams(req.query).toString();
+  const url = query ? `${JOBS_LIST_URL}?${query}` : JOBS_LIST_URL;
   const method = 'GET';
   await handleRequestResponse(req, res, url, method);
 };
@@ -0,0 +1,9 @@
+import { JOB_ITERATIONS_URL } from '../../../../utils/const';
+import handleRequestResponse from '../../../../utils/handleRequestResponse';
+
+export default async (req, res) => {
+  const { jobId } = req.query;
+  const url = JOB_ITERATIONS_URL(jobId);
+  const method = 'GET';
+  await handleRequestResponse(req, res, url, method);
+};
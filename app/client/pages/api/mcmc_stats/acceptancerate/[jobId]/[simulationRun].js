@@ -2,8 +2,8 @@ import { MCMC_STATS_ACCEPTANCE_RATE_URL } from '../../../../../utils/const';
 import handleRequestResponse from '../../../../../utils/handleRequestResponse';
 
 export default async (req, res) => {
-  const { jobId, simulationRun } = req.query;
-  const url = MCMC_STATS_ACCEPTANCE_RATE_URL(jobId, simulationRun);
+  const { jobId, simulationRun, since } = req.query;
+  const url = MCMC_STATS_ACCEPTANCE_RATE_URL(jobId, simulationRun, since);
   const method = 'GET';
   const checkAuth = false;
   await handleRequestResponse(req, res, url, method, checkAuth);
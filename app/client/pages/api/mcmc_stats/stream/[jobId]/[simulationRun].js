@@ -0,0 +1,27 @@
+import { MCMC_STATS_STREAM_URL } from '../../../../../utils/const';
+
+export const config = {
+  api: {
+    // The response is streamed until the client disconnects
+    externalResolver: true,
+  },
+};
+
+export default async (req, res) => {
+  const { jobId, simulationRun } = req.query;
+  const url = MCMC_STATS_STREAM_URL(jobId, simulationRun);
+  try {
+    const response = await fetch(url);
+    res.writeHead(response.status, {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      Connection: 'keep-alive',
+    });
+    // Pass server-sent events on as they arrive instead of buffering them
+    response.body.pipe(res);
+    req.on('close', () => response.body.destroy());
+  } catch (e) {
+    console.log(e);
+    res.status(400).send(e);
+  }
+};
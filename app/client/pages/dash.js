@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useMemo, useState } from 'react';
 import Link from 'next/link';
 import { useRouter } from 'next/router';
 import nookies from 'nookies';
@@ -31,15 +31,32 @@ function statsObjectToArray(obj) {
   return Object.keys(obj).map((key) => [Number(key), obj[key]]);
 }
 
-const NegLogPChart = ({ job, simulationRun, isMobile }) => {
+// Subscribes to the stream of MCMC statistics of a simulation run and
+// accumulates the values it receives
+function useStatsStream(jobId, simulationRun) {
+  const [stats, setStats] = useState({ energies: {}, acceptanceRates: {} });
+  useEffect(() => {
+    setStats({ energies: {}, acceptanceRates: {} });
+    if (!jobId || !simulationRun) return;
+    const source = new EventSource(`/api/mcmc_stats/stream/${jobId}/${simulationRun}`);
+    // Values are merged rather than appended, since reconnecting replays
+    // everything streamed so far
+    source.addEventListener('energies', (e) => {
+      const delta = JSON.parse(e.data);
+      setStats((s) => ({ ...s, energies: { ...s.energies, ...delta } }));
+    });
+    source.addEventListener('acceptance_rates', (e) => {
+      const delta = JSON.parse(e.data);
+      setStats((s) => ({ ...s, acceptanceRates: { ...s.acceptanceRates, ...delta } }));
+    });
+    source.addEventListener('end', () => source.close());
+    return () => source.close();
+  }, [jobId, simulationRun]);
+  return stats;
+}
+
+const NegLogPChart = ({ job, data, isMobile }) => {
   if (job && job.id) {
-    const jobId = job.id;
-    const { data, error } = simulationRun
-      ? useSWR(`/api/mcmc_stats/neglogp/${jobId}/${simulationRun}`, fetcher, {
-          refreshInterval: 10000,
-        })
-      : { data: undefined, error: undefined };
-    if (error) console.log(error);
     const ds = data ? statsObjectToArray(data) : [];
     const chartData = {
       datasets: [
@@ -114,8 +131,8 @@ const NegLogPChart = ({ job, simulationRun, isMobile }) => {
           jobRunOrStop ? 'opacity-100' : 'opacity-20'
         }`}
       >
-        {!error && !isMobile && <Line data={chartData} options={options} width="5" height="1" />}
-        {!error && isMobile && <Line data={chartData} options={options} width="1" height="1" />}
+        {!isMobile && <Line data={chartData} options={options} width="5" height="1" />}
+        {isMobile && <Line data={chartData} options={options} width="1" height="1" />}
       </FlexCenter>
     );
   } else {
@@ -123,16 +140,9 @@ const NegLogPChart = ({ job, simulationRun, isMobile }) => {
   }
 };
 
-const AcceptanceRateChart = ({ job, simulationRun, isMobile }) => {
+const AcceptanceRateChart = ({ job, data, isMobile }) => {
   if (job && job.id) {
-    const jobId = job.id;
-    const { data, error } = simulationRun
-      ? useSWR(`/api/mcmc_stats/acceptancerate/${jobId}/${simulationRun}`, fetcher, {
-          refreshInterval: 10000,
-        })
-      : { data: undefined, error: undefined };
-    if (error) console.log(error);
-    const dss = data ? statsObjectToArray(data).pop() : [];
+    const dss = (data && statsObjectToArray(data).pop()) || [];
     // 1st element of dss is the sample number, 2nd element an array with the
     // acceptance rate values
     const replicaLabels =
@@ -204,8 +214,8 @@ const AcceptanceRateChart = ({ job, simulationRun, isMobile }) => {
           jobRunOrStop ? 'opacity-100' : 'opacity-20'
         }`}
       >
-        {!error && !isMobile && <Line data={chartData} options={options} width="5" height="1" />}
-        {!error && isMobile && <Line data={chartData} options={options} width="1" height="1" />}
+        {!isMobile && <Line data={chartData} options={options} width="5" height="1" />}
+        {isMobile && <Line data={chartData} options={options} width="1" height="1" />}
       </FlexCenter>
     );
   } else {
@@ -243,7 +253,7 @@ const Logs = ({ job }) => {
       >
         {logs.map((log) => (
           <div key={uuidv4()} className="my-3 break-words">
-            <div className="text-sm">{log.data}</div>
+            <div className="text-sm whitespace-pre-line">{log.data}</div>
           </div>
         ))}
       </div>
@@ -268,7 +278,11 @@ const Dash = ({ authed, isMobile }) => {
   const jobNotFound = !error && data && !data.id;
   const job = jobFound ? data : undefined;
   const isLoading = !data;
-  const runs = jobFound && data.controller_iterations ? data.controller_iterations : [];
+  const { data: iterations } = useSWR(jobFound ? `/api/job/iterations/${jobId}` : null, fetcher);
+  const runs = useMemo(
+    () => (Array.isArray(iterations) ? iterations.map((it) => it.name) : []),
+    [iterations]
+  );
 
   // Dropdown
   const [dropdownIsAcitve, setDropdownIsAcitve] = useState(false);
@@ -278,6 +292,8 @@ const Dash = ({ authed, isMobile }) => {
     if (runs.length > 0) setSimulationRun(runs[0]);
   }, [runs]);
 
+  const stats = useStatsStream(jobFound ? job.id : undefined, simulationRun);
+
   const Dropdown = () => (
     <div className="relative mt-10">
       <div
@@ -344,10 +360,10 @@ const Dash = ({ authed, isMobile }) => {
                   <Dropdown />
                 </FlexCol>
                 <FlexCol between className="p-10 lg:w-2/3">
-                  <NegLogPChart job={job} simulationRun={simulationRun} isMobile={isMobile} />
+                  <NegLogPChart job={job} data={stats.energies} isMobile={isMobile} />
                   <AcceptanceRateChart
                     job={job}
-                    simulationRun={simulationRun}
+                    data={stats.acceptanceRates}
                     isMobile={isMobile}
                   />
                   <Logs job={job} />
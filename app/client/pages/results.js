@@ -1,4 +1,4 @@
-import useSWR from 'swr';
+import { useSWRInfinite } from 'swr';
 import nookies from 'nookies';
 import { v4 as uuidv4 } from 'uuid';
 
@@ -20,6 +20,17 @@ import { dateFormatter } from '../utils/date';
 
 const { serverRuntimeConfig } = require('../next.config.js');
 
+const JOBS_PAGE_SIZE = 50;
+// The fields of a job which are shown in the jobs table
+const JOB_FIELDS = 'id,spec,status,created_at,started_at,finished_at,signed_url';
+
+// Returns the URL of a page of jobs, following the cursor of the previous page
+const getJobsPageKey = (pageIndex, previousPage) => {
+  if (previousPage && !previousPage.next_cursor) return null;
+  const cursor = previousPage ? `&cursor=${previousPage.next_cursor}` : '';
+  return `/api/job/get-all?limit=${JOBS_PAGE_SIZE}&fields=${JOB_FIELDS}${cursor}`;
+};
+
 const JobsTableForNonMobile = ({ data }) => {
   const headersName = [
     'Id',
@@ -81,7 +92,7 @@ const JobsTableForNonMobile = ({ data }) => {
         </thead>
         <tbody>
           {data
-            .sort((a, b) => (a.id > b.id ? 1 : -1))
+            .sort((a, b) => (a.id < b.id ? 1 : -1))
             .map((row) => (
               <TableRow row={row} key={uuidv4()} />
             ))}
@@ -93,7 +104,7 @@ const JobsTableForNonMobile = ({ data }) => {
 
 const JobsTableForMobile = ({ data }) => {
   // Sort data
-  const dataSorted = data.sort((a, b) => (a.id > b.id ? 1 : -1));
+  const dataSorted = data.sort((a, b) => (a.id < b.id ? 1 : -1));
 
   // To keep track of clicked job row
   const [activeJobId, setActiveJobId] = useState(undefined);
@@ -183,10 +194,14 @@ const JobsTableForMobile = ({ data }) => {
 
 const Results = ({ authed, isMobile }) => {
   // Data fetching
-  const { data, error } = useSWR('/api/job/get-all', fetcher, {
+  const { data: pages, error, size, setSize } = useSWRInfinite(getJobsPageKey, fetcher, {
     refreshInterval: 3000,
   });
   if (error) console.log(error);
+  const pagesLoaded = pages && pages.every((page) => page && Array.isArray(page.jobs));
+  // Failed responses are passed on as they are, such that their errors are shown
+  const data = pages && (pagesLoaded ? pages.flatMap((page) => page.jobs) : pages[0]);
+  const hasMore = pagesLoaded && pages.length > 0 && pages[pages.length - 1].next_cursor;
 
   if (serverRuntimeConfig.is_deployed) {
     if (authed)
@@ -211,6 +226,16 @@ const Results = ({ authed, isMobile }) => {
                   <JobsTableForNonMobile data={data} />
                 )}
               </FlexCenter>
+              {!error && hasMore && (
+                <FlexCenter className="pb-5 md:pb-20">
+                  <div
+                    className="px-6 py-2 text-center text-white bg-purple-700 rounded-lg cursor-pointer lg:transition lg:duration-300 hover:bg-purple-900"
+                    onClick={() => setSize(size + 1)}
+                  >
+                    Load more jobs
+                  </div>
+                </FlexCenter>
+              )}
             </Container>
           </FlexCol>
         </Layout>
@@ -5,6 +5,7 @@ export const JOB_START_URL = (jobId) => `${SCHEDULER_URL}/job/${jobId}/start`;
 export const JOB_STOP_URL = (jobId) => `${SCHEDULER_URL}/job/${jobId}/stop`;
 export const JOB_GET_URL = (jobId) => `${SCHEDULER_URL}/job/${jobId}`;
 export const JOBS_LIST_URL = `${SCHEDULER_URL}/jobs`;
+export const JOB_ITERATIONS_URL = (jobId) => `${SCHEDULER_URL}/job/${jobId}/iterations`;
 
 // Graphite
 export const GRAPHITE_URL = process.env.GRAPHITE_URL || 'http://127.0.0.1:8080';
@@ -13,7 +14,12 @@ export const GRAPHITE_LOGS_URL = (jobId) =>
 
 // MCMC stats
 export const MCMC_STATS_URL = process.env.MCMC_STATS_URL || 'http://127.0.0.1:8081';
-export const MCMC_STATS_NEGLOGP_URL = (jobId, simulationRun) =>
-  `${MCMC_STATS_URL}/mcmc_stats/${jobId}/${simulationRun}/neg_log_prob_sum`;
-export const MCMC_STATS_ACCEPTANCE_RATE_URL = (jobId, simulationRun) =>
-  `${MCMC_STATS_URL}/mcmc_stats/${jobId}/${simulationRun}/re_acceptance_rates`;
+const sinceQuery = (since) => (since === undefined ? '' : `?since=${since}`);
+export const MCMC_STATS_NEGLOGP_URL = (jobId, simulationRun, since) =>
+  `${MCMC_STATS_URL}/mcmc_stats/${jobId}/${simulationRun}/neg_log_prob_sum${sinceQuery(since)}`;
+export const MCMC_STATS_ACCEPTANCE_RATE_URL = (jobId, simulationRun, since) =>
+  `${MCMC_STATS_URL}/mcmc_stats/${jobId}/${simulationRun}/re_acceptance_rates${sinceQuery(
+    since
+  )}`;
+export const MCMC_STATS_STREAM_URL = (jobId, simulationRun) =>
+  `${MCMC_STATS_URL}/mcmc_stats/${jobId}/${simulationRun}/stream`;
@@ -1,9 +1,9 @@
 import logging
 import os
 import time
+from concurrent.futures import Future
 from dataclasses import asdict
 
-import requests
 from chainsail.common.spec import (
     BoltzmannInitialScheduleParameters,
     TemperedDistributionFamily,
@@ -14,6 +14,7 @@ from chainsail.common.storage import default_dir_structure as dir_structure
 from chainsail.common.tempering.ensembles import BoltzmannEnsemble
 from chainsail.controller.initial_schedules import make_geometric_schedule
 from chainsail.controller.initial_setup import setup_initial_states, setup_stepsizes
+from chainsail.controller.scheduler_client import SchedulerClient
 from chainsail.controller.util import schedule_length
 from chainsail.schedule_estimation.dos_estimators import WHAM
 from chainsail.schedule_estimation.optimization_quantities import get_quantity_function
@@ -35,6 +36,7 @@ def _config_template_from_params(re_params, local_sampling_params, dist_family):
     re.pop("num_production_samples")
     local_sampling = asdict(local_sampling_params)
     local_sampling["stepsizes"] = None
+    local_sampling["adaption_states"] = None
     local_sampling["sampler"] = get_sampler_from_params(local_sampling_params).value
     general = dict(
         n_iterations=None,
@@ -190,6 +192,23 @@ class BaseREJobController:
         """
         pass
 
+    def _scale_environment_async(self, num_replicas):
+        """
+        Scale up / down the environment to the given number of replicas
+        without blocking the caller, if the environment supports it.
+
+        Args:
+            num_replicas(int): number of replicas
+
+        Returns:
+            :class:`concurrent.futures.Future`: future which is done once the
+              environment is scaled
+        """
+        future = Future()
+        self._scale_environment(num_replicas)
+        future.set_result(None)
+        return future
+
     def _calculate_schedule_from_dos(self, previous_storage, dos):
         """
         Calculates an optimized schedule given a previous simulation and its
@@ -226,6 +245,7 @@ class BaseREJobController:
         dos = None
         previous_schedule = None
         previous_storage = None
+        previous_storages = []
         opt_params = self._optimization_params
 
         max_runs = opt_params.max_optimization_runs
@@ -249,7 +269,7 @@ class BaseREJobController:
                 schedule = self._initial_schedule
 
             self._setup_simulation(current_storage, schedule, previous_storage)
-            self._do_single_run(current_storage)
+            self._do_single_run(current_storage, previous_storages)
             dos = current_storage.load_dos()
 
             if previous_schedule is not None and optimization_converged(
@@ -258,6 +278,7 @@ class BaseREJobController:
                 break
 
             previous_storage = current_storage
+            previous_storages.append(current_storage)
             previous_schedule = schedule
         else:
             logger.info(
@@ -270,7 +291,9 @@ class BaseREJobController:
 
         return current_storage, final_schedule
 
-    def _fill_config_template(self, storage, previous_storage, schedule, prod=False):
+    def _fill_config_template(
+        self, storage, previous_storage, schedule, prod=False, adaption_states=False
+    ):
         """
         Makes a config template template and updates it with run-specific
         values.
@@ -282,6 +305,8 @@ class BaseREJobController:
               simulation
             schedule(dict): schedule of the current simulation
             prod(bool): whether this is the production run or not
+            adaption_states(bool): whether initial local sampler adaption
+              states have been set up
         """
         cfg_template = _config_template_from_params(
             self._re_params, self._local_sampling_params, self._tempered_dist_family
@@ -293,6 +318,9 @@ class BaseREJobController:
         if previous_storage is not None:
             updates["local_sampling"] = {"stepsizes": dir_structure.INITIAL_STEPSIZES_FILE_NAME}
             updates["general"] = {"initial_states": dir_structure.INITIAL_STATES_FILE_NAME}
+        if adaption_states:
+            adaption_states_file = dir_structure.INITIAL_ADAPTION_STATES_FILE_NAME
+            updates["local_sampling"]["adaption_states"] = adaption_states_file
         if prod:
             num_samples = self._re_params.num_production_samples
         else:
@@ -336,8 +364,12 @@ class BaseREJobController:
               simulation
             prod(bool): whether this is the production run or not
         """
+        # Scaling the environment can take a while, so it is requested first
+        # and we only wait for it once everything else is set up.
+        scaling = self._scale_environment_async(schedule_length(schedule))
+        adaption_states = False
         if previous_storage is not None:
-            setup_stepsizes(current_storage, schedule, previous_storage)
+            adaption_states = setup_stepsizes(current_storage, schedule, previous_storage)
             setup_initial_states(
                 current_storage,
                 schedule,
@@ -345,12 +377,14 @@ class BaseREJobController:
                 *self._get_dos_subsample_params(previous_storage),
             )
 
-        config_dict = self._fill_config_template(current_storage, previous_storage, schedule, prod)
+        config_dict = self._fill_config_template(
+            current_storage, previous_storage, schedule, prod, adaption_states
+        )
         current_storage.save_config(config_dict)
         current_storage.save_schedule(schedule)
-        self._scale_environment(schedule_length(schedule))
+        scaling.result()
 
-    def _do_single_run(self, storage):
+    def _do_single_run(self, storage, previous_storages=None):
         """
         Run a single Replica Exchange simulation, estimate the density of
         states and write it to the simulation folder.
@@ -358,12 +392,57 @@ class BaseREJobController:
         Args:
             storage(:class:`SimulationStorage`): storage for simulation
               to be set up
+            previous_storages(list): storages of previous simulations, the
+              most recent one last
         """
         self._re_runner.run_sampling(storage)
+        dos = self._estimate_dos(storage, previous_storages)
+        storage.save_dos(dos)
+
+    def _estimate_dos(self, storage, previous_storages=None):
+        """
+        Estimate the density of states of a simulation.
+
+        If there are previous simulations, the DOS estimate of the most recent
+        one is used to warm-start the DOS estimator and, if requested in the
+        optimization parameters, the energies of all previous simulations are
+        pooled with the energies of the current one.
+
+        Args:
+            storage(:class:`SimulationStorage`): storage for the simulation
+              whose DOS is to be estimated
+            previous_storages(list): storages of previous simulations, the
+              most recent one last
+
+        Returns:
+            :class:`np.array`: the density of states estimate at the energies
+              of the current simulation
+        """
         energies = storage.load_all_energies(*self._get_dos_subsample_params(storage))
         schedule = storage.load_schedule()
-        dos = self._dos_estimator.estimate_dos(energies, schedule)
-        storage.save_dos(dos)
+        initial_dos = None
+        pooled_runs = None
+        if previous_storages:
+            last_storage = previous_storages[-1]
+            last_energies = last_storage.load_all_energies(
+                *self._get_dos_subsample_params(last_storage)
+            )
+            initial_dos = (last_storage.load_dos(), last_energies)
+            if self._optimization_params.dos_pool_runs:
+                pooled_runs = [(last_energies, last_storage.load_schedule())]
+                for previous_storage in previous_storages[-2::-1]:
+                    pooled_runs.append(
+                        (
+                            previous_storage.load_all_energies(
+                                *self._get_dos_subsample_params(previous_storage)
+                            ),
+                            previous_storage.load_schedule(),
+                        )
+                    )
+
+        return self._dos_estimator.estimate_dos(
+            energies, schedule, initial_dos=initial_dos, pooled_runs=pooled_runs
+        )
 
     def _get_dos_subsample_params(self, storage):
         num_samples = storage.load_config()["general"]["n_iterations"]
@@ -383,14 +462,10 @@ class BaseREJobController:
 
         prod_storage = SimulationStorage(self._dirname, "production_run", self._storage_backend)
         self._setup_simulation(prod_storage, final_schedule, final_opt_storage, prod=True)
-        self._do_single_run(prod_storage)
+        self._do_single_run(prod_storage, [final_opt_storage])
 
 
 class CloudREJobController(BaseREJobController):
-    SCHEDULER_SCALE_ENDPOINT = "/internal/job/{id}/scale/{n}"
-    SCHEDULER_NODE_ENDPOINT = "/job/{id}/nodes"
-    SCHEDULER_ADD_ITERATION_ENDPOINT = "/internal/job/{id}/add_iteration/{iteration}"
-
     def __init__(
         self,
         job_id,
@@ -451,7 +526,8 @@ class CloudREJobController(BaseREJobController):
               (required for running locally or when reusing an existing bucket)
             connection_retries(int): the number of connection attempts to make when
               contacting the scheduler
-            connection_retry_interval(int): the interval in seconds to wait between retries
+            connection_retry_interval(int): the base interval in seconds for the
+              exponential backoff between retries
             connection_timeout(int): connection timeout in seconds
             scaling_timeout(int): timeout for waiting on already running scaling requests
         """
@@ -475,6 +551,15 @@ class CloudREJobController(BaseREJobController):
         self.connection_retry_interval = connection_retry_interval
         self.connection_timeout = connection_timeout
         self.scaling_timeout = scaling_timeout
+        self.scheduler_client = SchedulerClient(
+            job_id,
+            scheduler_address,
+            scheduler_port,
+            connection_retries=connection_retries,
+            backoff_base=connection_retry_interval,
+            connection_timeout=connection_timeout,
+            scaling_timeout=scaling_timeout,
+        )
 
     def _scale_environment(self, num_replicas):
         """
@@ -484,61 +569,60 @@ class CloudREJobController(BaseREJobController):
             num_replicas(int): number of replicas
         """
         logger.info(f"Requesting job scaling to {num_replicas}")
-        start_time = time.time()
-        retries = 0
-        while (time.time() - start_time) < self.scaling_timeout:
+        hosts = self.scheduler_client.scale(num_replicas)
+        self._node_updater(self, hosts=hosts)
+
+    def _scale_environment_async(self, num_replicas):
+        """
+        Requests scaling of the environment in the background.
+
+        Args:
+            num_replicas(int): number of replicas
+
+        Returns:
+            :class:`concurrent.futures.Future`: future which is done once the
+              environment is scaled and the node information is updated
+        """
+        logger.info(f"Requesting job scaling to {num_replicas}")
+        future = self.scheduler_client.scale_async(num_replicas)
+        # The node updater runs in the scaling thread once the scheduler
+        # has responded, such that the future only resolves after it is done.
+        scaled = Future()
+
+        def on_scaled(f):
             try:
-                r = requests.post(
-                    f"http://{self.scheduler_address}:{self.scheduler_port}{self.SCHEDULER_SCALE_ENDPOINT.format(id=self.job_id, n=num_replicas)}"
-                )
-                if r.status_code == 409:
-                    logger.warn(
-                        "Attempted to scale a job which is already scaling. Waiting for "
-                        "scaling to finish."
-                    )
-                    time.sleep(self.connection_retry_interval)
-                    continue
-                r.raise_for_status()
+                self._node_updater(self, hosts=f.result())
             except Exception as e:
-                logger.exception(e)
-                retries += 1
-                if retries > self.connection_retries:
-                    raise e
-                time.sleep(self.connection_retry_interval)
-                continue
+                scaled.set_exception(e)
             else:
-                break
-        self._node_updater(self)
+                scaled.set_result(None)
+
+        future.add_done_callback(on_scaled)
+        return scaled
 
-    def _ask_scheduler_to_add_iteration(self, iteration):
+    def _ask_scheduler_to_add_iteration(self, iteration, schedule=None):
         """
         Sends the scheduler a request to add an entry to the list of main controller loop
         iterations.
         """
-        for i in range(self.connection_retries):
-            try:
-                logger.debug(f"Asking scheduler to add controller iteration {iteration}")
-                add_iteration_endpoint = self.SCHEDULER_ADD_ITERATION_ENDPOINT.format(
-                    id=self.job_id, iteration=iteration
-                )
-                url = "http://{}:{}{}".format(
-                    self.scheduler_address, self.scheduler_port, add_iteration_endpoint
-                )
-                r = requests.post(url)
-                r.raise_for_status()
-                break
-            except Exception as e:
-                logger.error(
-                    f"Failed to ask scheduler to add controller iteration {iteration} with response: {repr(r)}"
-                )
-                if (i + 1) == self.connection_retries:
-                    logger.critical(
-                        "Used all attempts for asking scheduler to add controller iteration {iteration}."
-                    )
-                    raise e
-                time.sleep(self.connection_retry_interval)
+        if schedule is None:
+            self.scheduler_client.add_iteration(iteration)
+            return
+        summary = {
+            param: {"min": float(min(values)), "max": float(max(values))}
+            for param, values in schedule.items()
+        }
+        self.scheduler_client.add_iteration(
+            iteration, num_replicas=schedule_length(schedule), schedule=summary
+        )
+
+    def _estimate_dos(self, storage, previous_storages=None):
+        start = time.monotonic()
+        dos = super()._estimate_dos(storage, previous_storages)
+        self._dos_estimation_duration = time.monotonic() - start
+        return dos
 
-    def _do_single_run(self, storage):
+    def _do_single_run(self, storage, previous_storages=None):
         """
         Run a single Replica Exchange simulation, estimate the density of
         states and write it to the simulation folder.
@@ -546,56 +630,59 @@ class CloudREJobController(BaseREJobController):
         Args:
             storage(:class:`SimulationStorage`): storage for simulation
               to be set up
+            previous_storages(list): storages of previous simulations, the
+              most recent one last
         """
         iteration = storage.sim_path
-        self._ask_scheduler_to_add_iteration(iteration)
+        self._ask_scheduler_to_add_iteration(iteration, storage.load_schedule())
         # Dirty hack to give nodes time (two mintues) to finish installing packages, compile Stan models etc.
         # The fact that the controller can just kick off sampling whenever it likes, irrespective of whether the
         # user code containers are ready, is a bug and tracked in https://github.com/tweag/chainsail/issues/386.
         time.sleep(120)
-        super()._do_single_run(storage)
+        self._dos_estimation_duration = None
+        super()._do_single_run(storage, previous_storages)
+        self.scheduler_client.finish_iteration(
+            iteration, dos_estimation_duration=self._dos_estimation_duration
+        )
 
 
-def update_nodes_mpi(
-    controller: CloudREJobController,
-    hostfile_path,
-):
+def update_nodes_mpi(controller: CloudREJobController, hostfile_path, hosts=None):
     """
     Writes an updated hostfile which is required by the MPI runner.
 
+    controller(:class:`CloudREJobController`): the controller whose
+      scheduler client is used to look up the job's nodes
     hostfile_path(str): Path at which to read and write the list of host
       addresses which are participating in the job
+    hosts(list): addresses of the job's worker nodes as returned by the
+      scheduler when scaling. If not given, the scheduler is queried for them.
     """
-    # Query the scheduler for a list of peers
-    for i in range(controller.connection_retries):
-        try:
-            logger.debug("Querying peer addresses")
-            r = requests.get(
-                f"http://{controller.scheduler_address}:{controller.scheduler_port}{controller.SCHEDULER_NODE_ENDPOINT.format(id=controller.job_id)}"
-            )
-            r.raise_for_status()
-        except Exception as e:
-            logger.error(
-                f"Failed to request peer node list from scheduler with response: {repr(r)}"
-            )
-            if (i + 1) == controller.connection_retries:
-                logger.critical("Used all attempts for requesting node list from scheduler.")
-                raise e
-            time.sleep(controller.connection_retry_interval)
-    hosts = []
-    for n in r.json():
-        if n["is_worker"] is False:
-            logger.debug(f"Ignoring peer node {n['name']} since it is not flagged as worker node.")
-            continue
-        if n["in_use"]:
-            # Note: this may also include t he controller host
-            logger.debug(f"Found peer with name: {n['name']}")
-            hosts.append(n["address"])
+    if hosts is None:
+        # Query the scheduler for a list of peers
+        hosts = []
+        for n in controller.scheduler_client.get_nodes():
+            if n["is_worker"] is False:
+                logger.debug(
+                    f"Ignoring peer node {n['name']} since it is not flagged as worker node."
+                )
+                continue
+            if n["in_use"]:
+                # Note: this may also include t he controller host
+                logger.debug(f"Found peer with name: {n['name']}")
+                hosts.append(n["address"])
     logger.debug(f"Found a total of {len(hosts)} peers")
+    contents = "".join(f"{h}\n" for h in hosts)
+    if os.path.exists(hostfile_path):
+        with open(hostfile_path) as f:
+            if f.read() == contents:
+                logger.debug(f"Hostfile at {hostfile_path} is up to date")
+                return
     # When first writing the hostfile, create directory if not exists
     os.makedirs(os.path.dirname(hostfile_path), exist_ok=True)
-    # Write/Update hostfile
-    with open(hostfile_path, "w") as f:
-        logger.debug(f"Updating hostfile at {hostfile_path}")
-        for h in hosts:
-            print(h, file=f)
+    # Write/Update hostfile. Replacing it in one go ensures that readers never
+    # see a partially written file.
+    logger.debug(f"Updating hostfile at {hostfile_path}")
+    tmp_path = f"{hostfile_path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(contents)
+    os.replace(tmp_path, hostfile_path)
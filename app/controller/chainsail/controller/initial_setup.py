@@ -11,20 +11,52 @@ def setup_stepsizes(current_storage, schedule, previous_storage=None):
     """
     Sets up stepsizes, possibly based on a previous simulation.
 
+    If the local samplers of the previous simulation saved their adaption
+    states (adapted stepsize and mass matrix), these are interpolated to
+    the new schedule, too.
+
     Args:
         current_storage(:class:`SimulationStorage`): storage for simulation
           to be set up
         schedule(dict): current parameter schedule
         previous_storage(:class:`SimulationStorage`): storage for previous
           simulation
+
+    Returns:
+        bool: whether adaption states were set up
     """
     if previous_storage is None:
         stepsizes = np.linspace(1e-3, 1e-1, len(schedule))
-    else:
+        current_storage.save_initial_stepsizes(stepsizes)
+        return False
+
+    old_schedule = previous_storage.load_schedule()
+    old_adaption_states = previous_storage.load_all_final_adaption_states()
+    if old_adaption_states is None:
         old_stepsizes = previous_storage.load_final_stepsizes()
-        old_schedule = previous_storage.load_schedule()
         stepsizes = interpolate_stepsizes(schedule, old_schedule, old_stepsizes)
-    current_storage.save_initial_stepsizes(stepsizes)
+        current_storage.save_initial_stepsizes(stepsizes)
+        return False
+
+    adaption_states = interpolate_adaption_states(schedule, old_schedule, old_adaption_states)
+    current_storage.save_initial_stepsizes(np.array([s["stepsize"] for s in adaption_states]))
+    current_storage.save_initial_adaption_states(adaption_states)
+    return True
+
+
+def _check_schedules(schedule, old_schedule):
+    if len(schedule) > 1 or len(old_schedule) > 1:
+        raise ValueError(("stepsizes can be interpolated only for " "single-parameter schedules"))
+    new_params = list(schedule.values())[0]
+    old_params = list(old_schedule.values())[0]
+
+    err_msg = "{} schedule parameters must be a decreasing sequence"
+    if not np.all(np.diff(new_params) < 0):
+        raise ValueError(err_msg.format("New"))
+    if not np.all(np.diff(old_params) < 0):
+        raise ValueError(err_msg.format("Old"))
+
+    return new_params, old_params
 
 
 def interpolate_stepsizes(schedule, old_schedule, old_stepsizes):
@@ -40,16 +72,7 @@ def interpolate_stepsizes(schedule, old_schedule, old_stepsizes):
         old_schedule(dict): previous parameter schedule
         old_stepsizes(dict): previous set of stepsizes
     """
-    if len(schedule) > 1 or len(old_schedule) > 1:
-        raise ValueError(("stepsizes can be interpolated only for " "single-parameter schedules"))
-    new_params = list(schedule.values())[0]
-    old_params = list(old_schedule.values())[0]
-
-    err_msg = "{} schedule parameters must be a decreasing sequence"
-    if not np.all(np.diff(new_params) < 0):
-        raise ValueError(err_msg.format("New"))
-    if not np.all(np.diff(old_params) < 0):
-        raise ValueError(err_msg.format("Old"))
+    new_params, old_params = _check_schedules(schedule, old_schedule)
     if len(old_params) != len(old_stepsizes):
         raise ValueError("Old schedule parameters and old stepsizes must have same length")
 
@@ -61,6 +84,48 @@ def interpolate_stepsizes(schedule, old_schedule, old_stepsizes):
     return interpolated_stepsizes[::-1]
 
 
+def interpolate_adaption_states(schedule, old_schedule, old_adaption_states):
+    """
+    Interpolates local sampler adaption states from a previous simulation.
+
+    Stepsizes are interpolated as in :func:`interpolate_stepsizes` and the
+    diagonals of the inverse mass matrices are interpolated element-wise.
+
+    Args:
+        schedule(dict): current parameter schedule
+        old_schedule(dict): previous parameter schedule
+        old_adaption_states(list): adaption states of the previous
+          simulation's replicas, ordered like the previous schedule
+
+    Returns:
+        list: adaption states for the replicas of the new schedule
+    """
+    new_params, old_params = _check_schedules(schedule, old_schedule)
+    if len(old_params) != len(old_adaption_states):
+        raise ValueError("Old schedule parameters and old adaption states must have same length")
+
+    old_stepsizes = np.array([s["stepsize"] for s in old_adaption_states])
+    stepsizes = interpolate_stepsizes(schedule, old_schedule, old_stepsizes)
+    if any(s.get("inverse_mass") is None for s in old_adaption_states):
+        return [{"stepsize": s, "inverse_mass": None} for s in stepsizes]
+
+    old_inverse_masses = np.array([s["inverse_mass"] for s in old_adaption_states])
+    old_inverse_masses = old_inverse_masses.reshape(len(old_params), -1)
+    # same reversal trick as in interpolate_stepsizes()
+    inverse_masses = np.array(
+        [
+            np.interp(new_params[::-1], old_params[::-1], column[::-1])[::-1]
+            for column in old_inverse_masses.T
+        ]
+    ).T
+    shape = np.shape(old_adaption_states[0]["inverse_mass"])
+
+    return [
+        {"stepsize": s, "inverse_mass": m.reshape(shape)}
+        for s, m in zip(stepsizes, inverse_masses)
+    ]
+
+
 def draw_initial_states(schedule, previous_storage, dos, dos_burnin, dos_thinning_step):
     """
     Draw initial states using the density of states.
@@ -149,6 +149,14 @@ def run(job, config, storage, hostfile, job_spec):
         add_HealthServicer_to_server(Health(callback=controller_state), server)
         server.add_insecure_port(f"[::]:{config.port}")
         server.start()
+        # Push the final status to the scheduler instead of having it wait
+        # for it. The health service keeps serving the final status for
+        # the case that reporting fails.
+        controller_proc.join()
+        try:
+            controller.scheduler_client.report_exit(controller_state().lower())
+        except Exception as e:
+            logger.exception(e)
         server.wait_for_termination()
 
 
@@ -0,0 +1,267 @@
+"""
+Client for the scheduler endpoints the controller talks to
+"""
+import logging
+import random
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("chainsail.controller")
+
+
+def _is_client_error(response) -> bool:
+    return response is not None and 400 <= response.status_code < 500
+
+
+class SchedulerClient:
+    """
+    Talks to the scheduler via a single, pooled HTTP session.
+
+    Requests which failed due to connection problems or server errors are
+    retried with exponential backoff and full jitter, and scaling requests
+    can be made asynchronously, such that the controller can keep doing
+    other work while nodes are created.
+    """
+
+    SCALE_ENDPOINT = "/internal/job/{id}/scale/{n}"
+    SCALING_OPERATION_ENDPOINT = "/internal/job/{id}/scale_operation/{operation_id}?wait={wait}"
+    NODES_ENDPOINT = "/job/{id}/nodes"
+    ADD_ITERATION_ENDPOINT = "/internal/job/{id}/add_iteration/{iteration}"
+    FINISH_ITERATION_ENDPOINT = "/internal/job/{id}/finish_iteration/{iteration}"
+    EXIT_ENDPOINT = "/internal/job/{id}/exit/{status}"
+
+    def __init__(
+        self,
+        job_id,
+        scheduler_address,
+        scheduler_port,
+        connection_retries=5,
+        backoff_base=1,
+        backoff_max=60,
+        connection_timeout=1200,
+        scaling_timeout=1200,
+        scaling_poll_wait=30,
+    ):
+        """
+        Initializes a scheduler client.
+
+        Args:
+            job_id(int): The id of the Chainsail job to which the controller belongs
+            scheduler_address(str): The address to the scheduler
+            scheduler_port(int): The scheduler's listening port
+            connection_retries(int): the number of connection attempts to make
+              when contacting the scheduler
+            backoff_base(float): base interval in seconds for the exponential
+              backoff between retries
+            backoff_max(float): maximum interval in seconds between retries
+            connection_timeout(int): timeout in seconds for a single request
+            scaling_timeout(int): timeout in seconds for scaling the job,
+              including waiting for already running scaling operations
+            scaling_poll_wait(int): time in seconds the scheduler is asked to
+              wait for a scaling operation to finish before answering a
+              status request
+        """
+        self.job_id = job_id
+        self.base_url = f"http://{scheduler_address}:{scheduler_port}"
+        self.connection_retries = connection_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connection_timeout = connection_timeout
+        self.scaling_timeout = scaling_timeout
+        self.scaling_poll_wait = scaling_poll_wait
+        self._session = None
+        self._executor = None
+
+    @property
+    def session(self):
+        # Created lazily such that a client instance can be handed over to
+        # a forked process before any connections are opened.
+        if self._session is None:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            self._session.mount("http://", adapter)
+        return self._session
+
+    def _backoff(self, attempt):
+        """Sleeps for a random interval which grows exponentially with `attempt`."""
+        time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt)))
+
+    def _request(self, method, endpoint, json=None):
+        """
+        Makes a request to the scheduler, retrying on connection errors and
+        server errors. Client errors (4xx), e.g. conflicts, are raised right
+        away since repeating the request would not change the answer.
+
+        Args:
+            method(str): HTTP method
+            endpoint(str): endpoint path
+            json(dict): optional request body
+
+        Returns:
+            :class:`requests.Response`: the successful response
+        """
+        url = self.base_url + endpoint
+        for attempt in range(self.connection_retries):
+            try:
+                kwargs = {} if json is None else {"json": json}
+                r = self.session.request(method, url, timeout=self.connection_timeout, **kwargs)
+                r.raise_for_status()
+                return r
+            except Exception as e:
+                if isinstance(e, requests.HTTPError) and _is_client_error(e.response):
+                    raise e
+                logger.error(f"Request {method} {endpoint} to scheduler failed: {repr(e)}")
+                if (attempt + 1) == self.connection_retries:
+                    logger.critical(f"Used all attempts for request {method} {endpoint}.")
+                    raise e
+                self._backoff(attempt)
+
+    def _start_scaling(self, num_replicas):
+        """
+        Asks the scheduler to start scaling the job.
+
+        Returns:
+            str: the ID of the scaling operation, or None if the job is
+              already being scaled
+        """
+        endpoint = self.SCALE_ENDPOINT.format(id=self.job_id, n=num_replicas)
+        try:
+            return self._request("POST", endpoint).json()["operation_id"]
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 409:
+                raise e
+            return None
+
+    def _await_scaling(self, operation_id, deadline):
+        """
+        Long-polls the status of a scaling operation until it has finished.
+
+        Returns:
+            dict: the final status of the scaling operation
+        """
+        endpoint = self.SCALING_OPERATION_ENDPOINT.format(
+            id=self.job_id, operation_id=operation_id, wait=self.scaling_poll_wait
+        )
+        while True:
+            status = self._request("GET", endpoint).json()
+            if status["status"] != "running":
+                return status
+            if time.time() > deadline:
+                raise TimeoutError(
+                    f"Scaling operation {operation_id} did not finish within "
+                    f"{self.scaling_timeout} seconds"
+                )
+
+    def scale(self, num_replicas):
+        """
+        Asks the scheduler to scale the job and waits for scaling to finish.
+
+        The scheduler scales jobs asynchronously, so the status of the
+        scaling operation is polled until it has finished. If the job is
+        already being scaled, scaling is requested again until that scaling
+        operation has finished or `scaling_timeout` is reached.
+
+        Args:
+            num_replicas(int): number of replicas to scale to
+
+        Returns:
+            list: the addresses of the job's worker nodes after scaling, i.e.
+              the contents of the MPI hostfile
+        """
+        deadline = time.time() + self.scaling_timeout
+        attempt = 0
+        while True:
+            operation_id = self._start_scaling(num_replicas)
+            if operation_id is not None:
+                status = self._await_scaling(operation_id, deadline)
+                if status["status"] == "succeeded":
+                    return status["hosts"]
+                if status["status"] == "failed":
+                    raise RuntimeError(
+                        f"Scaling operation {operation_id} failed: {status.get('error')}"
+                    )
+            if time.time() > deadline:
+                raise TimeoutError(
+                    f"Job was still being scaled after {self.scaling_timeout} seconds"
+                )
+            logger.warning(
+                "Attempted to scale a job which is already scaling. Waiting for "
+                "scaling to finish."
+            )
+            self._backoff(attempt)
+            attempt += 1
+
+    def scale_async(self, num_replicas) -> Future:
+        """
+        Asks the scheduler to scale the job without waiting for scaling to
+        finish.
+
+        Args:
+            num_replicas(int): number of replicas to scale to
+
+        Returns:
+            :class:`concurrent.futures.Future`: future which resolves to the
+              addresses of the job's worker nodes once the job has been scaled
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor.submit(self.scale, num_replicas)
+
+    def add_iteration(self, iteration, num_replicas=None, schedule=None):
+        """
+        Tells the scheduler that an iteration of the main controller loop started.
+
+        Args:
+            iteration(str): name of the iteration
+            num_replicas(int): number of replicas of the iteration's simulation
+            schedule(dict): summary of the iteration's schedule
+        """
+        logger.debug(f"Asking scheduler to add controller iteration {iteration}")
+        report = {"num_replicas": num_replicas, "schedule": schedule}
+        self._request(
+            "POST",
+            self.ADD_ITERATION_ENDPOINT.format(id=self.job_id, iteration=iteration),
+            json={k: v for k, v in report.items() if v is not None},
+        )
+
+    def finish_iteration(self, iteration, dos_estimation_duration=None):
+        """
+        Tells the scheduler that an iteration of the main controller loop finished.
+
+        Args:
+            iteration(str): name of the iteration
+            dos_estimation_duration(float): seconds it took to estimate the
+              density of states
+        """
+        logger.debug(f"Telling scheduler that controller iteration {iteration} finished")
+        report = {"dos_estimation_duration": dos_estimation_duration}
+        self._request(
+            "POST",
+            self.FINISH_ITERATION_ENDPOINT.format(id=self.job_id, iteration=iteration),
+            json={k: v for k, v in report.items() if v is not None},
+        )
+
+    def get_nodes(self):
+        """
+        Queries the scheduler for the nodes of the job.
+
+        Returns:
+            list: node dictionaries as returned by the scheduler
+        """
+        logger.debug("Querying peer addresses")
+        return self._request("GET", self.NODES_ENDPOINT.format(id=self.job_id)).json()
+
+    def report_exit(self, status):
+        """
+        Tells the scheduler that the controller exited, such that the job
+        can be stopped right away.
+
+        Args:
+            status(str): the final status of the controller, either
+              "success" or "failed"
+        """
+        logger.info(f"Reporting exit status {status} to scheduler")
+        self._request("POST", self.EXIT_ENDPOINT.format(id=self.job_id, status=status))
@@ -3,7 +3,11 @@ from itertools import cycle
 
 import numpy as np
 
-from chainsail.controller.initial_setup import draw_initial_states, interpolate_stepsizes
+from chainsail.controller.initial_setup import (
+    draw_initial_states,
+    interpolate_adaption_states,
+    interpolate_stepsizes,
+)
 
 
 class MockStorage:
@@ -103,3 +107,24 @@ class TestStepsizeInterpolation(unittest.TestCase):
         bad_stepsizes = [0.9, 3]
         with self.assertRaises(ValueError):
             interpolate_stepsizes(new_schedule, old_schedule, bad_stepsizes)
+
+    def test_interpolate_adaption_states(self):
+        old_schedule = {"beta": [1.0, 0.8, 0.6, 0.4, 0.2]}
+        old_states = [
+            {"stepsize": s, "inverse_mass": np.array([s, 10 * s])} for s in [2, 4, 6, 8, 10]
+        ]
+        new_schedule = {"beta": [1.0, 0.7, 0.3]}
+
+        new_states = interpolate_adaption_states(new_schedule, old_schedule, old_states)
+        self.assertTrue(np.allclose([s["stepsize"] for s in new_states], [2, 5, 9]))
+        expected_masses = [[2, 20], [5, 50], [9, 90]]
+        self.assertTrue(np.allclose([s["inverse_mass"] for s in new_states], expected_masses))
+
+        # adaption states without mass matrix
+        old_states = [{"stepsize": s, "inverse_mass": None} for s in [2, 4, 6, 8, 10]]
+        new_states = interpolate_adaption_states(new_schedule, old_schedule, old_states)
+        self.assertTrue(all(s["inverse_mass"] is None for s in new_states))
+
+        # non-equal number of parameters and adaption states
+        with self.assertRaises(ValueError):
+            interpolate_adaption_states(new_schedule, old_schedule, old_states[:2])
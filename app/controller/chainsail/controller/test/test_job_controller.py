@@ -17,7 +17,7 @@ def mock_setup_initial_states(current_storage, schedule, previous_storage):
 
 
 class MockWham:
-    def estimate_dos(self, energies, parameters):
+    def estimate_dos(self, energies, parameters, initial_dos=None, pooled_runs=None):
         return len(parameters["beta"])
 
 
@@ -42,6 +42,8 @@ class MockStorageBackend(AbstractStorageBackend):
         self._data[filename] = data
 
     def load(self, filename, data_type):
+        if filename not in self._data:
+            raise ValueError(f"{filename} not found")
         return self._data[filename]
 
     @property
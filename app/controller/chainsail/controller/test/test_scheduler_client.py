@@ -0,0 +1,155 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from chainsail.controller.scheduler_client import SchedulerClient
+
+
+def mk_response(status_code, json=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.json = MagicMock(return_value=json)
+    return response
+
+
+def mk_client(responses, **kwargs):
+    client = SchedulerClient(1, "scheduler", 5000, backoff_base=0, **kwargs)
+    session = MagicMock()
+    session.request.side_effect = responses
+    client._session = session
+    return client, session
+
+
+def test_get_nodes():
+    nodes = [{"name": "node-1", "address": "1.2.3.4", "is_worker": True, "in_use": True}]
+    client, session = mk_client([mk_response(200, nodes)])
+    assert client.get_nodes() == nodes
+    session.request.assert_called_once_with(
+        "GET", "http://scheduler:5000/job/1/nodes", timeout=client.connection_timeout
+    )
+
+
+def test_report_iteration():
+    client, session = mk_client([mk_response(200), mk_response(200)])
+    schedule = {"beta": {"min": 0.1, "max": 1.0}}
+    client.add_iteration("optimization_run0", num_replicas=4, schedule=schedule)
+    client.finish_iteration("optimization_run0", dos_estimation_duration=1.5)
+    assert session.request.call_args_list[0].kwargs["json"] == {
+        "num_replicas": 4,
+        "schedule": schedule,
+    }
+    assert session.request.call_args_list[1].args == (
+        "POST",
+        "http://scheduler:5000/internal/job/1/finish_iteration/optimization_run0",
+    )
+    assert session.request.call_args_list[1].kwargs["json"] == {"dos_estimation_duration": 1.5}
+
+
+def test_request_retries_with_backoff():
+    client, session = mk_client(
+        [requests.ConnectionError(), mk_response(500), mk_response(200)], connection_retries=3
+    )
+    with patch("chainsail.controller.scheduler_client.time.sleep") as sleep:
+        client.add_iteration("optimization_run0")
+    assert session.request.call_count == 3
+    assert sleep.call_count == 2
+
+
+def test_request_gives_up():
+    client, session = mk_client([mk_response(500)] * 2, connection_retries=2)
+    with pytest.raises(requests.HTTPError):
+        client.add_iteration("optimization_run0")
+    assert session.request.call_count == 2
+
+
+def test_request_does_not_retry_client_errors():
+    client, session = mk_client([mk_response(409), mk_response(200)], connection_retries=3)
+    with patch("chainsail.controller.scheduler_client.time.sleep") as sleep:
+        with pytest.raises(requests.HTTPError):
+            client.add_iteration("optimization_run0")
+    assert session.request.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_scale_waits_for_running_scaling():
+    hosts = ["node-1", "node-2", "node-3"]
+    client, session = mk_client(
+        [
+            mk_response(409),
+            mk_response(409),
+            mk_response(202, {"operation_id": "op"}),
+            mk_response(200, {"operation_id": "op", "status": "running"}),
+            mk_response(200, {"operation_id": "op", "status": "succeeded", "hosts": hosts}),
+        ]
+    )
+    assert client.scale_async(3).result(timeout=5) == hosts
+    assert session.request.call_count == 5
+    session.request.assert_any_call(
+        "POST", "http://scheduler:5000/internal/job/1/scale/3", timeout=client.connection_timeout
+    )
+    session.request.assert_called_with(
+        "GET",
+        f"http://scheduler:5000/internal/job/1/scale_operation/op?wait={client.scaling_poll_wait}",
+        timeout=client.connection_timeout,
+    )
+
+
+def test_scale_retries_conflicting_operation():
+    client, session = mk_client(
+        [
+            mk_response(202, {"operation_id": "op1"}),
+            mk_response(200, {"operation_id": "op1", "status": "conflict"}),
+            mk_response(202, {"operation_id": "op2"}),
+            mk_response(200, {"operation_id": "op2", "status": "succeeded", "hosts": []}),
+        ]
+    )
+    assert client.scale(0) == []
+    assert session.request.call_count == 4
+
+
+def test_scale_fails():
+    client, _ = mk_client(
+        [
+            mk_response(202, {"operation_id": "op"}),
+            mk_response(200, {"operation_id": "op", "status": "failed", "error": "JobError()"}),
+        ]
+    )
+    with pytest.raises(RuntimeError):
+        client.scale(3)
+
+
+def test_scale_times_out():
+    client, _ = mk_client([mk_response(409)] * 100, scaling_timeout=-1)
+    with pytest.raises(TimeoutError):
+        client.scale(3)
+
+
+def test_update_nodes_mpi(tmp_path):
+    from chainsail.controller import update_nodes_mpi
+
+    hostfile = tmp_path / "hostfile_dir" / "hostfile"
+    controller = MagicMock()
+    controller.scheduler_client.get_nodes.return_value = [
+        {"name": "controller", "address": "0.0.0.0", "is_worker": False, "in_use": True},
+        {"name": "node-1", "address": "1.2.3.4", "is_worker": True, "in_use": True},
+        {"name": "node-2", "address": "5.6.7.8", "is_worker": True, "in_use": False},
+    ]
+    update_nodes_mpi(controller, str(hostfile))
+    assert hostfile.read_text() == "1.2.3.4\n"
+
+    # Hosts returned when scaling are written without querying the scheduler
+    controller.scheduler_client.get_nodes.reset_mock()
+    update_nodes_mpi(controller, str(hostfile), hosts=["1.2.3.4", "9.9.9.9"])
+    controller.scheduler_client.get_nodes.assert_not_called()
+    assert hostfile.read_text() == "1.2.3.4\n9.9.9.9\n"
+
+
+def test_report_exit():
+    client, session = mk_client([mk_response(200)])
+    client.report_exit("success")
+    session.request.assert_called_once_with(
+        "POST",
+        "http://scheduler:5000/internal/job/1/exit/success",
+        timeout=client.connection_timeout,
+    )
@@ -0,0 +1,57 @@
+"""
+httpstan server which shares the Stan models it compiles with other nodes
+"""
+import logging
+
+import click
+import httpstan.app
+from aiohttp import web
+
+from chainsail.common.custom_logging import configure_logging
+from chainsail.common.storage import load_storage_config
+from chainsail.httpstan_server.model_cache import ModelCache, model_cache_middleware
+
+logger = logging.getLogger("chainsail.httpstan_server")
+
+
+@click.command()
+@click.option(
+    "--port",
+    type=int,
+    default=8082,
+    envvar="HTTPSTAN_PORT",
+    help="the port the httpstan server listens on",
+)
+@click.option(
+    "--host",
+    type=str,
+    default="127.0.0.1",
+    help="the address the httpstan server listens on",
+)
+@click.option(
+    "--storage",
+    type=click.Path(exists=False),
+    default=None,
+    envvar="HTTPSTAN_STORAGE_CONFIG",
+    help="path to storage backend config file. Compiled models are not shared without it.",
+)
+@click.option(
+    "--remote_logging_config",
+    type=click.Path(exists=False),
+    default=None,
+    help="path to remote logging config file",
+)
+def run(port, host, storage, remote_logging_config):
+    configure_logging("chainsail.httpstan_server", "INFO", remote_logging_config)
+
+    app = httpstan.app.make_app()
+    if storage:
+        backend = load_storage_config(storage).get_storage_backend()
+        app.middlewares.append(model_cache_middleware(ModelCache(backend)))
+    else:
+        logger.info("No storage backend configured, compiled models are not shared")
+    web.run_app(app, host=host, port=port)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,152 @@
+"""
+Sharing of compiled Stan models between httpstan servers through the storage backend
+"""
+import asyncio
+import io
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+import httpstan.cache
+import httpstan.models
+from aiohttp import web
+
+from chainsail.common.storage import AbstractStorageBackend
+
+logger = logging.getLogger("chainsail.httpstan_server")
+
+MODELS_DIRNAME = "stan_models"
+CREATE_MODEL_PATH = "/v1/models"
+
+
+class ModelCache:
+    """
+    Compiled Stan models in the storage backend.
+
+    httpstan names models after a hash of their program code and of the
+    versions of httpstan and Stan, and keeps each compiled model in a
+    directory of its local cache. These directories are archived in the
+    storage backend under the model's name, such that a model only needs to
+    be compiled once by the first node which uses it.
+
+    Args:
+        backend: The storage backend to keep the archives in
+        dirname: The directory of the storage backend to keep the archives in
+    """
+
+    def __init__(self, backend: AbstractStorageBackend, dirname: str = MODELS_DIRNAME):
+        self._backend = backend
+        self._dirname = dirname
+
+    def _file_name(self, model_name: str) -> str:
+        # Model names look like "models/<model_id>"
+        return os.path.join(self._dirname, f"{os.path.basename(model_name)}.tar.gz")
+
+    def download(self, model_name: str, model_dir: Path) -> bool:
+        """Fetches a compiled model into httpstan's local cache.
+
+        Args:
+            model_name: The httpstan model name
+            model_dir: The directory of the model in httpstan's local cache
+
+        Returns:
+            Whether the model was found
+        """
+        try:
+            archive = self._backend.load(self._file_name(model_name), data_type="bytes")
+        except self._backend.file_not_found_exception:
+            return False
+        model_dir.parent.mkdir(parents=True, exist_ok=True)
+        # Extracting next to the final directory and renaming it makes sure
+        # that httpstan never sees a partially extracted model
+        tmp_dir = tempfile.mkdtemp(dir=model_dir.parent)
+        try:
+            with tarfile.open(fileobj=io.BytesIO(archive), mode="r:gz") as tar:
+                for member in tar.getmembers():
+                    # Links could point outside of the model directory, and
+                    # compiled models consist of regular files only
+                    if (
+                        member.name.startswith("/")
+                        or ".." in Path(member.name).parts
+                        or not (member.isfile() or member.isdir())
+                    ):
+                        raise ValueError(f"Refusing to extract {member.name} of {model_name}")
+                tar.extractall(tmp_dir)
+            os.rename(tmp_dir, model_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            # Another request might have fetched the model in the meantime
+            if not model_dir.exists():
+                raise
+        return True
+
+    def upload(self, model_name: str, model_dir: Path) -> None:
+        """Archives a compiled model from httpstan's local cache.
+
+        Args:
+            model_name: The httpstan model name
+            model_dir: The directory of the model in httpstan's local cache
+        """
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+            tar.add(model_dir, arcname=".")
+        self._backend.write(archive.getvalue(), self._file_name(model_name), data_type="bytes")
+
+
+def _log_upload(model_name: str, upload: asyncio.Future):
+    if upload.exception() is not None:
+        logger.error(f"Failed to add {model_name} to the model cache: {upload.exception()!r}")
+    else:
+        logger.info(f"Added {model_name} to the model cache")
+
+
+def model_cache_middleware(cache: ModelCache) -> Callable:
+    """Creates an aiohttp middleware which shares the models httpstan compiles.
+
+    Before a model is created, it is fetched from the cache unless httpstan
+    already has it, in which case httpstan skips the compilation. Models which
+    httpstan had to compile are uploaded to the cache. Failures of the cache
+    are logged and otherwise ignored. Uploads happen in the background, such
+    that they do not delay the response.
+
+    Args:
+        cache: The cache of compiled models
+
+    Returns:
+        The middleware
+    """
+
+    @web.middleware
+    async def middleware(request: web.Request, handler):
+        if request.method != "POST" or request.path != CREATE_MODEL_PATH:
+            return await handler(request)
+        try:
+            program_code = (await request.json())["program_code"]
+        except (ValueError, KeyError, TypeError):
+            # httpstan responds to invalid requests itself
+            return await handler(request)
+        model_name = httpstan.models.calculate_model_name(program_code)
+        model_dir = httpstan.cache.model_directory(model_name)
+        loop = asyncio.get_running_loop()
+        compiled_before = model_dir.exists()
+        if not compiled_before:
+            try:
+                compiled_before = await loop.run_in_executor(
+                    None, cache.download, model_name, model_dir
+                )
+            except Exception:
+                logger.exception(f"Failed to fetch {model_name} from the model cache")
+            else:
+                if compiled_before:
+                    logger.info(f"Fetched {model_name} from the model cache")
+        response = await handler(request)
+        if response.status == 201 and not compiled_before and model_dir.exists():
+            upload = loop.run_in_executor(None, cache.upload, model_name, model_dir)
+            upload.add_done_callback(lambda f: _log_upload(model_name, f))
+        return response
+
+    return middleware
@@ -0,0 +1,145 @@
+import asyncio
+import io
+import tarfile
+import threading
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from chainsail.common.storage import LocalStorageBackend
+from chainsail.httpstan_server.model_cache import (
+    CREATE_MODEL_PATH,
+    ModelCache,
+    model_cache_middleware,
+)
+
+PROGRAM_CODE = "parameters {real y;} model {y ~ normal(0, 1);}"
+
+
+class RecordingModelCache(ModelCache):
+    """Model cache which signals the completion of uploads"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.uploaded = threading.Event()
+
+    def upload(self, model_name, model_dir):
+        super().upload(model_name, model_dir)
+        self.uploaded.set()
+
+
+def mk_model_dir(model_dir):
+    (model_dir / "lib").mkdir(parents=True)
+    (model_dir / "lib" / "model.so").write_bytes(b"\x7fELF")
+    (model_dir / "stanc.json").write_text("[]")
+
+
+def read_model_dir(model_dir):
+    return {
+        str(path.relative_to(model_dir)): path.read_bytes()
+        for path in model_dir.rglob("*")
+        if path.is_file()
+    }
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RecordingModelCache(LocalStorageBackend(), str(tmp_path / "storage"))
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    model_dir = tmp_path / "httpstan" / "models" / "abc"
+    with patch("httpstan.models.calculate_model_name", return_value="models/abc"), patch(
+        "httpstan.cache.model_directory", return_value=model_dir
+    ):
+        yield model_dir
+
+
+def test_model_cache_roundtrip(tmp_path, cache):
+    model_dir = tmp_path / "compiled"
+    mk_model_dir(model_dir)
+    cache.upload("models/abc", model_dir)
+
+    fetched_dir = tmp_path / "fetched" / "abc"
+    assert cache.download("models/abc", fetched_dir)
+    assert read_model_dir(fetched_dir) == read_model_dir(model_dir)
+
+
+def test_model_cache_download_missing_model(tmp_path, cache):
+    model_dir = tmp_path / "fetched" / "abc"
+    assert not cache.download("models/abc", model_dir)
+    assert not model_dir.exists()
+
+
+@pytest.mark.parametrize("link_type", [tarfile.SYMTYPE, tarfile.LNKTYPE])
+def test_model_cache_rejects_links(tmp_path, cache, link_type):
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+        link = tarfile.TarInfo("lib/model.so")
+        link.type = link_type
+        link.linkname = "/etc/passwd"
+        tar.addfile(link)
+    LocalStorageBackend().write(
+        archive.getvalue(), str(tmp_path / "storage" / "abc.tar.gz"), data_type="bytes"
+    )
+
+    model_dir = tmp_path / "fetched" / "abc"
+    with pytest.raises(ValueError):
+        cache.download("models/abc", model_dir)
+    assert not model_dir.exists()
+
+
+def create_model(cache, compile_model):
+    """Sends a model creation request through the middleware
+
+    Args:
+        cache: The model cache used by the middleware
+        compile_model: Stand-in for httpstan's model creation handler
+
+    Returns:
+        The status of the response
+    """
+
+    async def handler(request):
+        await compile_model()
+        return web.json_response({"name": "models/abc"}, status=201)
+
+    async def send():
+        app = web.Application(middlewares=[model_cache_middleware(cache)])
+        app.router.add_post(CREATE_MODEL_PATH, handler)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post(CREATE_MODEL_PATH, json={"program_code": PROGRAM_CODE})
+            return response.status
+
+    return asyncio.run(send())
+
+
+def test_middleware_uploads_compiled_model(tmp_path, cache, model_dir):
+    async def compile_model():
+        mk_model_dir(model_dir)
+
+    assert create_model(cache, compile_model) == 201
+    # The upload happens in the background
+    assert cache.uploaded.wait(timeout=5)
+    fetched_dir = tmp_path / "fetched" / "abc"
+    assert cache.download("models/abc", fetched_dir)
+    assert read_model_dir(fetched_dir) == read_model_dir(model_dir)
+
+
+def test_middleware_fetches_cached_model(tmp_path, cache, model_dir):
+    compiled_dir = tmp_path / "compiled"
+    mk_model_dir(compiled_dir)
+    cache.upload("models/abc", compiled_dir)
+    cache.uploaded.clear()
+    fetched = []
+
+    async def compile_model():
+        # httpstan finds the model in its local cache and skips compiling it
+        fetched.append(read_model_dir(model_dir))
+
+    assert create_model(cache, compile_model) == 201
+    assert fetched == [read_model_dir(compiled_dir)]
+    assert not cache.uploaded.wait(timeout=0.5)
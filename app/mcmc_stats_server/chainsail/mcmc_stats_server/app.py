@@ -1,11 +1,11 @@
-from io import StringIO
 import os
 
-from flask import Flask, jsonify
-import numpy as np
+from flask import Flask, Response, jsonify, request
 import yaml
 
 from chainsail.common.storage import load_storage_backend, SimulationStorage
+from chainsail.mcmc_stats_server.cache import RunAcceptanceRates, RunCache, RunEnergies
+from chainsail.mcmc_stats_server.stream import RunStatsStream, sse_events
 
 app = Flask(__name__)
 
@@ -15,30 +15,52 @@ storage_backend = load_storage_backend("cloud", storage_config["backend_config"]
 dirname = os.getenv("STORAGE_DIRNAME")
 if not dirname:
     raise ValueError("STORAGE_DIRNAME not set")
+poll_interval = float(os.getenv("STATS_POLL_INTERVAL", 10))
+
+
+def _run_storage(job_id, simulation_run):
+    return SimulationStorage(dirname, f"{job_id}/{simulation_run}", storage_backend)
+
+
+run_energies = RunCache(lambda key: RunEnergies(_run_storage(*key)))
+run_acceptance_rates = RunCache(lambda key: RunAcceptanceRates(_run_storage(*key)))
+run_streams = RunCache(
+    lambda key: RunStatsStream(run_energies.get(key), run_acceptance_rates.get(key), poll_interval)
+)
 
 
 @app.route("/mcmc_stats/<job_id>/<simulation_run>/neg_log_prob_sum", methods=["GET"])
 def neg_log_prob_sum(job_id, simulation_run):
-    storage = SimulationStorage(dirname, f"{job_id}/{simulation_run}", storage_backend)
-    energies = storage.load_all_energies(fail_if_not_existing=False)
-    dump_step = storage.load_config()["re"]["dump_step"]
-    try:
-        summed_energies = energies.sum(0)
-    except ValueError:
-        # this is raised if the array is jagged, i.e., not all energies have been written
-        # out yet for a given sampling step
-        min_n_energies = min(map(len, energies))
-        energies = np.array(
-            [single_replica_energies[:min_n_energies] for single_replica_energies in energies]
-        )
-        summed_energies = energies.sum(0)
-    return jsonify(
-        {i * dump_step: summed_energy for i, summed_energy in enumerate(summed_energies)}
-    )
+    # Only energies recorded after the MCMC step given in `since` are returned
+    # such that clients which poll this endpoint can request just what is new
+    since = request.args.get("since", type=int)
+    return jsonify(run_energies.get((job_id, simulation_run)).since(since))
 
 
 @app.route("/mcmc_stats/<job_id>/<simulation_run>/re_acceptance_rates", methods=["GET"])
 def re_acceptance_rates(job_id, simulation_run):
-    storage = SimulationStorage(dirname, f"{job_id}/{simulation_run}", storage_backend)
-    stats = np.loadtxt(StringIO(storage.load_re_acceptance_rates()))
-    return jsonify({int(step_data[0]): list(step_data[1:]) for step_data in stats})
+    since = request.args.get("since", type=int)
+    return jsonify(run_acceptance_rates.get((job_id, simulation_run)).since(since))
+
+
+@app.route("/mcmc_stats/<job_id>/<simulation_run>/stream", methods=["GET"])
+def stream(job_id, simulation_run):
+    """Streams summed energies and acceptance rates as server-sent events.
+
+    All clients watching the same simulation run share a single reader, so
+    they receive new values without each of them polling the storage.
+    """
+    run_stream = run_streams.get((job_id, simulation_run))
+    subscription = run_stream.subscribe()
+
+    def events():
+        try:
+            yield from sse_events(subscription)
+        finally:
+            run_stream.unsubscribe(subscription)
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
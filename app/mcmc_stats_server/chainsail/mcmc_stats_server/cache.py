@@ -0,0 +1,198 @@
+"""
+Incremental, per-simulation run caches of the statistics served by the MCMC stats server
+"""
+from collections import OrderedDict
+from io import StringIO
+from threading import Lock
+from typing import Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from chainsail.common.storage import SimulationStorage
+
+
+class RunEnergies:
+    """
+    Sum of the energies of all replicas of a simulation run, which is
+    updated incrementally.
+
+    Each update only fetches the energy batches written since the previous
+    one. Only the summed energies are kept in memory, along with those
+    energies of each replica which could not be summed yet because other
+    replicas lag behind. Once all batches have been loaded, the storage is
+    not accessed anymore.
+
+    Args:
+        storage: storage of the simulation run
+    """
+
+    def __init__(self, storage: SimulationStorage):
+        self._storage = storage
+        self._lock = Lock()
+        self._config = None
+        # Per replica: the loaded energies which have not been summed yet
+        # and the sample number the next batch starts at
+        self._unsummed = []
+        self._next_batch_start = []
+        # The summed energies are the first `_n_summed` entries of a buffer
+        # whose capacity is doubled when it is full, such that appending to
+        # it does not copy all energies each time
+        self._summed = np.empty(0)
+        self._n_summed = 0
+
+    @property
+    def dump_step(self) -> Optional[int]:
+        return self._config["re"]["dump_step"] if self._config else None
+
+    @property
+    def complete(self) -> bool:
+        return self._config is not None and all(
+            start >= self._config["general"]["n_iterations"] for start in self._next_batch_start
+        )
+
+    def _load_config(self):
+        self._config = self._storage.load_config()
+        n_replicas = self._config["general"]["num_replicas"]
+        self._unsummed = [[] for _ in range(n_replicas)]
+        self._next_batch_start = [0] * n_replicas
+
+    def _ingest(self):
+        """Loads the energy batches which have not been loaded yet.
+
+        Batches are written in order, so loading stops at the first batch
+        of a replica which does not exist yet.
+        """
+        n_iterations = self._config["general"]["n_iterations"]
+        dump_interval = self._config["re"]["dump_interval"]
+        for r in range(len(self._unsummed)):
+            start = self._next_batch_start[r]
+            while start < n_iterations:
+                batch = self._storage.load_energies(
+                    f"replica{r + 1}", start, start + dump_interval, fail_if_not_existing=False
+                )
+                if len(batch) == 0:
+                    break
+                self._unsummed[r].append(np.asarray(batch))
+                start += dump_interval
+            self._next_batch_start[r] = start
+        # Not all replicas might have written the same number of batches yet,
+        # so only energies which are available for all replicas are summed
+        n_common = min(sum(map(len, batches)) for batches in self._unsummed)
+        if n_common == 0:
+            return
+        new_sums = np.zeros(n_common)
+        for r, batches in enumerate(self._unsummed):
+            energies = np.concatenate(batches)
+            new_sums += energies[:n_common]
+            self._unsummed[r] = [energies[n_common:]]
+        self._append_summed(new_sums)
+
+    def _append_summed(self, new_sums: np.ndarray):
+        n_summed = self._n_summed + len(new_sums)
+        if n_summed > len(self._summed):
+            summed = np.empty(max(n_summed, 2 * len(self._summed)))
+            summed[: self._n_summed] = self._summed[: self._n_summed]
+            self._summed = summed
+        self._summed[self._n_summed : n_summed] = new_sums
+        self._n_summed = n_summed
+
+    def update(self) -> np.ndarray:
+        """Loads new energy batches, if there are any.
+
+        Returns:
+            The summed energies of all replicas
+        """
+        with self._lock:
+            if self._config is None:
+                self._load_config()
+            if not self.complete:
+                self._ingest()
+            return self._summed[: self._n_summed]
+
+    def since(self, step: Optional[int] = None) -> Dict[int, float]:
+        """Updates the summed energies and returns those recorded after a step.
+
+        Args:
+            step: only summed energies recorded after this MCMC step are
+              returned. If None, all summed energies are returned.
+
+        Returns:
+            The summed energies, keyed by the MCMC step they were recorded at
+        """
+        summed = self.update()
+        dump_step = self.dump_step
+        first = 0 if step is None else max(0, step // dump_step + 1)
+        return {i * dump_step: float(summed[i]) for i in range(first, len(summed))}
+
+
+class RunAcceptanceRates:
+    """
+    Replica exchange acceptance rates of a simulation run, which are updated
+    incrementally.
+
+    The acceptance rates file only ever has lines appended to it, so on each
+    update only the lines which have not been seen before are parsed.
+
+    Args:
+        storage: storage of the simulation run
+    """
+
+    def __init__(self, storage: SimulationStorage):
+        self._storage = storage
+        self._lock = Lock()
+        self._n_lines = 0
+        self._rates = OrderedDict()
+
+    def _update(self):
+        """Parses lines which were appended to the acceptance rates file."""
+        lines = self._storage.load_re_acceptance_rates().splitlines()
+        # The file is rewritten as a whole each time rows are appended
+        # to it, so it never contains partially written lines
+        new_lines = [line for line in lines[self._n_lines :] if line.strip()]
+        self._n_lines = len(lines)
+        if new_lines:
+            stats = np.loadtxt(StringIO("\n".join(new_lines)), ndmin=2)
+            for step_data in stats:
+                self._rates[int(step_data[0])] = list(step_data[1:])
+
+    def since(self, step: Optional[int] = None) -> Dict[int, List[float]]:
+        """Updates the acceptance rates and returns those recorded after a step.
+
+        Args:
+            step: only acceptance rates recorded after this MCMC step are
+              returned. If None, all acceptance rates are returned.
+
+        Returns:
+            The acceptance rates, keyed by the MCMC step they were recorded at
+        """
+        with self._lock:
+            self._update()
+            return {s: r for s, r in self._rates.items() if step is None or s > step}
+
+
+class RunCache:
+    """
+    A bounded, least-recently-used registry of per-simulation run caches.
+
+    Args:
+        factory: creates the cache for a key which is not in the registry
+        max_size: maximum number of simulation runs to keep caches for
+    """
+
+    def __init__(self, factory: Callable[[Hashable], object], max_size: int = 64):
+        self._factory = factory
+        self._max_size = max_size
+        self._caches = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            cache = self._caches.get(key)
+            if cache is None:
+                cache = self._factory(key)
+                self._caches[key] = cache
+                if len(self._caches) > self._max_size:
+                    self._caches.popitem(last=False)
+            else:
+                self._caches.move_to_end(key)
+            return cache
@@ -0,0 +1,140 @@
+"""
+Streaming of the statistics of simulation runs to many subscribers
+"""
+import json
+import logging
+import time
+from queue import Empty, Queue
+from threading import Lock, Thread
+from typing import Dict, Iterator, List
+
+from chainsail.mcmc_stats_server.cache import RunAcceptanceRates, RunEnergies
+
+logger = logging.getLogger("chainsail.mcmc_stats_server")
+
+ENERGIES_EVENT = "energies"
+ACCEPTANCE_RATES_EVENT = "acceptance_rates"
+END_EVENT = "end"
+
+
+class RunStatsStream:
+    """
+    Tails the summed energies and acceptance rates of a simulation run and
+    fans new values out to all subscribers.
+
+    A single reader thread per run polls the storage for as long as there
+    are subscribers, so the storage load does not grow with the number of
+    clients watching a run. New subscribers first receive everything read so
+    far. Once the run is complete, subscribers receive a final end event.
+
+    Args:
+        energies: incremental cache of the run's summed energies
+        acceptance_rates: incremental cache of the run's acceptance rates
+        poll_interval: seconds to wait between polls of the storage
+    """
+
+    def __init__(
+        self,
+        energies: RunEnergies,
+        acceptance_rates: RunAcceptanceRates,
+        poll_interval: float = 10,
+    ):
+        self._energies = energies
+        self._acceptance_rates = acceptance_rates
+        self._poll_interval = poll_interval
+        self._lock = Lock()
+        self._subscribers: List[Queue] = []
+        self._reader = None
+        self._finished = False
+        # Everything read so far, which is replayed to new subscribers
+        self._events = {ENERGIES_EVENT: {}, ACCEPTANCE_RATES_EVENT: {}}
+
+    def subscribe(self) -> Queue:
+        """Registers a new subscriber and starts the reader if necessary.
+
+        Returns:
+            A queue which receives (event, data) tuples
+        """
+        subscription = Queue()
+        with self._lock:
+            for event, data in self._events.items():
+                if data:
+                    subscription.put((event, dict(data)))
+            if self._finished:
+                subscription.put((END_EVENT, {}))
+                return subscription
+            self._subscribers.append(subscription)
+            if self._reader is None:
+                self._reader = Thread(target=self._read, daemon=True)
+                self._reader.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Queue):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def _last_step(self, event: str):
+        steps = self._events[event]
+        return next(reversed(steps)) if steps else None
+
+    def _poll(self) -> Dict[str, Dict]:
+        new = {}
+        # Energies are polled first such that the acceptance rates are
+        # guaranteed to be final once the energies are complete
+        for event, cache in (
+            (ENERGIES_EVENT, self._energies),
+            (ACCEPTANCE_RATES_EVENT, self._acceptance_rates),
+        ):
+            try:
+                new[event] = cache.since(self._last_step(event))
+            except Exception as e:
+                # Statistics files only appear once the run has progressed
+                # far enough, so failing to read them is no reason to stop
+                logger.debug(f"Failed to read {event}: {e}")
+                new[event] = {}
+        return new
+
+    def _read(self):
+        while True:
+            new = self._poll()
+            with self._lock:
+                for event, data in new.items():
+                    if not data:
+                        continue
+                    self._events[event].update(data)
+                    for subscription in self._subscribers:
+                        subscription.put((event, data))
+                if self._energies.complete:
+                    self._finished = True
+                    for subscription in self._subscribers:
+                        subscription.put((END_EVENT, {}))
+                    self._subscribers.clear()
+                if not self._subscribers:
+                    self._reader = None
+                    return
+            time.sleep(self._poll_interval)
+
+
+def sse_events(subscription: Queue, keepalive_interval: float = 15) -> Iterator[str]:
+    """Formats the events of a subscription as server-sent events.
+
+    Comments are sent while there are no events, such that disconnected
+    clients are noticed and do not keep the subscription alive.
+
+    Args:
+        subscription: a subscription as returned by `RunStatsStream.subscribe`
+        keepalive_interval: seconds without events after which a comment is sent
+
+    Returns:
+        The server-sent events, ending with the end event of the run
+    """
+    while True:
+        try:
+            event, data = subscription.get(timeout=keepalive_interval)
+        except Empty:
+            yield ": keepalive\n\n"
+            continue
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        if event == END_EVENT:
+            return
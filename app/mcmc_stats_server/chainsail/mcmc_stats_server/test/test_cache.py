@@ -0,0 +1,153 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from chainsail.common.storage import LocalStorageBackend, SimulationStorage
+from chainsail.mcmc_stats_server.cache import RunAcceptanceRates, RunCache, RunEnergies
+
+N_ITERATIONS = 30
+DUMP_INTERVAL = 10
+DUMP_STEP = 5
+
+
+class FakeRun:
+    """A simulation run in a local directory, which is written step by step"""
+
+    def __init__(self, tmp_path, n_replicas=2):
+        self.storage = SimulationStorage(str(tmp_path), "1/production_run", LocalStorageBackend())
+        self.storage.save_config(
+            {
+                "general": {"num_replicas": n_replicas, "n_iterations": N_ITERATIONS},
+                "re": {"dump_interval": DUMP_INTERVAL, "dump_step": DUMP_STEP},
+            }
+        )
+        self.storage.load_energies = Mock(wraps=self.storage.load_energies)
+        self._acceptance_rates = ""
+
+    def dump_energies(self, replica, start):
+        """Writes a batch of energies whose values encode replica and sample number."""
+        energies = replica * 1000 + np.arange(start, start + DUMP_INTERVAL, dtype=float)
+        self.storage.save_energies(energies, f"replica{replica}", start, start + DUMP_INTERVAL)
+
+    def write_acceptance_rates(self, *rows):
+        self._acceptance_rates += "".join(" ".join(str(x) for x in row) + "\n" for row in rows)
+        self.storage.save(
+            self._acceptance_rates,
+            self.storage.dir_structure.RE_ACCEPTANCE_RATES_FILE_NAME,
+            data_type="text",
+        )
+
+
+def expected_sums(n):
+    # Replica 1 and 2 contribute 1000 + i and 2000 + i to the i-th sum
+    return list(3000 + 2 * np.arange(n, dtype=float))
+
+
+@pytest.fixture
+def run(tmp_path):
+    return FakeRun(tmp_path)
+
+
+def test_run_energies_sums_energies_of_lagging_replicas(run):
+    run.dump_energies(1, 0)
+    run.dump_energies(1, 10)
+    run.dump_energies(2, 0)
+    energies = RunEnergies(run.storage)
+
+    assert list(energies.update()) == expected_sums(10)
+    assert not energies.complete
+
+    run.dump_energies(2, 10)
+    run.dump_energies(2, 20)
+    assert list(energies.update()) == expected_sums(20)
+
+    run.dump_energies(1, 20)
+    assert list(energies.update()) == expected_sums(30)
+    assert energies.complete
+
+
+def test_run_energies_only_loads_new_batches(run):
+    run.dump_energies(1, 0)
+    run.dump_energies(2, 0)
+    energies = RunEnergies(run.storage)
+    energies.update()
+    run.storage.load_energies.reset_mock()
+
+    run.dump_energies(1, 10)
+    run.dump_energies(2, 10)
+    energies.update()
+
+    loaded = [c.args[:3] for c in run.storage.load_energies.call_args_list]
+    # The second batches and the (missing) third ones of both replicas
+    assert loaded == [
+        ("replica1", 10, 20),
+        ("replica1", 20, 30),
+        ("replica2", 10, 20),
+        ("replica2", 20, 30),
+    ]
+
+
+def test_run_energies_does_not_load_batches_once_complete(run):
+    for start in range(0, N_ITERATIONS, DUMP_INTERVAL):
+        run.dump_energies(1, start)
+        run.dump_energies(2, start)
+    energies = RunEnergies(run.storage)
+    energies.update()
+    run.storage.load_energies.reset_mock()
+
+    assert list(energies.update()) == expected_sums(30)
+    run.storage.load_energies.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "step,first_step",
+    [
+        (None, 0),
+        (-1, 0),
+        (0, DUMP_STEP),
+        (DUMP_STEP - 1, DUMP_STEP),
+        (DUMP_STEP, 2 * DUMP_STEP),
+        (9 * DUMP_STEP, None),
+    ],
+)
+def test_run_energies_since(run, step, first_step):
+    run.dump_energies(1, 0)
+    run.dump_energies(2, 0)
+
+    since = RunEnergies(run.storage).since(step)
+
+    # The i-th summed energy was recorded at step i * DUMP_STEP
+    all_steps = [i * DUMP_STEP for i in range(10)]
+    expected = [] if first_step is None else all_steps[all_steps.index(first_step) :]
+    assert list(since) == expected
+    assert all(since[s] == expected_sums(10)[s // DUMP_STEP] for s in since)
+
+
+def test_run_acceptance_rates_parses_appended_lines(run):
+    run.write_acceptance_rates((5, 0.1, 0.2), (10, 0.3, 0.4))
+    rates = RunAcceptanceRates(run.storage)
+
+    assert rates.since() == {5: [0.1, 0.2], 10: [0.3, 0.4]}
+    assert rates.since(5) == {10: [0.3, 0.4]}
+
+    run.write_acceptance_rates((15, 0.5, 0.6))
+    assert rates.since(10) == {15: [0.5, 0.6]}
+    assert list(rates.since()) == [5, 10, 15]
+    assert rates.since(15) == {}
+
+
+def test_run_cache_evicts_least_recently_used():
+    factory = Mock(side_effect=lambda key: object())
+    cache = RunCache(factory, max_size=2)
+
+    a = cache.get("a")
+    cache.get("b")
+    # Makes "b" the least recently used one
+    assert cache.get("a") is a
+    cache.get("c")
+
+    assert cache.get("a") is a
+    assert factory.call_count == 3
+    cache.get("b")
+    assert factory.call_count == 4
@@ -0,0 +1,128 @@
+import json
+from queue import Queue
+
+import pytest
+
+from chainsail.mcmc_stats_server.cache import RunAcceptanceRates, RunEnergies
+from chainsail.mcmc_stats_server.stream import RunStatsStream, sse_events
+from chainsail.mcmc_stats_server.test.test_cache import (
+    DUMP_INTERVAL,
+    DUMP_STEP,
+    N_ITERATIONS,
+    FakeRun,
+    expected_sums,
+)
+
+KEEPALIVE = ": keepalive\n\n"
+
+
+@pytest.fixture
+def run(tmp_path):
+    return FakeRun(tmp_path)
+
+
+def mk_stream(run):
+    return RunStatsStream(
+        RunEnergies(run.storage), RunAcceptanceRates(run.storage), poll_interval=0.01
+    )
+
+
+def dump_energies_until(run, end, start=0):
+    for batch_start in range(start, end, DUMP_INTERVAL):
+        run.dump_energies(1, batch_start)
+        run.dump_energies(2, batch_start)
+
+
+def parse_frame(frame):
+    event_line, data_line, blank, empty = frame.split("\n")
+    assert event_line.startswith("event: ") and data_line.startswith("data: ")
+    assert blank == empty == ""
+    return event_line[len("event: ") :], json.loads(data_line[len("data: ") :])
+
+
+def collect(subscription):
+    """Returns the parsed server-sent events of a subscription up to the end event."""
+    events = []
+    for frame in sse_events(subscription, keepalive_interval=5):
+        assert frame != KEEPALIVE, "the run did not end"
+        events.append(parse_frame(frame))
+    return events
+
+
+def merged(events, event):
+    data = {}
+    for e, d in events:
+        if e == event:
+            data.update(d)
+    return data
+
+
+def expected_energies(n):
+    return {str(i * DUMP_STEP): s for i, s in enumerate(expected_sums(n))}
+
+
+def test_stream_fans_out_to_all_subscribers(run):
+    dump_energies_until(run, DUMP_INTERVAL)
+    run.write_acceptance_rates((5, 0.1))
+    stream = mk_stream(run)
+
+    subscriptions = [stream.subscribe(), stream.subscribe()]
+    first_events = [
+        [parse_frame(next(sse_events(s, keepalive_interval=5))) for _ in range(2)]
+        for s in subscriptions
+    ]
+    dump_energies_until(run, N_ITERATIONS, start=DUMP_INTERVAL)
+    run.write_acceptance_rates((10, 0.2))
+    events = [first + collect(s) for first, s in zip(first_events, subscriptions)]
+
+    # Both subscribers share the reader and see the same events
+    assert events[0] == events[1]
+    assert events[0][:2] == [
+        ("energies", expected_energies(DUMP_INTERVAL)),
+        ("acceptance_rates", {"5": [0.1]}),
+    ]
+    assert events[0][-1] == ("end", {})
+    assert merged(events[0], "energies") == expected_energies(N_ITERATIONS)
+    assert merged(events[0], "acceptance_rates") == {"5": [0.1], "10": [0.2]}
+
+
+def test_stream_replays_finished_run(run):
+    dump_energies_until(run, N_ITERATIONS)
+    run.write_acceptance_rates((5, 0.1))
+    stream = mk_stream(run)
+    collect(stream.subscribe())
+
+    # A late subscriber receives everything at once without another reader
+    assert collect(stream.subscribe()) == [
+        ("energies", expected_energies(N_ITERATIONS)),
+        ("acceptance_rates", {"5": [0.1]}),
+        ("end", {}),
+    ]
+    assert stream._reader is None
+
+
+def test_stream_stops_reading_without_subscribers(run):
+    dump_energies_until(run, DUMP_INTERVAL)
+    stream = mk_stream(run)
+    subscription = stream.subscribe()
+    reader = stream._reader
+    subscription.get(timeout=5)
+
+    stream.unsubscribe(subscription)
+
+    reader.join(timeout=5)
+    assert not reader.is_alive()
+    assert stream._reader is None
+
+
+def test_sse_events_sends_keepalives():
+    subscription = Queue()
+    events = sse_events(subscription, keepalive_interval=0.01)
+
+    assert next(events) == KEEPALIVE
+    subscription.put(("energies", {"0": 1.0}))
+    assert next(events) == 'event: energies\ndata: {"0": 1.0}\n\n'
+    subscription.put(("end", {}))
+    assert next(events) == "event: end\ndata: {}\n\n"
+    with pytest.raises(StopIteration):
+        next(events)
@@ -6,37 +6,46 @@ import json
 import logging
 import os
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import shortuuid
-from celery import chain
+from celery import states
+from celery.exceptions import TimeoutError as CeleryTimeoutError
 from cloudstorage.exceptions import NotFoundError
 from firebase_admin.auth import (
     ExpiredIdTokenError,
     InvalidIdTokenError,
     RevokedIdTokenError,
-    verify_id_token,
 )
 from flask import abort, jsonify, request
+from marshmallow.exceptions import ValidationError
+from sqlalchemy.exc import OperationalError
 
 from chainsail.common.custom_logging import configure_logging
 from chainsail.common.spec import JobSpecSchema
+from chainsail.scheduler.auth import is_user_allowed, verify_token
 from chainsail.scheduler.config import load_scheduler_config
 from chainsail.scheduler.core import app, db, firebase_app, use_dev_user
 from chainsail.scheduler.db import (
+    IterationReportSchema,
+    IterationViewSchema,
     JobViewSchema,
     NodeViewSchema,
+    TblIterations,
     TblJobs,
     TblNodes,
-    TblUsers,
+    create_missing_indexes,
+    upgrade_columns,
 )
 from chainsail.scheduler.jobs import JobStatus
+from chainsail.scheduler.listing import JobListArgsSchema, list_jobs
 from chainsail.scheduler.tasks import (
+    finish_job,
+    get_zip_chain,
     scale_job_task,
     start_job_task,
     stop_job_task,
     watch_job_task,
-    zip_results_task,
     update_signed_url_task,
 )
 from chainsail.scheduler.utils import (
@@ -51,6 +60,15 @@ configure_logging("chainsail.scheduler", "INFO", scheduler_config.remote_logging
 
 USER_PROB_BLOB_ROOT = "user_probs/"
 USER_PROB_URL_EXPIRY_TIME = 31540000  # in seconds; approximately a year
+# Upper bound on how long requests for a scaling operation's status may wait
+# for it to finish, such that they do not hold on to web workers for long
+MAX_SCALING_OPERATION_WAIT = 30  # in seconds
+# Scaling operations which were started longer ago are not considered to be
+# running anymore, e.g. because their task was lost
+MAX_SCALING_OPERATION_DURATION = 3600  # in seconds
+# Celery states of tasks which have not finished yet. The results of finished
+# tasks expire after a while, after which their state is PENDING as well.
+UNFINISHED_TASK_STATES = frozenset({states.PENDING, states.RECEIVED, states.STARTED, states.RETRY})
 
 
 def _is_dev_mode():
@@ -69,7 +87,7 @@ def check_user(func):
         if firebase_app is not None:
             try:
                 id_token = request.headers["Authorization"].split(" ").pop()
-                claims = verify_id_token(id_token, app=firebase_app)
+                claims = verify_token(id_token)
             except (
                 KeyError,
                 InvalidIdTokenError,
@@ -91,8 +109,8 @@ def check_user(func):
                 return {
                     "message": "Unauthorized access: No email found in token claim. Logging out and in again may solve this issue. If the problem persists, please contact support@chainsail.io."
                 }, 401
-            user = TblUsers.query.filter_by(email=email).first()
-            if not user:
+            is_allowed = is_user_allowed(email)
+            if is_allowed is None:
                 # unregistered user
                 return (
                     {
@@ -100,7 +118,7 @@ def check_user(func):
                     },
                     403,
                 )
-            if not user.is_allowed:
+            if not is_allowed:
                 # user not allowed
                 return {
                     "message": f"Unauthorized access. Please contact support@chainsail.io to be granted access to Chainsail. Error: User with email {email} is not allowed to use the services."
@@ -128,10 +146,6 @@ def find_job(job_id, user_id=None):
     return job
 
 
-def get_zip_chain(job_id):
-    return chain(zip_results_task.si(job_id), update_signed_url_task.si(job_id))
-
-
 def validate_uploaded_files(flask_file_objs):
     # No use using logger here as the user won't be able to see it (no user ID).
     # Include user id in error message to be able to associate this with a user.
@@ -196,17 +210,10 @@ def start_job(job_id, user_id):
     job.status = JobStatus.STARTING.value
     logger.info(f"Starting job #{job_id}...", extra={"job_id": job_id})
     db.session.commit()
-    # Starts the watch process once the job is successfully started
-    # The watch process will stop the job once it either succeeds or fails.
-    zip_chain = get_zip_chain(job_id)
-    start_job_task.apply_async(
-        (job_id,),
-        {},
-        link=watch_job_task.si(job_id).set(
-            link=stop_job_task.si(job_id, exit_status="success").set(link=zip_chain),
-            link_error=stop_job_task.si(job_id, exit_status="failed"),
-        ),
-    )
+    # Starts watching the job once it is successfully started. The job is
+    # stopped once the control node reports that it either succeeded or failed,
+    # or, if the control node dies, once the watch notices.
+    start_job_task.apply_async((job_id,), {}, link=watch_job_task.si(job_id))
     return ("ok", 200)
 
 
@@ -240,12 +247,31 @@ def get_job_signed_url(job_id, user_id):
 @app.route("/jobs", methods=["GET"])
 @check_user
 def get_jobs(user_id):
-    """List all jobs"""
+    """List jobs, most recently created first
+
+    Query args:
+        limit: The maximum number of jobs to return
+        cursor: The `next_cursor` of the previous page
+        status: Comma-separated statuses of the jobs to return
+        created_after: Only return jobs created at or after this ISO 8601 time
+        created_before: Only return jobs created before this ISO 8601 time
+        fields: Comma-separated fields to return for each job
+    """
+    try:
+        args = JobListArgsSchema().load(request.args)
+    except ValidationError as e:
+        abort(400, e.messages)
     if not _is_dev_mode():
-        jobs = TblJobs.query.filter_by(user_id=user_id)
+        query = TblJobs.query.filter_by(user_id=user_id)
     else:
-        jobs = TblJobs.query.all()
-    return JobViewSchema().jsonify(jobs, many=True)
+        query = TblJobs.query
+    jobs, next_cursor = list_jobs(query, **args)
+    return jsonify(
+        {
+            "jobs": JobViewSchema(only=args["columns"]).dump(jobs, many=True),
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @app.route("/job/<job_id>/nodes", methods=["GET"])
@@ -255,41 +281,182 @@ def job_nodes(job_id):
     return NodeViewSchema().jsonify(nodes, many=True)
 
 
+def _is_being_scaled(job: TblJobs) -> bool:
+    """Whether a job's most recent scaling operation is still running"""
+    if not job.scaling_operation_id or job.scaling_started_at is None:
+        return False
+    if datetime.utcnow() - job.scaling_started_at > timedelta(
+        seconds=MAX_SCALING_OPERATION_DURATION
+    ):
+        return False
+    return scale_job_task.AsyncResult(job.scaling_operation_id).state in UNFINISHED_TASK_STATES
+
+
 @app.route("/internal/job/<job_id>/scale/<n_replicas>", methods=["POST"])
 def scale_job(job_id, n_replicas):
-    """Cheap and dirty way to allow for jobs to be scaled."""
+    """Starts scaling a job and responds with the ID of the scaling operation
+
+    The operation's status can be queried via the scaling operation endpoint.
+    """
     n_replicas = int(n_replicas)
     # FIXME: Ideally we could check authorization for internal endpoints
-    find_job(job_id)
+    try:
+        job = TblJobs.query.with_for_update(of=TblJobs, nowait=True).filter_by(id=job_id).first()
+    except OperationalError:
+        db.session.rollback()
+        abort(409, "job is currently locked")
+    if not job:
+        abort(404, "job does not exist")
+    if _is_being_scaled(job):
+        db.session.rollback()
+        abort(409, "job is currently being scaled")
+    operation_id = shortuuid.uuid()
+    job.scaling_operation_id = operation_id
+    job.scaling_started_at = datetime.utcnow()
+    # Committed before the task is sent, such that concurrent requests see
+    # the pending operation
+    db.session.commit()
     logger.info(
-        f"Scaling up job #{job_id} to {n_replicas} replicas...",
+        f"Scaling job #{job_id} to {n_replicas} replicas...",
         extra={"job_id": job_id},
     )
-    scaling_task = scale_job_task.apply_async((job_id, n_replicas), {})
-    # Await the result, raising any exceptions that get thrown
-    scaled = scaling_task.get()
-    if not scaled:
-        abort(409, "job is currently being scaled")
+    try:
+        scale_job_task.apply_async((job_id, n_replicas), {}, task_id=operation_id)
+    except Exception as e:
+        # Don't leave the job locked by an operation which never started
+        job.scaling_operation_id = None
+        job.scaling_started_at = None
+        db.session.commit()
+        raise e
+    return jsonify({"operation_id": operation_id}), 202
+
+
+def _scaling_operation_view(operation_id, result):
+    if not result.ready():
+        return {"operation_id": operation_id, "status": "running"}
+    if result.failed():
+        return {"operation_id": operation_id, "status": "failed", "error": repr(result.result)}
+    if result.result is None:
+        # The scaling task could not lock the job, e.g. because it was being
+        # started or stopped at the same time
+        return {"operation_id": operation_id, "status": "conflict"}
+    return {"operation_id": operation_id, "status": "succeeded", "hosts": result.result}
+
+
+@app.route("/internal/job/<job_id>/scale_operation/<operation_id>", methods=["GET"])
+def scaling_operation(job_id, operation_id):
+    """Responds with the status of a job's scaling operation
+
+    Once the operation succeeded, the response also contains the contents of
+    the job's new MPI hostfile.
+
+    Query args:
+        wait: Seconds to wait for the operation to finish before responding
+    """
+    # FIXME: Ideally we could check authorization for internal endpoints
+    job = find_job(job_id)
+    if job.scaling_operation_id != operation_id:
+        abort(404, "scaling operation does not exist for this job")
+    # The job is not needed anymore, so don't keep the transaction open while waiting
+    db.session.rollback()
+    wait = min(request.args.get("wait", 0, type=float), MAX_SCALING_OPERATION_WAIT)
+    result = scale_job_task.AsyncResult(operation_id)
+    if wait > 0 and not result.ready():
+        try:
+            result.get(timeout=wait, propagate=False)
+        except CeleryTimeoutError:
+            pass
+    return jsonify(_scaling_operation_view(operation_id, result))
+
+
+@app.route("/internal/job/<job_id>/exit/<exit_status>", methods=["POST"])
+def job_exited(job_id, exit_status):
+    """Called by a job's control node once it exited"""
+    # FIXME: Ideally we could check authorization for internal endpoints
+    find_job(job_id)
+    if exit_status not in (JobStatus.SUCCESS.value, JobStatus.FAILED.value):
+        abort(400, f"Invalid exit status: {exit_status}")
+    try:
+        finish_job(job_id, JobStatus(exit_status))
+    except OperationalError:
+        abort(409, "job is currently locked")
     return ("ok", 200)
 
 
+def _load_iteration_report():
+    try:
+        return IterationReportSchema().load(request.get_json(silent=True) or {})
+    except ValidationError as e:
+        abort(400, e.messages)
+
+
 @app.route("/internal/job/<job_id>/add_iteration/<iteration>", methods=["POST"])
 def add_iteration(job_id, iteration):
-    """Adds an iteration entry to a job's list of controller iterations"""
+    """Records the start of an iteration of a job's main controller loop
+
+    The request body may hold the iteration's number of replicas and a
+    summary of its schedule.
+    """
+    # FIXME: Ideally we could check authorization for internal endpoints
+    job = find_job(job_id)
+    report = _load_iteration_report()
+    db.session.add(
+        TblIterations(
+            job_id=job.id,
+            name=iteration,
+            started_at=datetime.utcnow(),
+            num_replicas=report["num_replicas"],
+            schedule=json.dumps(report["schedule"]) if report["schedule"] else None,
+        )
+    )
+    db.session.commit()
+    return ("ok", 200)
+
+
+@app.route("/internal/job/<job_id>/finish_iteration/<iteration>", methods=["POST"])
+def finish_iteration(job_id, iteration):
+    """Records the end of an iteration of a job's main controller loop
+
+    The request body may hold the time it took to estimate the density of states.
+    """
     # FIXME: Ideally we could check authorization for internal endpoints
     job = find_job(job_id)
-    if job.controller_iterations is None:
-        job.controller_iterations = []
-    # .append(iteration) does not work, probably b/c lists are a mutable data type
-    # or something like that
-    job.controller_iterations = job.controller_iterations + [iteration]
+    report = _load_iteration_report()
+    it = (
+        TblIterations.query.filter_by(job_id=job.id, name=iteration)
+        .order_by(TblIterations.id.desc())
+        .first()
+    )
+    if not it:
+        abort(404, "iteration does not exist for this job")
+    it.finished_at = datetime.utcnow()
+    if report["dos_estimation_duration"] is not None:
+        it.dos_estimation_duration = report["dos_estimation_duration"]
     db.session.commit()
     return ("ok", 200)
 
 
+@app.route("/job/<job_id>/iterations", methods=["GET"])
+@check_user
+def get_iterations(job_id, user_id):
+    """List the iterations of a job's main controller loop, in the order they were started"""
+    job = find_job(job_id, user_id)
+    iterations = (
+        TblIterations.query.filter_by(job_id=job.id)
+        .order_by(TblIterations.started_at, TblIterations.id)
+        .all()
+    )
+    if not iterations and job.controller_iterations:
+        # Jobs which ran before iterations were recorded only have their names
+        return jsonify([{"name": name} for name in job.controller_iterations])
+    return IterationViewSchema().jsonify(iterations, many=True)
+
+
 if __name__ == "__main__":
     # Development server
     if _is_dev_mode():
         print("dev mode: user authentication switched off")
     db.create_all()
+    upgrade_columns()
+    create_missing_indexes()
     app.run("0.0.0.0", debug=True)
@@ -0,0 +1,185 @@
+"""
+Streaming creation of zip archives from objects in an S3 bucket
+"""
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# S3 requires all parts of a multipart upload but the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class MultipartUploadWriter:
+    """A write-only file-like object which uploads to S3 via a multipart upload.
+
+    Data is buffered until a part is full, so at most `part_size` bytes are
+    held in memory. The upload is completed on `close` and aborted if the
+    writer is used as a context manager and an exception is raised.
+    """
+
+    def __init__(self, s3, bucket: str, key: str, part_size: int = 8 * 1024 * 1024):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"Part size must be at least {MIN_PART_SIZE} bytes")
+        self._s3 = s3
+        self._bucket = bucket
+        self._key = key
+        self._part_size = part_size
+        self._buffer = BytesIO()
+        self._parts: List[Dict] = []
+        self._upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+        self.closed = False
+
+    def _upload_part(self):
+        part_number = len(self._parts) + 1
+        response = self._s3.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=self._buffer.getvalue(),
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self._buffer = BytesIO()
+
+    def write(self, data: bytes) -> int:
+        self._buffer.write(data)
+        if self._buffer.tell() >= self._part_size:
+            self._upload_part()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        # The last part may be smaller than the minimum part size, but there
+        # has to be at least one
+        if self._buffer.tell() or not self._parts:
+            self._upload_part()
+        self._s3.complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+        self.closed = True
+
+    def abort(self):
+        if self.closed:
+            return
+        self._s3.abort_multipart_upload(
+            Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+        )
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def list_objects(s3, bucket: str, prefix: str) -> Iterator[Dict]:
+    """Lists all objects under a prefix, following pagination.
+
+    Args:
+        s3: The boto3 S3 client
+        bucket: The bucket to list objects in
+        prefix: The key prefix of the objects to list
+
+    Returns:
+        The object descriptions as returned by `list_objects_v2`
+    """
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        yield from page.get("Contents", [])
+
+
+def stream_zip_archive(
+    s3,
+    bucket: str,
+    objects: List[Dict],
+    archive_key: str,
+    arcname: Callable[[str], str],
+    chunk_size: int = 1024 * 1024,
+    max_prefetch_size: int = 8 * 1024 * 1024,
+    max_concurrency: int = 8,
+    part_size: int = 8 * 1024 * 1024,
+) -> int:
+    """Writes objects into a zip archive which is uploaded to S3 while it is written.
+
+    Small objects are fetched concurrently ahead of time, while larger ones
+    are read in chunks once it is their turn to be written, such that memory
+    usage stays bounded by roughly `max_concurrency * max_prefetch_size`.
+
+    Args:
+        s3: The boto3 S3 client
+        bucket: The bucket which holds the objects and receives the archive
+        objects: The descriptions of the objects to archive, as returned by
+            `list_objects`
+        archive_key: The key to upload the archive to
+        arcname: Maps an object key to its name within the archive
+        chunk_size: The size in bytes of the chunks in which large objects
+            are read
+        max_prefetch_size: Objects up to this size in bytes are fetched
+            concurrently
+        max_concurrency: The maximum number of objects fetched at the same time
+        part_size: The size in bytes of the parts of the multipart upload
+
+    Returns:
+        The number of objects written to the archive
+    """
+
+    def fetch(key: str) -> bytes:
+        return s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+    def zipinfo(obj: Dict) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(arcname(obj["Key"]), date_time=_date_time(obj))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        # Knowing the size upfront allows zipfile to decide on using ZIP64
+        info.file_size = obj["Size"]
+        return info
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as ex:
+        pending = deque()
+        objects_iter = iter(objects)
+
+        def fill_window():
+            while len(pending) < max_concurrency:
+                obj = next(objects_iter, None)
+                if obj is None:
+                    return
+                if obj["Size"] <= max_prefetch_size:
+                    pending.append((obj, ex.submit(fetch, obj["Key"])))
+                else:
+                    pending.append((obj, None))
+
+        n_written = 0
+        with MultipartUploadWriter(s3, bucket, archive_key, part_size) as writer:
+            with zipfile.ZipFile(writer, "w", zipfile.ZIP_DEFLATED) as zipf:
+                fill_window()
+                while pending:
+                    obj, prefetched = pending.popleft()
+                    fill_window()
+                    with zipf.open(zipinfo(obj), "w") as entry:
+                        if prefetched is not None:
+                            entry.write(prefetched.result())
+                        else:
+                            body = s3.get_object(Bucket=bucket, Key=obj["Key"])["Body"]
+                            for chunk in body.iter_chunks(chunk_size):
+                                entry.write(chunk)
+                    n_written += 1
+    return n_written
+
+
+def _date_time(obj: Dict) -> Tuple[int, ...]:
+    last_modified = obj.get("LastModified")
+    if last_modified is None:
+        return (1980, 1, 1, 0, 0, 0)
+    return last_modified.timetuple()[:6]
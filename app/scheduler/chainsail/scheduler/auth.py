@@ -0,0 +1,84 @@
+"""
+Cached verification of users' ID tokens and access rights
+"""
+import hashlib
+import time
+from typing import Dict, Optional
+
+from firebase_admin.auth import verify_id_token
+from sqlalchemy import event
+
+from chainsail.scheduler.cache import TTLCache
+from chainsail.scheduler.core import firebase_app
+from chainsail.scheduler.db import TblUsers
+
+# Verified claims are never cached for longer than this, even if the token
+# is valid for longer
+TOKEN_CACHE_MAX_TTL = 600  # in seconds
+# Users are managed from other processes (see `db_util`), so the access rights
+# cached by the scheduler's processes are refreshed after this time
+USER_CACHE_TTL = 60  # in seconds
+
+
+token_cache = TTLCache()
+user_cache = TTLCache()
+# Distinguishes cached unknown users from cache misses
+_UNKNOWN_USER = object()
+
+
+def verify_token(id_token: str) -> Dict:
+    """
+    Verifies an ID token, reusing the claims of tokens which were verified before.
+
+    Claims are cached until the token expires, such that the frequent
+    requests of a polling client do not each have to be verified.
+
+    Args:
+        id_token: The ID token to verify
+
+    Returns:
+        The token's claims
+
+    Raises:
+        The exceptions of `firebase_admin.auth.verify_id_token` if the token
+        is invalid, expired or revoked
+    """
+    # Only hashes of the tokens are kept in memory
+    key = hashlib.sha256(id_token.encode()).hexdigest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = verify_id_token(id_token, app=firebase_app)
+        expires_in = claims.get("exp", 0) - time.time()
+        token_cache.set(key, claims, min(expires_in, TOKEN_CACHE_MAX_TTL))
+    return claims
+
+
+def is_user_allowed(email: str) -> Optional[bool]:
+    """
+    Looks up whether a user is allowed to use the services.
+
+    Args:
+        email: The user's email address
+
+    Returns:
+        Whether the user is allowed to use the services, or None if there
+        is no user with this email address
+    """
+    is_allowed = user_cache.get(email)
+    if is_allowed is None:
+        user = TblUsers.query.filter_by(email=email).first()
+        is_allowed = _UNKNOWN_USER if user is None else bool(user.is_allowed)
+        user_cache.set(email, is_allowed, USER_CACHE_TTL)
+    return None if is_allowed is _UNKNOWN_USER else is_allowed
+
+
+def invalidate_user(email: str) -> None:
+    """Drops a user's cached access rights, e.g. once they were changed"""
+    user_cache.invalidate(email)
+
+
+@event.listens_for(TblUsers, "after_insert")
+@event.listens_for(TblUsers, "after_update")
+@event.listens_for(TblUsers, "after_delete")
+def _invalidate_changed_user(mapper, connection, user):
+    invalidate_user(user.email)
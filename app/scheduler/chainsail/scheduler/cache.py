@@ -0,0 +1,58 @@
+"""
+In-memory caches shared by the scheduler's modules
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+CACHE_MAX_SIZE = 4096
+
+
+class TTLCache:
+    """
+    A thread-safe cache whose entries expire after a per-entry time to live.
+
+    The least recently used entries are evicted once the cache is full.
+
+    Args:
+        max_size: The maximum number of entries
+        clock: Returns the current time in seconds
+    """
+
+    def __init__(
+        self, max_size: int = CACHE_MAX_SIZE, clock: Callable[[], float] = time.monotonic
+    ):
+        self._max_size = max_size
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
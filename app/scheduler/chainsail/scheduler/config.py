@@ -200,6 +200,14 @@ class SchedulerConfig:
         node_config: The corresponding configuration object for the provided
             node_type. This is used for things like generating drivers for
             connecting to the node's corresponding backend
+        max_node_creation_threads: The maximum number of nodes of a single job
+            which are created or deleted concurrently
+        warm_pool_size: The number of generic, pre-created worker nodes which
+            are kept ready for being assigned to jobs. A size of 0 disables the
+            warm pool. Only supported for node types which support pooling.
+        dependency_cache_dirname: The directory of the results bucket in which
+            archives of installed user dependencies are cached, such that nodes
+            can skip installing them. The cache is disabled if not set.
 
     """
 
@@ -214,6 +222,9 @@ class SchedulerConfig:
     results_dirname: str
     results_url_expiry_time: int
     remote_logging_config_path: str
+    max_node_creation_threads: int = 20
+    warm_pool_size: int = 0
+    dependency_cache_dirname: Optional[str] = None
 
     def create_node_driver(self):
         """Create a new node driver instance using the scheduler config"""
@@ -232,6 +243,9 @@ class SchedulerConfigSchema(Schema):
     results_dirname = fields.String(required=True)
     results_url_expiry_time = fields.Int(required=True)
     node_config = fields.Dict(keys=fields.String())
+    max_node_creation_threads = fields.Int()
+    warm_pool_size = fields.Int()
+    dependency_cache_dirname = fields.String(allow_none=True)
 
     @post_load
     def make_scheduler_config(self, data, **kwargs):
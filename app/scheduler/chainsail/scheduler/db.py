@@ -1,4 +1,8 @@
+from typing import Any, Dict
+
 from chainsail.scheduler.core import db, ma
+from marshmallow import Schema, fields
+from sqlalchemy import inspect
 from sqlalchemy.types import ARRAY
 
 
@@ -8,16 +12,24 @@ class TblJobs(db.Model):
     """
 
     __tablename__ = "jobs"
+    # For listing a user's jobs by creation time
+    __table_args__ = (db.Index("ix_jobs_user_id_created_at", "user_id", "created_at"),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(50), nullable=False)
     spec = db.Column(db.Unicode(), nullable=True)
-    status = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(50), nullable=False, index=True)
     created_at = db.Column(db.DateTime(), nullable=False)
     started_at = db.Column(db.DateTime(), nullable=True)
     finished_at = db.Column(db.DateTime(), nullable=True)
     # the ARRAY type limits us to postgresql databases
+    # Only filled for jobs which ran before iterations were recorded in the
+    # iterations table
     controller_iterations = db.Column(ARRAY(db.String(50)), nullable=True)
     signed_url = db.Column(db.String(1000), nullable=True)
+    # ID of the job's most recent scaling operation, i.e. of its scaling task
+    scaling_operation_id = db.Column(db.String(50), nullable=True)
+    # Start time of the job's scaling operation. Cleared once it finished.
+    scaling_started_at = db.Column(db.DateTime(), nullable=True)
 
 
 class TblNodes(db.Model):
@@ -27,7 +39,8 @@ class TblNodes(db.Model):
 
     __tablename__ = "nodes"
     id = db.Column(db.Integer, primary_key=True)
-    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=False)
+    # Nodes in the warm pool are not assigned to a job yet
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=True)
     # e.g. VM or pod identifier
     name = db.Column(db.String(50), nullable=False)
     # Node type for object loading e.g. VMNode
@@ -42,7 +55,35 @@ class TblNodes(db.Model):
     in_use = db.Column(db.Boolean(), nullable=True)
     # Flag for indicating whether worker processes can be scheduled on this node
     is_worker = db.Column(db.Boolean(), nullable=True)
-    job = db.relationship("TblJobs", backref="nodes", lazy=True)
+    # Flag for indicating whether the node is a generic node waiting in the
+    # warm pool to be assigned to a job
+    in_pool = db.Column(db.Boolean(), nullable=True, default=False)
+    # Nodes are loaded in the order in which they were added to their job,
+    # such that jobs restored from the database plan scaling like the
+    # original ones did
+    job = db.relationship(
+        "TblJobs", backref=db.backref("nodes", order_by="TblNodes.id"), lazy=True
+    )
+
+
+class TblIterations(db.Model):
+    """
+    Iterations of a job's main controller loop, i.e. its simulation runs
+    """
+
+    __tablename__ = "iterations"
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), nullable=False, index=True)
+    # e.g. optimization_run0 or production_run
+    name = db.Column(db.String(50), nullable=False)
+    started_at = db.Column(db.DateTime(), nullable=False)
+    finished_at = db.Column(db.DateTime(), nullable=True)
+    num_replicas = db.Column(db.Integer, nullable=True)
+    # JSON summary of the iteration's Replica Exchange schedule
+    schedule = db.Column(db.Unicode(), nullable=True)
+    # Time in seconds it took to estimate the density of states
+    dos_estimation_duration = db.Column(db.Float, nullable=True)
+    job = db.relationship("TblJobs", backref="iterations", lazy=True)
 
 
 class TblUsers(db.Model):
@@ -58,6 +99,88 @@ class TblUsers(db.Model):
     ## TODO: Add user quotas
 
 
+def sync_changed_fields(representation, synced: Dict[str, Any], fields: Dict[str, Any]) -> None:
+    """
+    Writes fields to a database representation, skipping those whose values
+    did not change since they were last written.
+
+    Args:
+        representation: The database representation to write to
+        synced: The values last written to the representation. Updated in place.
+        fields: The current values of the fields
+    """
+    for key, value in fields.items():
+        if key in synced and synced[key] == value:
+            continue
+        setattr(representation, key, value)
+        synced[key] = value
+
+
+def upgrade_columns(engine=None):
+    """
+    Adds the columns of existing tables which do not exist yet and drops
+    NOT NULL constraints of columns which became nullable.
+
+    `db.create_all` does not touch existing tables, so this is needed for
+    columns which were added to or relaxed in existing tables. Only
+    nullable columns can be added this way.
+
+    Args:
+        engine: The engine of the database to upgrade. Defaults to the
+            scheduler's database.
+    """
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    table_names = inspector.get_table_names()
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in table_names:
+                continue
+            existing = {column["name"]: column for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                table_name, column_name = preparer.format_table(table), preparer.format_column(
+                    column
+                )
+                if column.name not in existing:
+                    if not column.nullable:
+                        raise RuntimeError(
+                            f"Column {column_name} of table {table_name} is missing and has "
+                            "to be added manually since it is not nullable"
+                        )
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(
+                        f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"
+                    )
+                # SQLite, used for development, can not alter columns
+                elif (
+                    column.nullable
+                    and not existing[column.name]["nullable"]
+                    and engine.dialect.name != "sqlite"
+                ):
+                    conn.execute(
+                        f"ALTER TABLE {table_name} ALTER COLUMN {column_name} DROP NOT NULL"
+                    )
+
+
+def create_missing_indexes():
+    """
+    Creates the indexes of all tables which do not exist yet.
+
+    `db.create_all` only creates indexes along with their tables, so this
+    is needed for indexes which were added to existing tables.
+    """
+    inspector = inspect(db.engine)
+    table_names = inspector.get_table_names()
+    for table in db.metadata.sorted_tables:
+        if table.name not in table_names:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+
+
 class JobViewSchema(ma.SQLAlchemyAutoSchema):
     """Schema for returning jobs"""
 
@@ -65,6 +188,22 @@ class JobViewSchema(ma.SQLAlchemyAutoSchema):
         model = TblJobs
 
 
+class IterationViewSchema(ma.SQLAlchemyAutoSchema):
+    """Schema for returning controller iterations"""
+
+    class Meta:
+        model = TblIterations
+
+
+class IterationReportSchema(Schema):
+    """Schema for the statistics a controller reports about an iteration"""
+
+    num_replicas = fields.Int(load_default=None)
+    # Summary of the Replica Exchange schedule, e.g. the range of each parameter
+    schedule = fields.Dict(load_default=None)
+    dos_estimation_duration = fields.Float(load_default=None)
+
+
 class NodeViewSchema(ma.SQLAlchemyAutoSchema):
     """Schema for returning nodes"""
 
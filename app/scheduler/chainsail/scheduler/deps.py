@@ -0,0 +1,153 @@
+"""
+Caching of the installed user dependencies of jobs in the results object store
+"""
+import functools
+import hashlib
+from typing import Any, Callable, List, Optional, Tuple
+
+import boto3
+from chainsail.common.spec import Dependencies
+from chainsail.scheduler.config import SchedulerConfig
+
+# Nodes use the cache's URLs right after they were deployed or assigned to a job
+DEPENDENCY_CACHE_URL_EXPIRY_TIME = 3600  # in seconds
+# The user code containers put this directory in front of their PYTHONPATH
+DEPENDENCY_DIR = "/app/deps"
+
+CACHED_INSTALL_TEMPLATE = """DEPS_ARCHIVE=$(mktemp)
+if wget -q -O "$DEPS_ARCHIVE" '{get_url}'
+then
+      echo "Using cached dependencies {key}"
+      tar -xzf "$DEPS_ARCHIVE" -C {target_dir}
+else
+      {install_commands}
+      tar -czf "$DEPS_ARCHIVE" -C {target_dir} .
+      # Failing to fill the cache must not fail the node
+      curl -sf -X PUT -T "$DEPS_ARCHIVE" '{put_url}' || echo "Failed to cache dependencies {key}"
+fi
+rm -f "$DEPS_ARCHIVE"
+"""
+
+
+def dependencies_key(dependencies: List[Dependencies], environment: str = "") -> str:
+    """Hashes a set of dependencies, independent of the order of their packages.
+
+    Args:
+        dependencies: The dependencies of a job
+        environment: Identifies the environment the dependencies are installed
+            into, e.g. the user code image, since installed packages can only be
+            reused in the same environment
+
+    Returns:
+        The hex digest of the hash
+    """
+    h = hashlib.sha256(environment.encode())
+    for dep in sorted(dependencies, key=lambda d: d.type.value):
+        h.update(f"\n{dep.type.value}:".encode())
+        h.update(",".join(sorted(dep.packages)).encode())
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _s3_client(endpoint_url: str, access_key_id: str, secret_key: str):
+    # Shared by all nodes of the process, as creating clients is expensive
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_key,
+    )
+
+
+class DependencyCache:
+    """
+    Archives of installed dependencies in the results bucket, keyed by a hash
+    of the dependencies.
+
+    Nodes download the archive of their job's dependencies if it exists and
+    otherwise install the dependencies and upload the archive, such that all
+    later nodes with the same dependencies skip the installation.
+
+    Args:
+        create_s3: Creates the boto3 S3 client. It is only called once the
+            cache is first used, since most nodes, e.g. those reconstructed
+            from the database, never generate an installation script.
+        bucket: The bucket to keep the archives in
+        dirname: The directory of the bucket to keep the archives in
+    """
+
+    def __init__(self, create_s3: Callable[[], Any], bucket: str, dirname: str):
+        self._create_s3 = create_s3
+        self._s3 = None
+        self._bucket = bucket
+        self._dirname = dirname.strip("/")
+
+    @classmethod
+    def from_config(cls, config: SchedulerConfig) -> Optional["DependencyCache"]:
+        """Creates the dependency cache if it is enabled in the scheduler configuration"""
+        if not config.dependency_cache_dirname:
+            return None
+        create_s3 = functools.partial(
+            _s3_client,
+            config.results_endpoint_url,
+            config.results_access_key_id,
+            config.results_secret_key,
+        )
+        return cls(create_s3, config.results_bucket, config.dependency_cache_dirname)
+
+    def urls(self, scope: str, key: str) -> Tuple[str, str]:
+        """Signs the URLs for downloading and uploading an archive.
+
+        Args:
+            scope: Archives are only shared within a scope, e.g. a user, since
+                whoever can install dependencies can also fill the cache
+            key: The hash of the dependencies
+
+        Returns:
+            The signed GET and PUT URLs of the archive
+        """
+        if self._s3 is None:
+            self._s3 = self._create_s3()
+        params = {"Bucket": self._bucket, "Key": f"{self._dirname}/{scope}/{key}.tar.gz"}
+        return tuple(
+            self._s3.generate_presigned_url(
+                method, Params=params, ExpiresIn=DEPENDENCY_CACHE_URL_EXPIRY_TIME
+            )
+            for method in ("get_object", "put_object")
+        )
+
+
+def install_commands(
+    dependencies: List[Dependencies],
+    cache: Optional[DependencyCache] = None,
+    scope: Optional[str] = None,
+    environment: str = "",
+) -> str:
+    """Generates the shell commands which install a job's dependencies on a node.
+
+    Args:
+        dependencies: The dependencies of the job
+        cache: The dependency cache to use, if any
+        scope: The scope of the cache, e.g. the job's user. The cache is not
+            used without a scope.
+        environment: See :func:`dependencies_key`
+
+    Returns:
+        The commands
+    """
+    commands = "\n".join([d.installation_script for d in dependencies])
+    if cache is None or scope is None or not any(d.packages for d in dependencies):
+        return commands
+    key = dependencies_key(dependencies, environment)
+    get_url, put_url = cache.urls(scope, key)
+    # Packages are installed into their own directory such that they can be archived
+    commands = "\n".join(
+        [d.installation_script_into(DEPENDENCY_DIR) for d in dependencies if d.packages]
+    )
+    return CACHED_INSTALL_TEMPLATE.format(
+        get_url=get_url,
+        put_url=put_url,
+        key=key,
+        target_dir=DEPENDENCY_DIR,
+        install_commands=commands.replace("\n", "\n      "),
+    )
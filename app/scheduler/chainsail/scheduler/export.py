@@ -0,0 +1,170 @@
+"""
+Export of a job's production run samples and energies into consolidated arrays
+"""
+import json
+import pickle
+import shutil
+import tempfile
+import time
+import zipfile
+from io import BytesIO
+from typing import Dict, Iterator, List
+
+import numpy as np
+import yaml
+from botocore.exceptions import ClientError
+from chainsail.common.storage import default_dir_structure
+from chainsail.scheduler.archive import MultipartUploadWriter
+
+PRODUCTION_RUN = "production_run"
+EXPORT_DIRNAME = "export"
+EXPORT_INDEX_FILENAME = "index.json"
+EXPORT_REPLICA_TEMPLATE = "replica{}.npz"
+# Size in bytes of the chunks in which spooled traces are compressed
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def _get_object(s3, bucket: str, key: str) -> bytes:
+    return s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+
+def _is_missing(e: ClientError) -> bool:
+    return e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404")
+
+
+def _iter_batches(s3, bucket: str, run_root: str, template: str, replica_name: str, config: Dict):
+    """Loads the batches of a replica's samples or energies one at a time.
+
+    Loading stops at the first missing batch, such that simulations which
+    did not run to completion can still be exported.
+    """
+    n_iterations = config["general"]["n_iterations"]
+    dump_interval = config["re"]["dump_interval"]
+    for n in range(0, n_iterations, dump_interval):
+        key = f"{run_root}/{template.format(replica_name, n, n + dump_interval)}"
+        try:
+            data = _get_object(s3, bucket, key)
+        except ClientError as e:
+            if not _is_missing(e):
+                raise e
+            return
+        yield np.asarray(pickle.loads(data))
+
+
+def _write_trace(zipf: zipfile.ZipFile, name: str, batches: Iterator[np.ndarray]) -> Dict:
+    """Writes the batches of a trace as a single `.npy` member of a zip file.
+
+    The `.npy` header needs the shape of the whole trace, so the batches are
+    spooled to a temporary file first. Only a single batch is held in memory
+    at a time.
+
+    Returns:
+        The shape and dtype of the trace
+    """
+    dtype = None
+    shape = None
+    with tempfile.TemporaryFile() as spool:
+        for batch in batches:
+            if batch.dtype.hasobject:
+                raise ValueError(f"Can not export {name} of non-numeric dtype {batch.dtype}")
+            if dtype is None:
+                dtype, shape = batch.dtype, list(batch.shape)
+            elif list(batch.shape[1:]) != shape[1:]:
+                raise ValueError(
+                    f"Batch of shape {batch.shape} does not match trace of shape {shape}"
+                )
+            else:
+                shape[0] += len(batch)
+            np.ascontiguousarray(batch, dtype=dtype).tofile(spool)
+        if dtype is None:
+            dtype, shape = np.dtype(float), [0]
+        header = BytesIO()
+        np.lib.format.write_array_header_1_0(
+            header,
+            {
+                "descr": np.lib.format.dtype_to_descr(dtype),
+                "fortran_order": False,
+                "shape": tuple(shape),
+            },
+        )
+        info = zipfile.ZipInfo(f"{name}.npy", date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        # Knowing the size upfront allows zipfile to decide on using ZIP64
+        info.file_size = header.tell() + spool.tell()
+        spool.seek(0)
+        with zipf.open(info, "w") as entry:
+            entry.write(header.getvalue())
+            shutil.copyfileobj(spool, entry, SPOOL_CHUNK_SIZE)
+    return {"shape": shape, "dtype": str(dtype)}
+
+
+def export_production_run(s3, bucket: str, job_root: str) -> List[str]:
+    """Writes the samples and energies of each replica of a job's production
+    run into a single `.npz` file per replica, along with a JSON index.
+
+    The files are written to the `export` directory of the job. Replica 1
+    is the replica sampling the target distribution.
+
+    Args:
+        s3: The boto3 S3 client
+        bucket: The bucket holding the job's results
+        job_root: The key prefix of the job's results
+
+    Returns:
+        The keys of the written files, or an empty list if the job has no
+        production run
+    """
+    run_root = f"{job_root}/{PRODUCTION_RUN}"
+    try:
+        config = yaml.safe_load(
+            _get_object(s3, bucket, f"{run_root}/{default_dir_structure.CONFIG_FILE_NAME}")
+        )
+    except ClientError as e:
+        if not _is_missing(e):
+            raise e
+        return []
+    export_root = f"{job_root}/{EXPORT_DIRNAME}"
+    written = []
+    replicas = []
+    for r in range(1, config["general"]["num_replicas"] + 1):
+        replica_name = f"replica{r}"
+        file_name = EXPORT_REPLICA_TEMPLATE.format(r)
+        key = f"{export_root}/{file_name}"
+        # The `.npz` file is a zip file of `.npy` files, which is uploaded
+        # while it is written
+        with MultipartUploadWriter(s3, bucket, key) as writer:
+            with zipfile.ZipFile(writer, "w", zipfile.ZIP_DEFLATED) as zipf:
+                samples, energies = (
+                    _write_trace(
+                        zipf,
+                        name,
+                        _iter_batches(s3, bucket, run_root, template, replica_name, config),
+                    )
+                    for name, template in (
+                        ("samples", default_dir_structure.SAMPLES_TEMPLATE),
+                        ("energies", default_dir_structure.ENERGIES_TEMPLATE),
+                    )
+                )
+        written.append(key)
+        replicas.append(
+            {
+                "replica": replica_name,
+                "file": file_name,
+                "n_samples": samples["shape"][0],
+                "samples_shape": samples["shape"],
+                "samples_dtype": samples["dtype"],
+                "energies_shape": energies["shape"],
+            }
+        )
+    index = {
+        "simulation_run": PRODUCTION_RUN,
+        "num_replicas": config["general"]["num_replicas"],
+        "n_iterations": config["general"]["n_iterations"],
+        "dump_interval": config["re"]["dump_interval"],
+        "target_replica": "replica1",
+        "replicas": replicas,
+    }
+    index_key = f"{export_root}/{EXPORT_INDEX_FILENAME}"
+    s3.put_object(Body=json.dumps(index, indent=2).encode(), Bucket=bucket, Key=index_key)
+    written.append(index_key)
+    return written
@@ -1,18 +1,20 @@
 import logging
-import time
-from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from enum import Enum
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import grpc
 import shortuuid
 from chainsail.common.spec import JobSpec, JobSpecSchema
 from chainsail.grpc import HealthCheckRequest, HealthCheckResponse, HealthStub
 from chainsail.scheduler.config import SchedulerConfig
-from chainsail.scheduler.db import TblJobs, TblNodes
-from chainsail.scheduler.errors import JobError, ObjectConstructionError
-from chainsail.scheduler.nodes.base import Node, NodeType
+from chainsail.scheduler.db import TblJobs, TblNodes, sync_changed_fields
+from chainsail.scheduler.errors import JobError
+from chainsail.scheduler.nodes.base import Node, NodeStatus, NodeType, create_nodes
 from chainsail.scheduler.nodes.registry import NODE_CLS_REGISTRY
+from chainsail.scheduler.pool import WarmPool
+from chainsail.scheduler.scaling import ScalingPlan, plan_scaling
+from sqlalchemy.orm import object_session
 
 
 class JobStatus(Enum):
@@ -26,10 +28,55 @@ class JobStatus(Enum):
     FAILED = "failed"
 
 
-N_CREATION_THREADS = 3
-
 logger = logging.getLogger("chainsail.scheduler")
 
+# Port of the control node's gRPC server
+# TODO: take it from the control node's listening ports once they are
+# reliably set in its representation
+CONTROL_NODE_PORT = 50051
+
+
+def watch_control_node(address: str, timeout: Optional[float] = None) -> Optional[bool]:
+    """
+    Watches a job's control node until it reports that it exited.
+
+    The control node pushes status changes over a streaming health check,
+    so no polling is involved.
+
+    Args:
+        address: The address of the control node
+        timeout: The maximum time in seconds to watch the control node for.
+            If not given, the control node is watched until it exits.
+
+    Returns:
+        True if the control node succeeded, False if it failed and None if
+        it was still running once `timeout` was reached
+
+    Raises:
+        grpc.RpcError: If the control node could not be reached
+    """
+    logger.info("Initiating connection with control node")
+    response = None
+    with grpc.insecure_channel(f"{address}:{CONTROL_NODE_PORT}") as channel:
+        stub = HealthStub(channel)
+        try:
+            for response in stub.Watch(HealthCheckRequest(service=""), timeout=timeout):
+                if response.status != HealthCheckResponse.SERVING:
+                    break
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.DEADLINE_EXCEEDED:
+                raise e
+            return None
+    if response is None or response.status == HealthCheckResponse.SERVING:
+        # The stream was closed without the control node having exited
+        return None
+    logger.info("Control node connection terminated.")
+    if response.status == HealthCheckResponse.SUCCESS:
+        logger.info("Control node reported final status as SUCCESS")
+        return True
+    logger.info("Control node reported final status as FAILED")
+    return False
+
 
 class Job:
     def __init__(
@@ -42,10 +89,14 @@ class Job:
         node_registry: Dict[NodeType, Node] = NODE_CLS_REGISTRY,
         representation: Optional[TblJobs] = None,
         status: JobStatus = JobStatus.INITIALIZED,
+        pool: Optional[WarmPool] = None,
     ):
         self.id = id
         self.spec = spec
         self.config = config
+        # The representation last synced to and the values last written to it
+        self._synced_representation = None
+        self._synced_fields = {}
         self.driver = config.create_node_driver()
         self.representation = representation
         if nodes is None:
@@ -55,15 +106,49 @@ class Job:
         self.control_node = control_node
         self.status = status
         self._node_cls = node_registry[self.config.node_type]
+        self.pool = pool
+
+    @property
+    def spec(self) -> JobSpec:
+        return self._spec
+
+    @spec.setter
+    def spec(self, spec: JobSpec):
+        self._spec = spec
+        self._spec_dump = None
+
+    @property
+    def spec_dump(self) -> str:
+        """The serialized job spec, which is only computed once per spec"""
+        if self._spec_dump is None:
+            self._spec_dump = JobSpecSchema().dumps(self._spec)
+        return self._spec_dump
+
+    @contextmanager
+    def _batched_flush(self):
+        """
+        Holds back database writes made within the context, e.g. those of
+        newly added nodes, and flushes them all at once afterwards.
+        """
+        session = object_session(self.representation) if self.representation else None
+        if session is None:
+            yield
+            return
+        with session.no_autoflush:
+            yield
+        session.flush()
 
     def _initialize_nodes(self):
         if self.nodes or self.control_node:
             raise JobError(
                 "Cannot initialize nodes for a job which already has nodes assigned to it."
             )
-        for _ in range(self.spec.initial_number_of_replicas):
-            self._add_node()
-        self.control_node = self._add_node(is_controller=True)
+        n_workers = self.spec.initial_number_of_replicas
+        self.nodes.extend(self._acquire_pooled_nodes(n_workers))
+        with self._batched_flush():
+            for _ in range(n_workers - len(self.nodes)):
+                self._add_node()
+            self.control_node = self._add_node(is_controller=True)
         self.status = JobStatus.INITIALIZED
         self.sync_representation()
 
@@ -75,20 +160,15 @@ class Job:
         ):
             raise JobError("Attempted to start a job which has already been started")
         self._initialize_nodes()
-        # FIXME: Parallel execution here was prone to deadlocks / serialization issues
-        # need to revisit.
-        # with ProcessPoolExecutor(max_workers=N_CREATION_THREADS) as ex:
         try:
             # Create worker nodes first
+            # Nodes taken from the warm pool are already running
+            new_nodes = [n for n in self.nodes if n.status == NodeStatus.INITIALIZED]
             logger.info(
-                f"Creating {len(self.nodes)} worker nodes...",
+                f"Creating {len(new_nodes)} worker nodes...",
                 extra={"job_id": self.id},
             )
-            for created, logs in map(lambda n: n.create(), self.nodes):
-                if not created:
-                    raise JobError(
-                        f"Failed to start node for job {id}. Deployment logs: \n" + logs
-                    )
+            self._create_nodes(new_nodes)
             self.sync_representation()
             # Then create control node
             logger.debug("Creating control node...", extra={"job_id": self.id})
@@ -96,7 +176,9 @@ class Job:
             created, logs = self.control_node.create()
             self.sync_representation()
             if not created:
-                raise JobError(f"Failed to start node for job {id}. Deployment logs: \n" + logs)
+                raise JobError(
+                    f"Failed to start node for job {self.id}. Deployment logs: \n" + logs
+                )
         except Exception as e:
             # Cleanup created nodes on failure
             for n in self.nodes:
@@ -108,19 +190,16 @@ class Job:
         self.sync_representation()
 
     def stop(self):
-        for i, node in enumerate(self.nodes):
-            logger.info(
-                f"Deleting worker node {i+1}/{len(self.nodes)}...",
-                extra={"job_id": self.id},
+        nodes = self.nodes + ([self.control_node] if self.control_node else [])
+        if nodes:
+            logger.info(f"Deleting {len(nodes)} nodes...", extra={"job_id": self.id})
+        failed = self._delete_nodes(nodes)
+        if failed:
+            self.sync_representation()
+            raise JobError(
+                f"Failed to delete {len(failed)} of {len(nodes)} nodes for job {self.id}: "
+                + ", ".join(node.name for node in failed)
             )
-            if not node.delete():
-                self.sync_representation()
-                raise JobError(f"Failed to delete node {node}")
-        if self.control_node:
-            logger.info(f"Deleting controller node...", extra={"job_id": self.id})
-            if not self.control_node.delete():
-                self.sync_representation()
-                raise JobError(f"Failed to delete node {node}")
         # Dropping references to deleted nodes
         self.nodes = []
         self.control_node = None
@@ -137,6 +216,65 @@ class Job:
         self.start()
         self.sync_representation()
 
+    def _create_nodes(self, nodes: List[Node]) -> None:
+        """
+        Creates nodes concurrently. See :func:`chainsail.scheduler.nodes.base.create_nodes`.
+
+        Args:
+            nodes: The nodes to create
+
+        Raises:
+            JobError: If any of the nodes failed to start. Creation of the
+                remaining nodes is still awaited in that case.
+        """
+        if not nodes:
+            return
+        if self.representation:
+            # Load everything node creation reads from the database up front
+            # such that the worker threads never trigger lazy loads
+            _ = self.representation.id, [n.address for n in self.representation.nodes]
+        with self._batched_flush():
+            failure_logs = create_nodes(nodes, self.config.max_node_creation_threads, self.id)
+        if failure_logs:
+            raise JobError(
+                f"Failed to start {len(failure_logs)} of {len(nodes)} nodes for job {self.id}. "
+                "Deployment logs: \n" + "\n".join(failure_logs)
+            )
+
+    def _delete_nodes(self, nodes: List[Node]) -> List[Node]:
+        """
+        Deletes nodes concurrently, using the bulk deletion of the node type if it has one.
+        See :meth:`chainsail.scheduler.nodes.base.Node.delete_many`.
+
+        Args:
+            nodes: The nodes to delete
+
+        Returns:
+            The nodes which could not be deleted
+        """
+        if not nodes:
+            return []
+        if self.representation:
+            # See `_create_nodes`
+            _ = self.representation.id, [n.address for n in self.representation.nodes]
+        with self._batched_flush():
+            return self._node_cls.delete_many(
+                nodes, self.config.max_node_creation_threads, self.id
+            )
+
+    def _acquire_pooled_nodes(self, n: int) -> List[Node]:
+        """Takes up to `n` running worker nodes from the warm pool, if there is one"""
+        if not self.pool:
+            return []
+        if self.status in (JobStatus.STOPPED, JobStatus.SUCCESS, JobStatus.FAILED):
+            raise JobError(f"Attempted to add a node to a job ({self.id}) which has exited.")
+        nodes = self.pool.acquire(n, self.spec, self.representation)
+        if nodes:
+            logger.info(
+                f"Assigned {len(nodes)} nodes from the warm pool", extra={"job_id": self.id}
+            )
+        return nodes
+
     def _add_node(self, is_controller=False) -> Node:
         """Add a new node to a job"""
         if self.status in (JobStatus.STOPPED, JobStatus.SUCCESS, JobStatus.FAILED):
@@ -156,88 +294,119 @@ class Job:
                     f"Attempted to add a controller node to job ({self.id}) which already has one."
                 )
             self.control_node = new_node
-        self.sync_representation()
+        # None of the other nodes changed, so there is no need to sync the whole job
+        new_node.sync_representation()
         logger.debug("Added new node", extra={"job_id": self.id})
         return new_node
 
-    def _remove_node(self, node: Node):
-        """Remove a node from a job"""
-        if node == self.control_node:
+    def _remove_nodes(self, nodes: List[Node]):
+        """Remove worker nodes from a job
+
+        Raises:
+            JobError: If any of the nodes could not be deleted. The nodes which
+                were deleted are removed from the job nonetheless.
+        """
+        if self.control_node and self.control_node in nodes:
             raise JobError(
                 "Cannot remove the control node from a job. To remove the control node use the stop() method."
             )
-        logger.debug(f"Removing node {node}...", extra={"job_id": self.id})
-        if not node.delete():
-            self.sync_representation()
-            raise JobError(f"Failed to delete node {node} for job {self.id}")
-        if node.representation:
-            node.representation.in_use = False
-        self.sync_representation()
-        self.nodes.remove(node)
+        logger.debug(f"Removing {len(nodes)} nodes...", extra={"job_id": self.id})
+        failed = self._delete_nodes(nodes)
+        for node in nodes:
+            if node in failed:
+                continue
+            if node.representation:
+                node.representation.in_use = False
+            self.nodes.remove(node)
+        if failed:
+            raise JobError(
+                f"Failed to delete {len(failed)} of {len(nodes)} nodes for job {self.id}: "
+                + ", ".join(node.name for node in failed)
+            )
 
-    def scale_to(self, n_replicas: int):
+    def scale_to(self, n_replicas: int) -> ScalingPlan:
+        """
+        Scales the job to `n_replicas` worker nodes.
+
+        Only the difference between the current and the requested set of
+        nodes is applied: failed nodes are replaced, surplus nodes are
+        removed newest first and missing nodes are taken from the warm pool
+        or created.
+
+        Args:
+            n_replicas: The requested number of worker nodes
+
+        Returns:
+            The applied scaling plan
+        """
         logger.info("Scaling initiated")
-        if n_replicas < 0:
-            raise ValueError("Can only scale to >= 0 replicas")
-        requested_size = n_replicas
-        current_size = len(self.nodes)
-        if requested_size == current_size:
+        plan = plan_scaling(self.nodes, n_replicas)
+        if plan.is_noop:
             logger.info(f"Already have the requested number of replicas. Returning.")
-            return None
-        elif requested_size > current_size:
-            logger.info(f"Scaling up from {current_size} to {n_replicas} replicas...")
-            # Scale up
-            to_add = requested_size - current_size
-            for _ in range(to_add):
-                new_node = self._add_node()
-                started, logs = new_node.create()
-                if not started:
-                    self.sync_representation()
-                    raise JobError(f"Failed to start new node while scaling up. Logs: \n {logs}")
-        else:
-            # Scale down
-            logger.info(f"Scaling down from {current_size} to {n_replicas} replicas...")
-            to_remove = current_size - requested_size
-            for node in self.nodes[-to_remove:]:
-                self._remove_node(node)
+            return plan
+        logger.info(
+            f"Scaling from {len(self.nodes)} to {n_replicas} replicas by keeping "
+            f"{len(plan.keep)}, removing {len(plan.remove)} and adding {plan.n_add} nodes...",
+            extra={"job_id": self.id},
+        )
+        self._remove_nodes(plan.remove)
+        if plan.n_add:
+            pooled_nodes = self._acquire_pooled_nodes(plan.n_add)
+            self.nodes.extend(pooled_nodes)
+            with self._batched_flush():
+                new_nodes = [self._add_node() for _ in range(plan.n_add - len(pooled_nodes))]
+            try:
+                self._create_nodes(new_nodes)
+            except JobError as e:
+                self.sync_representation()
+                raise JobError(f"Failed to start new nodes while scaling up. {e}")
         self.sync_representation()
+        return plan
 
-    def watch(self) -> bool:
-        # Await control node until it reports exit or dies
-        ip = self.control_node.address
-        # TODO: this unfortunately still doesn't work.
-        # Something is still off with the node representation.
-        # self.control_node.listening_ports[0]
-        port = 50051
-        logger.info("Initiating connection with control node")
-        with grpc.insecure_channel(f"{ip}:{port}") as channel:
-            stub = HealthStub(channel)
-            while True:
-                response = stub.Check(HealthCheckRequest(service=""))
-                if response.status != HealthCheckResponse.SERVING:
-                    break
-                else:
-                    time.sleep(1)
-        logger.info("Control node connection terminated.")
-        if response.status == HealthCheckResponse.SUCCESS:
-            logger.info("Control node reported final status as SUCCESS")
-            self.status = JobStatus.SUCCESS
-            return True
-        else:
-            logger.info("Control node reported final status as FAILED")
-            self.status = JobStatus.FAILED
-            return False
+    @property
+    def worker_addresses(self) -> List[str]:
+        """The addresses of the job's worker nodes, i.e. the contents of its MPI hostfile"""
+        return [node.address for node in self.nodes]
+
+    def watch(self, timeout: Optional[float] = None) -> Optional[bool]:
+        """
+        Watches the control node until it reports that it exited, see
+        :func:`watch_control_node`, and updates the job's status accordingly.
+
+        Args:
+            timeout: The maximum time in seconds to watch the control node for.
+                If not given, the control node is watched until it exits.
+
+        Returns:
+            True if the control node succeeded, False if it failed and None if
+            it was still running once `timeout` was reached
+
+        Raises:
+            grpc.RpcError: If the control node could not be reached
+        """
+        succeeded = watch_control_node(self.control_node.address, timeout=timeout)
+        if succeeded is not None:
+            self.status = JobStatus.SUCCESS if succeeded else JobStatus.FAILED
+        return succeeded
 
     def sync_representation(self) -> None:
         """
         Updates the state of the job's database representation along with all of
         its nodes. If the Job instance is not bound to a database representation
         this method will simply return.
+
+        Only fields which changed since the last sync are written.
         """
         if not self.representation:
             return
-        self.representation.status = self.status.value
-        self.representation.spec = JobSpecSchema().dumps(self.spec)
+        if self._synced_representation is not self.representation:
+            self._synced_representation = self.representation
+            self._synced_fields = {}
+        sync_changed_fields(
+            self.representation,
+            self._synced_fields,
+            {"status": self.status.value, "spec": self.spec_dump},
+        )
         for node in self.nodes:
             node.sync_representation()
         if self.control_node:
@@ -249,24 +418,27 @@ class Job:
         job_rep: TblJobs,
         config: SchedulerConfig,
         node_registry: Dict[NodeType, Node] = NODE_CLS_REGISTRY,
+        pool: Optional[WarmPool] = None,
     ) -> "Job":
         spec = JobSpecSchema().loads(job_rep.spec)
         nodes = []
         control_node = None
+        # Nodes of the same type are reconstructed together, such that their
+        # compute resources can be looked up at once
+        node_reps_by_type: Dict[NodeType, List[TblNodes]] = {}
         for node_rep in job_rep.nodes:
             # Ignore nodes which are no longer in use
             if not node_rep.in_use:
                 continue
-            node_rep: TblNodes
-            node_cls = node_registry[NodeType(node_rep.node_type)]
-            try:
-                node = node_cls.from_representation(
-                    spec, node_rep, config, is_controller=not node_rep.is_worker
-                )
-            except ObjectConstructionError:
-                node_rep.in_use = False
-            else:
-                if node_rep.is_worker:
+            node_reps_by_type.setdefault(NodeType(node_rep.node_type), []).append(node_rep)
+        for node_type, node_reps in node_reps_by_type.items():
+            node_cls = node_registry[node_type]
+            for node_rep, node in zip(
+                node_reps, node_cls.from_representations(spec, node_reps, config)
+            ):
+                if node is None:
+                    node_rep.in_use = False
+                elif node_rep.is_worker:
                     nodes.append(node)
                 else:
                     if not control_node:
@@ -276,7 +448,7 @@ class Job:
         if nodes and not control_node:
             raise JobError("Job representation had nodes but no control node.")
 
-        return cls(
+        job = cls(
             id=job_rep.id,
             spec=spec,
             config=config,
@@ -285,4 +457,11 @@ class Job:
             node_registry=node_registry,
             representation=job_rep,
             status=JobStatus(job_rep.status),
+            pool=pool,
         )
+        # The spec was just loaded from the representation, so it does not
+        # need to be serialized again unless it is replaced
+        job._spec_dump = job_rep.spec
+        job._synced_representation = job_rep
+        job._synced_fields["spec"] = job_rep.spec
+        return job
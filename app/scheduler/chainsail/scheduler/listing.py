@@ -0,0 +1,139 @@
+"""
+Paginated and filtered listing of jobs
+"""
+import base64
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from marshmallow import Schema, ValidationError, fields, post_load, validate, validates
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+
+from chainsail.scheduler.db import TblJobs
+from chainsail.scheduler.jobs import JobStatus
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Columns which are always loaded, since they are needed to build the cursor
+CURSOR_COLUMNS = ("id", "created_at")
+JOB_FIELDS = tuple(c.name for c in TblJobs.__table__.columns)
+
+
+def encode_cursor(job: TblJobs) -> str:
+    """Encodes the position of a job in the listing as an opaque cursor"""
+    position = f"{job.created_at.isoformat()}|{job.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodes a cursor into the creation time and ID of the job it points to"""
+    try:
+        created_at, job_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(job_id)
+    except ValueError:
+        raise ValidationError(f"Invalid cursor: {cursor}", "cursor")
+
+
+def _split(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+class JobListArgsSchema(Schema):
+    """Schema for the query arguments of job listings
+
+    `status` and `fields` are comma-separated lists. `fields` selects the
+    columns to load and return.
+    """
+
+    limit = fields.Int(
+        load_default=DEFAULT_PAGE_SIZE, validate=validate.Range(min=1, max=MAX_PAGE_SIZE)
+    )
+    cursor = fields.String(load_default=None)
+    status = fields.String(load_default=None)
+    created_after = fields.DateTime(load_default=None)
+    created_before = fields.DateTime(load_default=None)
+    # `fields` is taken by the schema itself
+    columns = fields.String(data_key="fields", load_default=None)
+
+    @validates("status")
+    def validate_status(self, value):
+        if value is None:
+            return
+        valid = {s.value for s in JobStatus}
+        invalid = [s for s in _split(value) if s not in valid]
+        if invalid:
+            raise ValidationError(f"Unknown job statuses: {', '.join(invalid)}")
+
+    @validates("columns")
+    def validate_columns(self, value):
+        if value is None:
+            return
+        invalid = [f for f in _split(value) if f not in JOB_FIELDS]
+        if invalid:
+            raise ValidationError(f"Unknown job fields: {', '.join(invalid)}")
+
+    @post_load
+    def convert(self, data, **kwargs):
+        for key in ("status", "columns"):
+            if data[key] is not None:
+                data[key] = _split(data[key])
+        # Creation times are stored as naive UTC datetimes
+        for key in ("created_after", "created_before"):
+            if data[key] is not None and data[key].tzinfo is not None:
+                data[key] = data[key].astimezone(timezone.utc).replace(tzinfo=None)
+        if data["cursor"] is not None:
+            data["cursor"] = decode_cursor(data["cursor"])
+        return data
+
+
+def list_jobs(
+    query,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    status: Optional[List[str]] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    columns: Optional[List[str]] = None,
+) -> Tuple[List[TblJobs], Optional[str]]:
+    """Fetches a page of jobs, most recently created first.
+
+    Pages are delimited by the creation time and ID of the last job of the
+    previous page rather than by an offset, such that the cost of fetching a
+    page does not grow with the number of jobs before it.
+
+    Args:
+        query: The query for the jobs to list, e.g. those of a single user
+        limit: The maximum number of jobs to return
+        cursor: The decoded cursor of the previous page
+        status: Only return jobs with one of these statuses
+        created_after: Only return jobs created at or after this time
+        created_before: Only return jobs created before this time
+        columns: Only load these columns. All columns are loaded if None.
+
+    Returns:
+        The jobs and the cursor of the next page, which is None if this is
+        the last page
+    """
+    if status:
+        query = query.filter(TblJobs.status.in_(status))
+    if created_after is not None:
+        query = query.filter(TblJobs.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(TblJobs.created_at < created_before)
+    if cursor is not None:
+        created_at, job_id = cursor
+        query = query.filter(
+            or_(
+                TblJobs.created_at < created_at,
+                and_(TblJobs.created_at == created_at, TblJobs.id < job_id),
+            )
+        )
+    if columns:
+        loaded = set(columns) | set(CURSOR_COLUMNS)
+        query = query.options(load_only(*[getattr(TblJobs, c) for c in loaded]))
+    # One more job than requested is fetched to tell whether there is a next page
+    jobs = query.order_by(TblJobs.created_at.desc(), TblJobs.id.desc()).limit(limit + 1).all()
+    if len(jobs) <= limit:
+        return jobs, None
+    jobs = jobs[:limit]
+    return jobs, encode_cursor(jobs[-1])
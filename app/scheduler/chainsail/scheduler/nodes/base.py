@@ -1,9 +1,14 @@
 import json
+import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from enum import Enum
-from typing import List, Optional, Tuple
+from typing import Any, Callable, List, Optional, Tuple
 
-from chainsail.scheduler.db import TblJobs, TblNodes
+from chainsail.scheduler.db import TblJobs, TblNodes, sync_changed_fields
+from chainsail.scheduler.errors import ObjectConstructionError
+
+logger = logging.getLogger("chainsail.scheduler")
 
 
 class NodeType(Enum):
@@ -23,6 +28,15 @@ class NodeStatus(Enum):
 
 class Node(ABC):
 
+    # While set, `sync_representation` is a no-op. This allows using a node
+    # from a thread which does not own the database session, with the owning
+    # thread syncing the representation afterwards.
+    sync_deferred: bool = False
+
+    # Whether generic worker nodes of this type can be created ahead of time
+    # and be kept in a warm pool until they are bound to a job
+    SUPPORTS_POOLING: bool = False
+
     # Properties
     @property
     @abstractmethod
@@ -80,12 +94,81 @@ class Node(ABC):
     def from_representation(cls, spec, node_rep, config, is_controller=False) -> "Node":
         pass
 
+    @classmethod
+    def from_representations(
+        cls, spec, node_reps: List[TblNodes], config
+    ) -> List[Optional["Node"]]:
+        """Reconstructs several nodes from their database representations.
+
+        Node types which can look up the compute resources of many nodes at
+        once should override this, since it is used to reconstruct whole jobs.
+
+        Args:
+            spec: The specification of the nodes' job
+            node_reps: The database representations of the nodes
+            config: The scheduler configuration
+
+        Returns:
+            The nodes in the order of their representations, with None in
+            place of nodes whose compute resources no longer exist
+        """
+        nodes = []
+        for node_rep in node_reps:
+            try:
+                node = cls.from_representation(
+                    spec, node_rep, config, is_controller=not node_rep.is_worker
+                )
+            except ObjectConstructionError:
+                node = None
+            nodes.append(node)
+        return nodes
+
     @classmethod
     def from_config(
         cls, name, config, spec, job_rep: Optional[TblJobs] = None, is_controller=False
     ) -> "Node":
         pass
 
+    @classmethod
+    def for_pool(cls, name, config) -> "Node":
+        """Creates a generic worker node which is not bound to any job.
+
+        Args:
+            name: The name of the node
+            config: The scheduler configuration
+
+        Returns:
+            The (not yet created) node along with a database representation
+            which is flagged as being in the warm pool
+        """
+        raise NotImplementedError(f"{cls.__name__} does not support warm pools")
+
+    def bind(self, spec, job_rep: Optional[TblJobs] = None) -> None:
+        """Assigns a running node from the warm pool to a job.
+
+        Args:
+            spec: The specification of the job the node is assigned to
+            job_rep: The database representation of the job
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support warm pools")
+
+    @classmethod
+    def delete_many(cls, nodes: List["Node"], max_threads: int, job_id=None) -> List["Node"]:
+        """Deletes several nodes of this type.
+
+        Node types whose backend can delete the resources of many nodes at
+        once should override this. See :func:`delete_nodes`.
+
+        Args:
+            nodes: The nodes to delete
+            max_threads: The maximum number of nodes to delete at the same time
+            job_id: The id of the job the nodes belong to, used for logging
+
+        Returns:
+            The nodes which could not be deleted
+        """
+        return delete_nodes(nodes, max_threads, job_id)
+
     def __eq__(self, other):
         # assumes that nodes have unique names (which they currently do)
         return self.name == other.name
@@ -95,13 +178,110 @@ class Node(ABC):
         Updates the state of a node's database representation, if it exists,
         to match the state of the node.
         """
-        if not self.representation:
+        if not self.representation or self.sync_deferred:
             # If a node is created without a corresponding database row,
             # there is nothing to do
             return
-        self.representation.name = self.name
-        self.representation.address = self.address
-        self.representation.entrypoint = self.entrypoint
-        self.representation.ports = json.dumps(self.listening_ports)
-        self.representation.status = self.status.value
-        self.representation.node_type = self.NODE_TYPE
+        # Only fields which changed since the last sync are written
+        if getattr(self, "_synced_representation", None) is not self.representation:
+            self._synced_representation = self.representation
+            self._synced_fields = {}
+        sync_changed_fields(
+            self.representation,
+            self._synced_fields,
+            {
+                "name": self.name,
+                "address": self.address,
+                "entrypoint": self.entrypoint,
+                "ports": json.dumps(self.listening_ports),
+                "status": self.status.value,
+                "node_type": self.NODE_TYPE,
+            },
+        )
+
+
+def _run_concurrently(
+    nodes: List[Node], operation: Callable[[Node], Any], max_threads: int, job_id=None
+) -> List[Tuple[Node, Any]]:
+    """
+    Runs a (blocking) operation on each node from a thread pool.
+
+    The nodes' database representations are only ever updated from the
+    calling thread, since the database session must not be shared between
+    threads.
+
+    Args:
+        nodes: The nodes to run the operation on
+        operation: The operation to run on each node
+        max_threads: The maximum number of nodes to run the operation on at the same time
+        job_id: The id of the job the nodes belong to, used for logging
+
+    Returns:
+        Each node with the result of its operation, in the order the operations
+        finished. Exceptions raised by an operation are logged and returned as
+        its result.
+    """
+    if not nodes:
+        return []
+    extra = {"job_id": job_id} if job_id is not None else {}
+    for node in nodes:
+        node.sync_deferred = True
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(nodes), max_threads)) as ex:
+            futures = {ex.submit(operation, node): node for node in nodes}
+            for future in as_completed(futures):
+                node = futures[future]
+                node.sync_deferred = False
+                node.sync_representation()
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.exception(e, extra=extra)
+                    result = e
+                results.append((node, result))
+    finally:
+        for node in nodes:
+            node.sync_deferred = False
+    return results
+
+
+def create_nodes(nodes: List[Node], max_threads: int, job_id=None) -> List[str]:
+    """
+    Creates nodes concurrently. See :func:`_run_concurrently`.
+
+    Args:
+        nodes: The nodes to create
+        max_threads: The maximum number of nodes to create at the same time
+        job_id: The id of the job the nodes belong to, used for logging
+
+    Returns:
+        The deployment logs of all nodes which failed to start. Creation of
+        the remaining nodes is still awaited in that case.
+    """
+    failure_logs = []
+    for node, result in _run_concurrently(nodes, lambda n: n.create(), max_threads, job_id):
+        created, logs = (False, repr(result)) if isinstance(result, Exception) else result
+        if not created:
+            failure_logs.append(f"{node.name}:\n{logs}")
+    return failure_logs
+
+
+def delete_nodes(nodes: List[Node], max_threads: int, job_id=None) -> List[Node]:
+    """
+    Deletes nodes concurrently. See :func:`_run_concurrently`.
+
+    Args:
+        nodes: The nodes to delete
+        max_threads: The maximum number of nodes to delete at the same time
+        job_id: The id of the job the nodes belong to, used for logging
+
+    Returns:
+        The nodes which could not be deleted. Deletion of the remaining nodes
+        is still awaited in that case.
+    """
+    return [
+        node
+        for node, result in _run_concurrently(nodes, lambda n: n.delete(), max_threads, job_id)
+        if isinstance(result, Exception) or not result
+    ]
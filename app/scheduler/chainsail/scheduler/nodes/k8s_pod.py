@@ -1,8 +1,9 @@
 import logging
 import os
+import threading
 import time
 from enum import Enum
-from typing import Callable, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import kubernetes as kub
 from chainsail.common.spec import JobSpec, JobSpecSchema
@@ -13,13 +14,14 @@ from chainsail.scheduler.config import (
     load_scheduler_config,
 )
 from chainsail.scheduler.db import TblJobs, TblNodes
+from chainsail.scheduler.deps import DependencyCache, install_commands
 from chainsail.scheduler.errors import (
     ConfigurationError,
     MissingNodeError,
     NodeError,
     ObjectConstructionError,
 )
-from chainsail.scheduler.nodes.base import Node, NodeStatus, NodeType
+from chainsail.scheduler.nodes.base import Node, NodeStatus, NodeType, delete_nodes
 from kubernetes.client import (
     V1ConfigMap,
     V1KeyToPath,
@@ -46,6 +48,149 @@ K8S_SSH_PEM_KEY_FILE = "id.pem"
 PORT_RANGE_MIN = 4000
 
 
+# Maximum number of node names in a single label selector of a bulk listing
+MAX_NODES_PER_LISTING = 100
+
+
+# Interval in seconds after which a pod's status is read explicitly if the
+# watch did not report any changes to it
+POD_STATUS_RESYNC_INTERVAL = 30
+
+
+def pod_status(pod: V1Pod) -> NodeStatus:
+    """Maps the phase and container states of a pod to a node status.
+    See https://kubernetes.io/docs/concepts/workloads/pods/pod-lifecycle/
+    """
+    phase = pod.status.phase
+    ctrs_statuses = pod.status.container_statuses
+    if ctrs_statuses:
+        ctrs_started = all([ctr.started for ctr in ctrs_statuses])
+    else:
+        ctrs_started = False
+    if phase == "Pending" or (phase == "Running" and not ctrs_started):
+        return NodeStatus.CREATING
+    elif phase == "Running" and ctrs_started:
+        return NodeStatus.RUNNING
+    elif phase == "Succeeded":
+        return NodeStatus.EXITED
+    elif phase == "Failed":
+        return NodeStatus.FAILED
+    else:
+        return NodeStatus.UNKNOWN
+
+
+class PodStatusTracker:
+    """Keeps track of the latest state of all Chainsail pods in a namespace.
+
+    A single watch on the `app=rex` label is shared by all nodes in the
+    namespace such that awaiting the readiness of many pods does not require
+    polling each of them.
+    """
+
+    _trackers: Dict[Tuple[int, str], "PodStatusTracker"] = {}
+    _trackers_lock = threading.Lock()
+
+    def __init__(
+        self,
+        api: kub.client.CoreV1Api,
+        namespace: str = K8S_NAMESPACE,
+        label_selector: str = "app=rex",
+        watch_timeout: int = 300,
+        retry_interval: float = 5,
+    ):
+        self._api = api
+        self._namespace = namespace
+        self._label_selector = label_selector
+        self._watch_timeout = watch_timeout
+        self._retry_interval = retry_interval
+        self._pods: Dict[str, V1Pod] = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    @classmethod
+    def for_namespace(
+        cls, api: kub.client.CoreV1Api, namespace: str = K8S_NAMESPACE
+    ) -> "PodStatusTracker":
+        """Returns the tracker for a namespace, creating it if required.
+
+        Trackers are kept per process since the watch thread does not
+        survive forking.
+        """
+        key = (os.getpid(), namespace)
+        with cls._trackers_lock:
+            if key not in cls._trackers:
+                cls._trackers[key] = cls(api, namespace)
+            return cls._trackers[key]
+
+    def _ensure_watching(self):
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._watch, daemon=True)
+                self._thread.start()
+
+    def _watch(self):
+        resource_version = None
+        while True:
+            watch = kub.watch.Watch()
+            try:
+                for event in watch.stream(
+                    self._api.list_namespaced_pod,
+                    namespace=self._namespace,
+                    label_selector=self._label_selector,
+                    resource_version=resource_version,
+                    timeout_seconds=self._watch_timeout,
+                ):
+                    pod = event["object"]
+                    resource_version = pod.metadata.resource_version
+                    self._update(pod, deleted=event["type"] == "DELETED")
+            except ApiException as e:
+                if e.status == 410:
+                    # The resource version is too old, so start over with
+                    # a fresh listing of all pods
+                    resource_version = None
+                else:
+                    logger.warning(f"Pod watch failed. Retrying. Exception: {e}")
+                    time.sleep(self._retry_interval)
+            except Exception as e:
+                logger.warning(f"Pod watch failed. Retrying. Exception: {e}")
+                resource_version = None
+                time.sleep(self._retry_interval)
+
+    def _update(self, pod: V1Pod, deleted: bool = False):
+        with self._condition:
+            if deleted:
+                self._pods.pop(pod.metadata.name, None)
+            else:
+                self._pods[pod.metadata.name] = pod
+            self._condition.notify_all()
+
+    def wait_for_update(
+        self, name: str, seen_version: Optional[str], timeout: float
+    ) -> Optional[V1Pod]:
+        """Waits for the watch to report a new state of a pod.
+
+        Args:
+            name: The name of the pod
+            seen_version: The resource version of the most recent pod state
+                known to the caller, if any
+            timeout: Maximum time in seconds to wait
+
+        Returns:
+            The latest state of the pod or None if no new state was reported
+            within `timeout` seconds
+        """
+        self._ensure_watching()
+
+        def updated():
+            pod = self._pods.get(name)
+            return pod is not None and pod.metadata.resource_version != seen_version
+
+        with self._condition:
+            if not self._condition.wait_for(updated, timeout=timeout):
+                return None
+            return self._pods[name]
+
+
 def monitor_deployment(pod: "K8sNode") -> bool:
     """Monitor the proper creation and startup of a pod.
     Args:
@@ -53,10 +198,17 @@ def monitor_deployment(pod: "K8sNode") -> bool:
     Returns:
         A boolean indicating the success or failure of the pod creation
     """
+    tracker = PodStatusTracker.for_namespace(pod.api, K8S_NAMESPACE)
+    seen_version = None
     while True:
-        pod.refresh_status()
+        observed = tracker.wait_for_update(pod.name, seen_version, POD_STATUS_RESYNC_INTERVAL)
+        if observed is None:
+            # The watch might be lagging behind or reconnecting
+            pod.refresh_status()
+        else:
+            seen_version = observed.metadata.resource_version
+            pod.refresh_status(observed)
         if pod.status == NodeStatus.CREATING:
-            time.sleep(2)
             continue
         elif pod.status == NodeStatus.RUNNING:
             return True
@@ -71,6 +223,52 @@ def monitor_deployment(pod: "K8sNode") -> bool:
             return False
 
 
+def list_by_node_name(list_fn: Callable, names: List[str]) -> Dict[str, object]:
+    """Lists the resources of several nodes with as few API calls as possible
+
+    Args:
+        list_fn: The API's listing method for the type of resource, e.g.
+            `CoreV1Api.list_namespaced_pod`
+        names: The names of the nodes
+
+    Returns:
+        The resources keyed by the name of their node. Resources which are not
+        labelled with their node's name are missing.
+    """
+    resources = {}
+    for selector in _node_name_selectors(names):
+        listing = list_fn(namespace=K8S_NAMESPACE, label_selector=selector)
+        for resource in listing.items:
+            resources[resource.metadata.labels["node_name"]] = resource
+    return resources
+
+
+def _node_name_selector(names: List[str]) -> str:
+    return f"node_name in ({','.join(names)})"
+
+
+def _node_name_selectors(names: List[str]) -> List[str]:
+    return [
+        _node_name_selector(names[i : i + MAX_NODES_PER_LISTING])
+        for i in range(0, len(names), MAX_NODES_PER_LISTING)
+    ]
+
+
+def _delete_if_exists(delete: Callable, name: str) -> None:
+    """Deletes a resource, treating resources which do not exist as deleted."""
+    try:
+        delete(name=name, namespace=K8S_NAMESPACE)
+    except ApiException as e:
+        if e.status != 404:
+            raise e
+
+
+def _status_of(node_rep: TblNodes) -> NodeStatus:
+    # Nodes only get a status once their representation is synced, so the
+    # pod of a node without one may or may not have been created
+    return NodeStatus(node_rep.status) if node_rep.status else NodeStatus.UNKNOWN
+
+
 def service_fqdn(svc_name: str) -> str:
     return f"{svc_name}.{K8S_NAMESPACE}.svc.cluster.local"
 
@@ -79,10 +277,14 @@ class K8sNode(Node):
     """A Chainsail node implementation which creates a Kubernetes Pod for each node."""
 
     NODE_TYPE = "KubernetesPod"
+    SUPPORTS_POOLING = True
     _NAME_CM = "configmap-{}"
     _CM_FILE_USERCODE = "install_job_deps.sh"
     _CM_FILE_JOBSPEC = "job.json"
+    _CM_FILE_PROB_URL = "prob_url"
     _CM_FILE_SSHKEY = "authorized_keys"
+    # Directory in which pooled pods see the (updatable) job configmap
+    _POOLED_JOB_DIR = "/chainsail-job"
 
     def __init__(
         self,
@@ -90,7 +292,7 @@ class K8sNode(Node):
         is_controller: bool,
         config: GeneralNodeConfig,
         node_config: K8sNodeConfig,
-        spec: JobSpec,
+        spec: Optional[JobSpec],
         representation: Optional[TblNodes] = None,
         status: Optional[NodeStatus] = NodeStatus.INITIALIZED,
         # If creating from existing resources, can specify the k8s objects
@@ -98,6 +300,9 @@ class K8sNode(Node):
         service: Optional[V1Service] = None,
         configmap: Optional[V1ConfigMap] = None,
         address: Optional[str] = None,
+        pooled: bool = False,
+        api: Optional[kub.client.CoreV1Api] = None,
+        dependency_cache: Optional[DependencyCache] = None,
     ):
         # Names
         self._name = name
@@ -114,11 +319,23 @@ class K8sNode(Node):
         self.spec = spec
         self._status = status
         self._address = address
-        self.api = node_config.create_node_driver()
-
-    def _user_install_script(self) -> str:
-        install_commands = "\n".join([d.installation_script for d in self.spec.dependencies])
-        script = DEP_INSTALL_TEMPLATE.format(dep_install_commands=install_commands)
+        # Pooled pods are created without a job spec. Their job configmap is
+        # mounted as a directory such that it can be updated once the pod is
+        # bound to a job.
+        self._pooled = pooled
+        self.api = api if api is not None else node_config.create_node_driver()
+        self._dependency_cache = dependency_cache
+
+    def _user_install_script(self, job_rep: Optional[TblJobs] = None) -> str:
+        if job_rep is None and self._representation is not None:
+            job_rep = self._representation.job
+        commands = install_commands(
+            self.spec.dependencies,
+            cache=self._dependency_cache,
+            scope=job_rep.user_id if job_rep is not None else None,
+            environment=self._config.user_code_image,
+        )
+        script = DEP_INSTALL_TEMPLATE.format(dep_install_commands=commands)
         return script
 
     def _get_logs(self) -> str:
@@ -159,16 +376,24 @@ class K8sNode(Node):
         exist = self._pod or self._configmap
         return exist
 
-    def _create_configmap(self) -> V1ConfigMap:
-        install_script_src = self._user_install_script()
+    def _create_configmap(self, job_rep: Optional[TblJobs] = None) -> V1ConfigMap:
+        if self.spec is None:
+            # The user code container of a pooled pod waits for the probability
+            # definition URL to show up
+            data = {}
+        else:
+            data = {
+                self._CM_FILE_USERCODE: self._user_install_script(job_rep),
+                self._CM_FILE_JOBSPEC: JobSpecSchema().dumps(self.spec),
+                self._CM_FILE_PROB_URL: self.spec.probability_definition,
+            }
         configmap = kub.client.V1ConfigMap(
             api_version="v1",
             kind="ConfigMap",
-            metadata=kub.client.V1ObjectMeta(name=self._name_cm, labels={"app": "rex"}),
-            data={
-                self._CM_FILE_USERCODE: install_script_src,
-                self._CM_FILE_JOBSPEC: JobSpecSchema().dumps(self.spec),
-            },
+            metadata=kub.client.V1ObjectMeta(
+                name=self._name_cm, labels={"app": "rex", "node_name": self._name}
+            ),
+            data=data,
         )
         return configmap
 
@@ -180,45 +405,84 @@ class K8sNode(Node):
         httpstan_container = kub.client.V1Container(
             name="httpstan",
             image=self._config.httpstan_image,
-            env=[kub.client.V1EnvVar(name="HTTPSTAN_PORT", value="8082")],
-            image_pull_policy=self._node_config.image_pull_policy,
-        )
-        # User code container
-        install_script_target = os.path.join("/chainsail", self._CM_FILE_USERCODE)
-        user_code_container = kub.client.V1Container(
-            name="user-code",
-            image=self._config.user_code_image,
-            image_pull_policy=self._node_config.image_pull_policy,
-            args=[
-                "python",
-                "/app/app/user_code_server/chainsail/user_code_server/__init__.py",
-            ],
-            ports=[kub.client.V1ContainerPort(container_port=50052)],
             env=[
-                kub.client.V1EnvVar(name="USER_PROB_URL", value=self.spec.probability_definition),
-                kub.client.V1EnvVar(name="USER_INSTALL_SCRIPT", value=install_script_target),
-                kub.client.V1EnvVar(name="USER_CODE_SERVER_PORT", value="50052"),
+                kub.client.V1EnvVar(name="HTTPSTAN_PORT", value="8082"),
+                # Compiled models are shared through the storage backend
                 kub.client.V1EnvVar(
-                    name="REMOTE_LOGGING_CONFIG_PATH",
-                    value="/chainsail/remote_logging.yaml",
+                    name="HTTPSTAN_STORAGE_CONFIG", value="/chainsail/storage.yaml"
                 ),
             ],
+            image_pull_policy=self._node_config.image_pull_policy,
             volume_mounts=[
                 kub.client.V1VolumeMount(
                     name="config-volume",
-                    mount_path="/chainsail/remote_logging.yaml",
-                    sub_path="remote_logging.yaml",
+                    mount_path="/chainsail/storage.yaml",
+                    sub_path="storage.yaml",
                 ),
+            ],
+        )
+        # User code container
+        user_code_env = [
+            kub.client.V1EnvVar(name="USER_CODE_SERVER_PORT", value="50052"),
+            kub.client.V1EnvVar(
+                name="REMOTE_LOGGING_CONFIG_PATH",
+                value="/chainsail/remote_logging.yaml",
+            ),
+        ]
+        user_code_mounts = [
+            kub.client.V1VolumeMount(
+                name="config-volume",
+                mount_path="/chainsail/remote_logging.yaml",
+                sub_path="remote_logging.yaml",
+            ),
+        ]
+        if self._pooled:
+            # Configmap updates are not propagated to subPath mounts
+            user_code_env.append(
+                kub.client.V1EnvVar(name="USER_JOB_CONFIG_DIR", value=self._POOLED_JOB_DIR)
+            )
+            user_code_mounts.append(
+                kub.client.V1VolumeMount(name="job-volume", mount_path=self._POOLED_JOB_DIR)
+            )
+            jobspec_mount = kub.client.V1VolumeMount(
+                name="job-volume", mount_path="/chainsail-jobspec"
+            )
+        else:
+            install_script_target = os.path.join("/chainsail", self._CM_FILE_USERCODE)
+            user_code_env += [
+                kub.client.V1EnvVar(name="USER_PROB_URL", value=self.spec.probability_definition),
+                kub.client.V1EnvVar(name="USER_INSTALL_SCRIPT", value=install_script_target),
+            ]
+            user_code_mounts.append(
                 kub.client.V1VolumeMount(
                     name="job-volume",
                     mount_path=install_script_target,
                     sub_path=self._CM_FILE_USERCODE,
-                ),
+                )
+            )
+            jobspec_mount = kub.client.V1VolumeMount(
+                name="job-volume",
+                mount_path=f"/chainsail-jobspec/{self._CM_FILE_JOBSPEC}",
+                sub_path=self._CM_FILE_JOBSPEC,
+            )
+        user_code_container = kub.client.V1Container(
+            name="user-code",
+            image=self._config.user_code_image,
+            image_pull_policy=self._node_config.image_pull_policy,
+            args=[
+                "python",
+                "/app/app/user_code_server/chainsail/user_code_server/__init__.py",
             ],
+            ports=[kub.client.V1ContainerPort(container_port=50052)],
+            env=user_code_env,
+            volume_mounts=user_code_mounts,
         )
         # Worker container
         container_cmd = [self._config.cmd] + self._config.args
-        container_cmd = [arg.format(job_id=self.representation.job.id) for arg in container_cmd]
+        # Pooled pods do not belong to a job yet, hence their commands must
+        # not depend on it
+        job_id = self.representation.job.id if self.representation.job else None
+        container_cmd = [arg.format(job_id=job_id) for arg in container_cmd]
         # this startup probe checks the state of the gRPC server
         if self._is_controller:
             startup_probe = kub.client.V1Probe(
@@ -243,11 +507,7 @@ class K8sNode(Node):
             volume_mounts=[
                 kub.client.V1VolumeMount(name="config-volume", mount_path="/chainsail"),
                 kub.client.V1VolumeMount(name="ssh-volume", mount_path="/root/.ssh"),
-                kub.client.V1VolumeMount(
-                    name="job-volume",
-                    mount_path=f"/chainsail-jobspec/{self._CM_FILE_JOBSPEC}",
-                    sub_path=self._CM_FILE_JOBSPEC,
-                ),
+                jobspec_mount,
             ],
             resources=kub.client.V1ResourceRequirements(
                 requests={
@@ -298,7 +558,7 @@ class K8sNode(Node):
         )
         # TODO: Expose distinct ports for controller / worker nodes
         service = V1Service(
-            metadata=V1ObjectMeta(name=self._name),
+            metadata=V1ObjectMeta(name=self._name, labels={"node_name": self._name}),
             spec=V1ServiceSpec(
                 selector={"node_name": self._name},
                 ports=[
@@ -375,13 +635,14 @@ class K8sNode(Node):
         logger.info("Deleting pod...")
         try:
             if self._pod:
-                self.api.delete_namespaced_pod(name=self._name, namespace=K8S_NAMESPACE)
+                _delete_if_exists(self.api.delete_namespaced_pod, self._name)
                 self._pod = None
             if self._configmap:
-                self.api.delete_namespaced_config_map(name=self._name_cm, namespace=K8S_NAMESPACE)
+                _delete_if_exists(self.api.delete_namespaced_config_map, self._name_cm)
                 self._configmap = None
             if self._service:
-                self.api.delete_namespaced_service(name=self._name, namespace=K8S_NAMESPACE)
+                _delete_if_exists(self.api.delete_namespaced_service, self._name)
+                self._service = None
             self._status = NodeStatus.EXITED
             deleted = True
         except ApiException as e:
@@ -391,6 +652,62 @@ class K8sNode(Node):
         self.sync_representation()
         return deleted
 
+    @classmethod
+    def delete_many(cls, nodes: List["K8sNode"], max_threads: int, job_id=None) -> List[Node]:
+        # The pods and configmaps of all nodes are deleted with a single request
+        # each. Services can only be deleted one by one, which is done concurrently
+        # by deleting the nodes which still have resources left.
+        to_delete = [n for n in nodes if n._pod or n._configmap]
+        if to_delete:
+            api = to_delete[0].api
+            try:
+                for i in range(0, len(to_delete), MAX_NODES_PER_LISTING):
+                    batch = to_delete[i : i + MAX_NODES_PER_LISTING]
+                    selector = _node_name_selector([n.name for n in batch])
+                    api.delete_collection_namespaced_pod(
+                        namespace=K8S_NAMESPACE, label_selector=selector
+                    )
+                    # Resources are forgotten as soon as they were deleted, such
+                    # that a later failure does not delete them one by one again
+                    for node in batch:
+                        node._pod = None
+                    api.delete_collection_namespaced_config_map(
+                        namespace=K8S_NAMESPACE, label_selector=selector
+                    )
+                    for node in batch:
+                        # Configmaps which were created before they were labelled
+                        # with their node's name are not matched by the selector
+                        if node._configmap is not None:
+                            labels = node._configmap.metadata.labels or {}
+                            if labels.get("node_name") == node.name:
+                                node._configmap = None
+            except ApiException as e:
+                logger.warning(f"Failed to delete pods in bulk, deleting them one by one: {e}")
+        return delete_nodes(nodes, max_threads, job_id)
+
+    def bind(self, spec: JobSpec, job_rep: Optional[TblJobs] = None) -> None:
+        if not self._pooled:
+            raise NodeError(f"Attempted to bind pod {self._name} which is not in the warm pool")
+        self.refresh_status()
+        if self._status != NodeStatus.RUNNING:
+            raise NodeError(f"Attempted to bind pod {self._name} which is not running")
+        logger.info(f"Binding pooled pod {self._name} to job...")
+        self.spec = spec
+        configmap = self._create_configmap(job_rep)
+        try:
+            self.api.replace_namespaced_config_map(
+                name=self._name_cm, body=configmap, namespace=K8S_NAMESPACE
+            )
+        except ApiException as e:
+            raise NodeError(f"Failed to update configmap of pod {self._name}") from e
+        self._configmap = configmap
+        if self._representation:
+            self._representation.in_pool = False
+            self._representation.in_use = True
+            if job_rep:
+                job_rep.nodes.append(self._representation)
+        self.sync_representation()
+
     @property
     def name(self):
         return self._name
@@ -432,31 +749,22 @@ class K8sNode(Node):
     def status(self):
         return self._status
 
-    def refresh_status(self):
-        # See https://kubernetes.io/docs/concepts/workloads/pods/pod-lifecycle/
+    def refresh_status(self, pod: Optional[V1Pod] = None):
+        """Updates the node's status.
+
+        Args:
+            pod: An up-to-date state of the pod, e.g. as reported by a watch.
+                If not given, the pod is read from the API.
+        """
         if not self._pod:
             # TODO: Can we remove this status update here?
             self._status = NodeStatus.INITIALIZED
             return
         if self.status == NodeStatus.FAILED:
             return
-        pod = self._read_pod()
-        phase = pod.status.phase
-        ctrs_statuses = pod.status.container_statuses
-        if ctrs_statuses:
-            ctrs_started = all([ctr.started for ctr in ctrs_statuses])
-        else:
-            ctrs_started = False
-        if phase == "Pending" or (phase == "Running" and not ctrs_started):
-            self._status = NodeStatus.CREATING
-        elif phase == "Running" and ctrs_started:
-            self._status = NodeStatus.RUNNING
-        elif phase == "Succeeded":
-            self._status = NodeStatus.EXITED
-        elif phase == "Failed":
-            self._status = NodeStatus.FAILED
-        elif phase == "Unknown":
-            self._status = NodeStatus.UNKNOWN
+        if pod is None:
+            pod = self._read_pod()
+        self._status = pod_status(pod)
 
     @classmethod
     def from_representation(
@@ -465,15 +773,33 @@ class K8sNode(Node):
         node_rep: TblNodes,
         scheduler_config: SchedulerConfig,
         is_controller=False,
+        api: Optional[kub.client.CoreV1Api] = None,
+        pod: Optional[V1Pod] = None,
+        service: Optional[V1Service] = None,
+        configmap: Optional[V1ConfigMap] = None,
     ) -> "Node":
+        """Reconstructs a node from its database representation.
+
+        Args:
+            spec: The job's specification
+            node_rep: The node's database representation
+            scheduler_config: The scheduler configuration
+            is_controller: Whether the node is a job's controller
+            api: The Kubernetes API client to use. A new one is created if None.
+            pod: The node's pod. It is read from the API if None.
+            service: The node's service. It is read from the API if None.
+            configmap: The node's configmap. It is read from the API if None.
+        """
         node_config: K8sNodeConfig = scheduler_config.node_config
+        if api is None:
+            api = node_config.create_node_driver()
         if is_controller:
             config = scheduler_config.controller
         else:
             config = scheduler_config.worker
         # If the node has only been initialized, no actual compute resource
         # has been created yet
-        if node_rep.status == NodeStatus.INITIALIZED:
+        if _status_of(node_rep) == NodeStatus.INITIALIZED:
             name = node_rep.name
             return cls(
                 name=name,
@@ -482,17 +808,22 @@ class K8sNode(Node):
                 node_config=node_config,
                 spec=spec,
                 representation=node_rep,
+                pooled=bool(node_rep.in_pool),
+                api=api,
+                dependency_cache=DependencyCache.from_config(scheduler_config),
             )
         # Otherwise we can look up the compute resources
         else:
             try:
-                api = node_config.create_node_driver()
                 name = node_rep.name
-                pod = api.read_namespaced_pod(name=name, namespace=K8S_NAMESPACE)
-                service = api.read_namespaced_service(name=name, namespace=K8S_NAMESPACE)
-                configmap = api.read_namespaced_config_map(
-                    name=cls._NAME_CM.format(name), namespace=K8S_NAMESPACE
-                )
+                if pod is None:
+                    pod = api.read_namespaced_pod(name=name, namespace=K8S_NAMESPACE)
+                if service is None:
+                    service = api.read_namespaced_service(name=name, namespace=K8S_NAMESPACE)
+                if configmap is None:
+                    configmap = api.read_namespaced_config_map(
+                        name=cls._NAME_CM.format(name), namespace=K8S_NAMESPACE
+                    )
             except ApiException as e:
                 raise ObjectConstructionError(
                     f"Failed to find an existing pod (or one of its dependency configmap) with name "
@@ -505,13 +836,54 @@ class K8sNode(Node):
                 node_config=node_config,
                 spec=spec,
                 representation=node_rep,
-                status=NodeStatus(node_rep.status),
+                status=_status_of(node_rep),
                 pod=pod,
                 service=service,
                 configmap=configmap,
                 address=service_fqdn(pod.metadata.name),
+                pooled=bool(node_rep.in_pool),
+                api=api,
+                dependency_cache=DependencyCache.from_config(scheduler_config),
             )
 
+    @classmethod
+    def from_representations(
+        cls,
+        spec: JobSpec,
+        node_reps: List[TblNodes],
+        scheduler_config: SchedulerConfig,
+    ) -> List[Optional["Node"]]:
+        # The pods, services and configmaps of all nodes are each listed at once
+        # instead of being read one by one
+        api = scheduler_config.node_config.create_node_driver()
+        names = [r.name for r in node_reps if _status_of(r) != NodeStatus.INITIALIZED]
+        pods = list_by_node_name(api.list_namespaced_pod, names)
+        services = list_by_node_name(api.list_namespaced_service, names)
+        configmaps = list_by_node_name(api.list_namespaced_config_map, names)
+        created = set(names)
+        nodes = []
+        for node_rep in node_reps:
+            if node_rep.name in created and node_rep.name not in pods:
+                nodes.append(None)
+                continue
+            try:
+                # Services and configmaps which were created before they were
+                # labelled with their node's name are still read one by one
+                node = cls.from_representation(
+                    spec,
+                    node_rep,
+                    scheduler_config,
+                    is_controller=not node_rep.is_worker,
+                    api=api,
+                    pod=pods.get(node_rep.name),
+                    service=services.get(node_rep.name),
+                    configmap=configmaps.get(node_rep.name),
+                )
+            except ObjectConstructionError:
+                node = None
+            nodes.append(node)
+        return nodes
+
     @classmethod
     def from_config(
         cls,
@@ -539,7 +911,24 @@ class K8sNode(Node):
             node_config=node_config,
             spec=spec,
             representation=node_rep,
+            dependency_cache=DependencyCache.from_config(scheduler_config),
         )
         # Sync over the various fields
         node.sync_representation()
         return node
+
+    @classmethod
+    def for_pool(cls, name: str, scheduler_config: SchedulerConfig) -> "Node":
+        node_rep = TblNodes(in_use=False, is_worker=True, in_pool=True)
+        node = cls(
+            name=name,
+            is_controller=False,
+            config=scheduler_config.worker,
+            node_config=scheduler_config.node_config,
+            spec=None,
+            representation=node_rep,
+            pooled=True,
+            dependency_cache=DependencyCache.from_config(scheduler_config),
+        )
+        node.sync_representation()
+        return node
@@ -1,3 +1,4 @@
+import threading
 from unittest.mock import Mock, patch
 
 import pytest
@@ -65,6 +66,165 @@ def test_k8s_node_from_representation(mock_driver, mock_scheduler_config):
     assert node.representation
 
 
+@patch("chainsail.scheduler.config.K8sNodeConfig.create_node_driver")
+def test_k8s_nodes_from_representations_list_resources_at_once(mock_driver, mock_scheduler_config):
+    from chainsail.common.spec import JobSpec
+    from chainsail.scheduler.db import TblNodes
+    from chainsail.scheduler.nodes.base import NodeStatus, NodeType
+    from chainsail.scheduler.nodes.k8s_pod import K8sNode
+
+    def mk_resource(node_name):
+        resource = Mock()
+        resource.metadata.name = node_name
+        resource.metadata.labels = {"node_name": node_name}
+        return resource
+
+    api = mock_driver.return_value
+    api.list_namespaced_pod.return_value.items = [mk_resource(n) for n in ("pod-1", "pod-2")]
+    # The service of pod-2 predates service labels
+    api.list_namespaced_service.return_value.items = [mk_resource("pod-1")]
+    api.list_namespaced_config_map.return_value.items = [
+        mk_resource(n) for n in ("pod-1", "pod-2")
+    ]
+    node_reps = [
+        TblNodes(
+            name=name,
+            node_type=NodeType.KUBERNETES_POD,
+            status=status.value,
+            is_worker=name != "pod-1",
+        )
+        for name, status in (
+            ("pod-1", NodeStatus.RUNNING),
+            ("pod-2", NodeStatus.RUNNING),
+            ("pod-3", NodeStatus.RUNNING),
+            ("pod-4", NodeStatus.INITIALIZED),
+        )
+    ]
+
+    nodes = K8sNode.from_representations(
+        JobSpec("gs://my-bucket/scripts"), node_reps, mock_scheduler_config
+    )
+
+    assert [n and n.name for n in nodes] == ["pod-1", "pod-2", None, "pod-4"]
+    api.list_namespaced_pod.assert_called_once_with(
+        namespace="default", label_selector="node_name in (pod-1,pod-2,pod-3)"
+    )
+    api.read_namespaced_pod.assert_not_called()
+    api.read_namespaced_config_map.assert_not_called()
+    api.read_namespaced_service.assert_called_once_with(name="pod-2", namespace="default")
+    assert mock_driver.call_count == 1
+
+
+@patch("chainsail.scheduler.config.K8sNodeConfig.create_node_driver")
+def test_k8s_nodes_from_representations_without_status(mock_driver, mock_scheduler_config):
+    from chainsail.common.spec import JobSpec
+    from chainsail.scheduler.db import TblNodes
+    from chainsail.scheduler.nodes.base import NodeStatus, NodeType
+    from chainsail.scheduler.nodes.k8s_pod import K8sNode
+
+    resource = Mock()
+    resource.metadata.name = "pod-1"
+    resource.metadata.labels = {"node_name": "pod-1"}
+    api = mock_driver.return_value
+    for list_fn in (
+        api.list_namespaced_pod,
+        api.list_namespaced_service,
+        api.list_namespaced_config_map,
+    ):
+        list_fn.return_value.items = [resource]
+    node_reps = [
+        TblNodes(name=name, node_type=NodeType.KUBERNETES_POD, status=None, is_worker=True)
+        for name in ("pod-1", "pod-2")
+    ]
+
+    nodes = K8sNode.from_representations(
+        JobSpec("gs://my-bucket/scripts"), node_reps, mock_scheduler_config
+    )
+
+    # Nodes without a status are looked up like created ones
+    assert nodes[0].name == "pod-1"
+    assert nodes[0].status == NodeStatus.UNKNOWN
+    assert nodes[1] is None
+    api.list_namespaced_pod.assert_called_once_with(
+        namespace="default", label_selector="node_name in (pod-1,pod-2)"
+    )
+
+
+def mk_running_k8s_nodes(scheduler_config, names):
+    from chainsail.scheduler.nodes.k8s_pod import K8sNode
+
+    nodes = []
+    for name in names:
+        node = K8sNode(
+            name=name,
+            is_controller=False,
+            config=scheduler_config.worker,
+            node_config=scheduler_config.node_config,
+            spec=None,
+            status=NodeStatus.RUNNING,
+            pod=Mock(),
+            service=Mock(),
+            configmap=Mock(),
+        )
+        node._configmap.metadata.labels = {"app": "rex", "node_name": name}
+        nodes.append(node)
+    return nodes
+
+
+@patch("chainsail.scheduler.config.K8sNodeConfig.create_node_driver")
+def test_k8s_nodes_delete_many(mock_driver, mock_scheduler_config):
+    from chainsail.scheduler.nodes.k8s_pod import K8sNode
+
+    api = mock_driver.return_value
+    nodes = mk_running_k8s_nodes(mock_scheduler_config, ["pod-1", "pod-2"])
+    # The configmap of pod-2 predates configmap labels
+    nodes[1]._configmap.metadata.labels = {"app": "rex"}
+
+    assert K8sNode.delete_many(nodes, max_threads=2) == []
+
+    api.delete_collection_namespaced_pod.assert_called_once_with(
+        namespace="default", label_selector="node_name in (pod-1,pod-2)"
+    )
+    api.delete_namespaced_pod.assert_not_called()
+    api.delete_namespaced_config_map.assert_called_once_with(
+        name="configmap-pod-2", namespace="default"
+    )
+    assert api.delete_namespaced_service.call_count == 2
+    assert all(n.status == NodeStatus.EXITED for n in nodes)
+
+
+@patch("chainsail.scheduler.config.K8sNodeConfig.create_node_driver")
+def test_k8s_nodes_delete_many_partial_failure(mock_driver, mock_scheduler_config):
+    from chainsail.scheduler.nodes.k8s_pod import K8sNode
+    from kubernetes.client.rest import ApiException
+
+    api = mock_driver.return_value
+    api.delete_collection_namespaced_config_map.side_effect = ApiException(status=500)
+    nodes = mk_running_k8s_nodes(mock_scheduler_config, ["pod-1", "pod-2"])
+
+    assert K8sNode.delete_many(nodes, max_threads=2) == []
+
+    # The pods which were deleted in bulk are not deleted again
+    api.delete_namespaced_pod.assert_not_called()
+    assert api.delete_namespaced_config_map.call_count == 2
+    assert api.delete_namespaced_service.call_count == 2
+    assert all(n.status == NodeStatus.EXITED for n in nodes)
+
+
+@patch("chainsail.scheduler.config.K8sNodeConfig.create_node_driver")
+def test_k8s_node_delete_already_deleted_resources(mock_driver, mock_scheduler_config):
+    from kubernetes.client.rest import ApiException
+
+    api = mock_driver.return_value
+    api.delete_namespaced_pod.side_effect = ApiException(status=404)
+    (node,) = mk_running_k8s_nodes(mock_scheduler_config, ["pod-1"])
+
+    assert node.delete()
+    api.delete_namespaced_config_map.assert_called_once()
+    api.delete_namespaced_service.assert_called_once()
+    assert node.status == NodeStatus.EXITED
+
+
 @patch("chainsail.scheduler.config.K8sNodeConfig.create_node_driver")
 def test_k8s_node_from_config_with_job(mock_driver, mock_scheduler_config):
     from chainsail.common.spec import JobSpec
@@ -154,3 +314,119 @@ def test_k8s_node_lifecycle(mock_driver, mock_scheduler_config):
         NodeStatus.RESTARTING,
         NodeStatus.EXITED,
     ]
+
+
+def mk_pod(name, phase, started=None, resource_version="1"):
+    from kubernetes.client import V1ContainerStatus, V1ObjectMeta, V1Pod, V1PodStatus
+
+    ctr_statuses = None
+    if started is not None:
+        ctr_statuses = [
+            V1ContainerStatus(
+                name="rex", image="", image_id="", ready=started, restart_count=0, started=started
+            )
+        ]
+    return V1Pod(
+        metadata=V1ObjectMeta(name=name, resource_version=resource_version),
+        status=V1PodStatus(phase=phase, container_statuses=ctr_statuses),
+    )
+
+
+def test_pod_status():
+    from chainsail.scheduler.nodes.k8s_pod import pod_status
+
+    assert pod_status(mk_pod("a", "Pending")) == NodeStatus.CREATING
+    assert pod_status(mk_pod("a", "Running", started=False)) == NodeStatus.CREATING
+    assert pod_status(mk_pod("a", "Running", started=True)) == NodeStatus.RUNNING
+    assert pod_status(mk_pod("a", "Failed")) == NodeStatus.FAILED
+
+
+def test_pod_status_tracker():
+    from chainsail.scheduler.nodes.k8s_pod import PodStatusTracker
+
+    events = [
+        {"type": "ADDED", "object": mk_pod("other-pod", "Pending", resource_version="1")},
+        {"type": "ADDED", "object": mk_pod("new-node", "Pending", resource_version="2")},
+        {"type": "MODIFIED", "object": mk_pod("new-node", "Running", True, "3")},
+    ]
+    api = Mock()
+    with patch("chainsail.scheduler.nodes.k8s_pod.kub.watch.Watch") as mock_watch:
+        # A single watch stream, afterwards the watch blocks
+        mock_watch.return_value.stream.side_effect = [
+            iter(events),
+            iter(threading.Event().wait, 1),
+        ]
+        tracker = PodStatusTracker(api)
+        seen_version = None
+        while True:
+            pod = tracker.wait_for_update("new-node", seen_version, timeout=5)
+            assert pod is not None
+            seen_version = pod.metadata.resource_version
+            if seen_version == "3":
+                break
+        assert tracker.wait_for_update("new-node", seen_version, timeout=0.1) is None
+    # All pods are watched using a single call
+    stream_kwargs = mock_watch.return_value.stream.call_args_list[0].kwargs
+    assert stream_kwargs["label_selector"] == "app=rex"
+
+
+@patch("chainsail.scheduler.config.K8sNodeConfig.create_node_driver")
+def test_monitor_deployment_uses_tracker(mock_driver, mock_scheduler_config):
+    from chainsail.scheduler.nodes.k8s_pod import K8sNode, monitor_deployment
+
+    node = K8sNode(
+        name="new-node",
+        is_controller=False,
+        config=mock_scheduler_config.worker,
+        node_config=mock_scheduler_config.node_config,
+        spec=JobSpec("gs://my-bucket/scripts"),
+        pod=mk_pod("new-node", "Pending"),
+    )
+    tracker = Mock()
+    tracker.wait_for_update.side_effect = [
+        mk_pod("new-node", "Pending", resource_version="1"),
+        None,
+        mk_pod("new-node", "Running", True, resource_version="2"),
+    ]
+    node.api.read_namespaced_pod.return_value = mk_pod("new-node", "Pending")
+    with patch(
+        "chainsail.scheduler.nodes.k8s_pod.PodStatusTracker.for_namespace", return_value=tracker
+    ):
+        assert monitor_deployment(node)
+    # The pod was only read explicitly when the watch did not report anything
+    node.api.read_namespaced_pod.assert_called_once()
+    assert node.status == NodeStatus.RUNNING
+
+
+@patch("chainsail.scheduler.config.K8sNodeConfig.create_node_driver")
+def test_k8s_node_pooled_lifecycle(mock_driver, mock_scheduler_config):
+    from chainsail.scheduler.db import TblJobs
+    from chainsail.scheduler.nodes.k8s_pod import K8sNode
+
+    node = K8sNode.for_pool("pooled-node", mock_scheduler_config)
+    assert node.representation.in_pool
+    assert node.representation.job is None
+
+    with patch("chainsail.scheduler.nodes.k8s_pod.monitor_deployment"):
+        is_created, _ = node.create()
+    assert is_created
+    # The job configuration is mounted as a directory such that it can be
+    # updated once the pod is bound to a job
+    pod_body = node.api.create_namespaced_pod.call_args.kwargs["body"]
+    user_code = pod_body.spec.containers[1]
+    assert "USER_JOB_CONFIG_DIR" in [env.name for env in user_code.env]
+    assert not any(
+        [mount.sub_path for mount in user_code.volume_mounts if mount.name == "job-volume"]
+    )
+    cm_body = node.api.create_namespaced_config_map.call_args.kwargs["body"]
+    assert not cm_body.data
+
+    node.api.read_namespaced_pod.return_value = mk_pod("pooled-node", "Running", started=True)
+    job_rep = TblJobs(id=3)
+    node.bind(JobSpec("gs://my-bucket/scripts"), job_rep)
+
+    cm_body = node.api.replace_namespaced_config_map.call_args.kwargs["body"]
+    assert cm_body.data["prob_url"] == "gs://my-bucket/scripts"
+    assert not node.representation.in_pool
+    assert node.representation.in_use
+    assert node.representation.job.id == 3
@@ -45,6 +45,16 @@ def mock_scheduler_config():
     return scheduler_config
 
 
+@pytest.fixture(autouse=True)
+def clear_listing_cache():
+    from chainsail.scheduler.nodes.vm import clear_listing_cache
+
+    # The dummy drivers of different tests share their cached listings
+    clear_listing_cache()
+    yield
+    clear_listing_cache()
+
+
 def test_vm_node_from_representation(mock_scheduler_config):
     from chainsail.common.spec import JobSpec
     from chainsail.scheduler.db import TblNodes
@@ -69,6 +79,82 @@ def test_vm_node_from_representation(mock_scheduler_config):
     assert node.representation
 
 
+def test_vm_nodes_from_representations_list_nodes_once(mock_scheduler_config):
+    from chainsail.common.spec import JobSpec
+    from chainsail.scheduler.db import TblNodes
+    from chainsail.scheduler.nodes.base import NodeStatus, NodeType
+    from chainsail.scheduler.nodes.vm import VMNode
+
+    job_spec = JobSpec("gs://my-bucket/scripts")
+    node_reps = [
+        TblNodes(
+            id=i,
+            job_id=1,
+            name=name,
+            node_type=NodeType.LIBCLOUD_VM,
+            entrypoint="echo 'hello world'",
+            status=NodeStatus.RUNNING,
+            is_worker=True,
+        )
+        for i, name in enumerate(["dummy-1", "dummy-2", "does not exist in driver"])
+    ]
+    with patch.object(
+        DeployableDummyNodeDriver,
+        "list_nodes",
+        autospec=True,
+        side_effect=DeployableDummyNodeDriver.list_nodes,
+    ) as list_nodes:
+        nodes = VMNode.from_representations(job_spec, node_reps, mock_scheduler_config)
+        assert list_nodes.call_count == 1
+        # Single nodes are looked up in the cached listing
+        VMNode.from_representation(job_spec, node_reps[0], mock_scheduler_config)
+        assert list_nodes.call_count == 1
+    assert [n.name for n in nodes[:2]] == ["dummy-1", "dummy-2"]
+    assert nodes[2] is None
+
+
+def test_vm_node_image_and_size_lookups_are_cached(mock_scheduler_config):
+    from chainsail.scheduler.nodes.vm import get_image, lookup_size
+
+    with patch.object(
+        DeployableDummyNodeDriver,
+        "list_images",
+        autospec=True,
+        side_effect=DeployableDummyNodeDriver.list_images,
+    ) as list_images:
+        for _ in range(2):
+            driver = mock_scheduler_config.node_config.create_node_driver()
+            assert get_image(driver, "1").id == "1"
+            assert lookup_size(driver, "Small").name == "Small"
+        list_images.assert_called_once()
+
+
+def test_driver_key_distinguishes_regions_projects_and_zones():
+    from libcloud.compute.base import NodeLocation
+    from libcloud.compute.drivers.ec2 import EC2NodeDriver
+    from chainsail.scheduler.nodes.vm import _driver_key
+
+    def ec2_key(region):
+        return _driver_key(EC2NodeDriver("key", "secret", region=region))
+
+    assert ec2_key("eu-west-1") == ec2_key("eu-west-1")
+    assert ec2_key("eu-west-1") != ec2_key("us-east-1")
+
+    class GCEDriver:
+        # Stands in for a GCE driver, which needs credentials to be created
+        def __init__(self, project, zone):
+            self.key = "sa@example.com"
+            self.project = project
+            self.zone = NodeLocation(zone, zone, "", None)
+
+    def gce_key(project, zone):
+        return _driver_key(GCEDriver(project, zone))
+
+    assert gce_key("p", "europe-west1-b") == gce_key("p", "europe-west1-b")
+    assert gce_key("p", "europe-west1-b") != gce_key("p", "europe-west1-c")
+    assert gce_key("p", "europe-west1-b") != gce_key("q", "europe-west1-b")
+
+
 def test_vm_node_from_config_with_job(mock_scheduler_config):
     from chainsail.common.spec import JobSpec
     from chainsail.scheduler.db import TblJobs, TblNodes
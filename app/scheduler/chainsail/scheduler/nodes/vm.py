@@ -2,7 +2,7 @@ import logging
 import os
 import traceback
 from tempfile import TemporaryDirectory
-from typing import Callable, Optional, Tuple
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
 
 from libcloud.compute.base import Node as LibcloudNode
 from libcloud.compute.base import NodeDriver, NodeImage, NodeSize
@@ -15,6 +15,7 @@ from libcloud.compute.deployment import (
 )
 from libcloud.compute.types import DeploymentException, NodeState
 from chainsail.common.spec import JobSpec, JobSpecSchema
+from chainsail.scheduler.cache import TTLCache
 from chainsail.scheduler.config import (
     GeneralNodeConfig,
     SchedulerConfig,
@@ -22,6 +23,7 @@ from chainsail.scheduler.config import (
     load_scheduler_config,
 )
 from chainsail.scheduler.db import TblJobs, TblNodes
+from chainsail.scheduler.deps import DependencyCache, install_commands
 from chainsail.scheduler.errors import (
     ConfigurationError,
     MissingNodeError,
@@ -66,6 +68,8 @@ set -ex
 
 docker run -d \
     -e "HTTPSTAN_PORT=8082" \
+    -e "HTTPSTAN_STORAGE_CONFIG=/chainsail/{storage_config}" \
+    -v {config_dir}/{storage_config}:/chainsail/{storage_config} \
     --network host \
     --log-driver=gcplogs \
     {httpstan_image}
@@ -118,13 +122,20 @@ def prepare_deployment(
     Returns:
         The combined deployment steps
     """
+    scheduler_config = load_scheduler_config()
     # Prepare installer script
-    install_commands = "\n".join([d.installation_script for d in vm_node.spec.dependencies])
+    job_rep = vm_node._representation.job if vm_node._representation else None
+    commands = install_commands(
+        vm_node.spec.dependencies,
+        cache=DependencyCache.from_config(scheduler_config),
+        scope=job_rep.user_id if job_rep is not None else None,
+        environment=vm_node._config.user_code_image,
+    )
     install_script_name = "install_job_deps.sh"
     install_script_src = os.path.join(staging_dir, install_script_name)
     install_script_target = os.path.join(install_dir, install_script_name)
     with open(install_script_src, "w") as f:
-        f.write(DEP_INSTALL_TEMPLATE.format(dep_install_commands=install_commands))
+        f.write(DEP_INSTALL_TEMPLATE.format(dep_install_commands=commands))
 
     # Prepare initial hostfile with known peers
     hosts = []
@@ -179,10 +190,10 @@ def prepare_deployment(
         cmd=container_cmd,
         user_code_image=vm_node._config.user_code_image,
         httpstan_image=vm_node._config.httpstan_image,
+        storage_config=os.path.basename(vm_node._vm_config.storage_config_path),
         user_code_cmd=user_code_cmd,
     )
 
-    scheduler_config = load_scheduler_config()
     steps = MultiStepDeployment(
         [
             # The very first thing to do is run the initialization script to ensure
@@ -244,12 +255,80 @@ def prepare_deployment(
     return steps
 
 
-# TODO: Add caching here
+# Images and sizes hardly ever change, but listing them takes several seconds
+# on most providers
+IMAGE_CACHE_TTL = 3600  # in seconds
+SIZE_CACHE_TTL = 3600  # in seconds
+# Node listings are refreshed whenever a node is not found in them, so they
+# only need to be fresh enough for the nodes' states
+NODE_LIST_CACHE_TTL = 30  # in seconds
+
+# Listings of the resources of each provider, shared by all drivers for it
+_listing_cache = TTLCache()
+
+
+# Attributes which select the resources a driver lists: the region of EC2
+# drivers and the project and zone of GCE drivers
+_DRIVER_SCOPE_ATTRIBUTES = ("region_name", "project", "zone")
+
+
+def _driver_key(driver: NodeDriver) -> Hashable:
+    # Drivers are created anew for each node, so they are identified by
+    # their provider, credentials and the part of the provider they list
+    scope = []
+    for attribute in _DRIVER_SCOPE_ATTRIBUTES:
+        value = getattr(driver, attribute, None)
+        # GCE zones are objects which are created anew for each driver
+        scope.append(getattr(value, "name", value))
+    return (type(driver), getattr(driver, "key", None), *scope)
+
+
+def _cached_listing(driver: NodeDriver, kind: str, ttl: float, refresh: bool = False) -> List:
+    """Lists the images, sizes or nodes of a driver, reusing recent listings
+
+    Args:
+        driver: The libcloud driver
+        kind: One of "images", "sizes" or "nodes"
+        ttl: Seconds for which the listing is reused
+        refresh: Whether to list the resources even if a listing is cached
+
+    Returns:
+        The listed resources
+    """
+    key = (_driver_key(driver), kind)
+    listing = None if refresh else _listing_cache.get(key)
+    if listing is None:
+        listing = getattr(driver, f"list_{kind}")()
+        _listing_cache.set(key, listing, ttl)
+    return listing
+
+
+def invalidate_node_listing(driver: NodeDriver) -> None:
+    """Drops the cached node listing of a driver, e.g. after creating or deleting a node"""
+    _listing_cache.invalidate((_driver_key(driver), "nodes"))
+
+
+def clear_listing_cache() -> None:
+    _listing_cache.clear()
+
+
+def list_nodes_by_name(driver: NodeDriver, refresh: bool = False) -> Dict[str, LibcloudNode]:
+    """Lists the nodes of a driver, reusing recent listings
+
+    Args:
+        driver: The libcloud driver
+        refresh: Whether to list the nodes even if a listing is cached
+
+    Returns:
+        The nodes keyed by their names
+    """
+    nodes = _cached_listing(driver, "nodes", NODE_LIST_CACHE_TTL, refresh=refresh)
+    return {n.name: n for n in nodes}
+
+
 def get_image(driver, image_id: str) -> NodeImage:
-    # Constructing the image directly since image lookups take so long on most providers
-    # return NodeImage(id=image_id, name="unknown", driver=driver)
     img = None
-    for i in driver.list_images():
+    for i in _cached_listing(driver, "images", IMAGE_CACHE_TTL):
         if i.id == image_id:
             img = i
             break
@@ -263,7 +342,7 @@ def get_image(driver, image_id: str) -> NodeImage:
 
 
 def lookup_size(driver, size_name: str) -> NodeSize:
-    size = [s for s in driver.list_sizes() if s.name == size_name]
+    size = [s for s in _cached_listing(driver, "sizes", SIZE_CACHE_TTL) if s.name == size_name]
     if not size:
         raise ConfigurationError(
             f"Failed to find node size with name '{size_name}' in driver "
@@ -369,6 +448,7 @@ class VMNode(Node):
                     wait_period=10,
                     **self._vm_config.libcloud_create_node_inputs,
                 )
+                invalidate_node_listing(self._driver)
                 for s in deployment_steps.steps:
                     # Ensure that scripts all exited successfully
                     _raise_for_exit_status(self._node, s)
@@ -411,6 +491,7 @@ class VMNode(Node):
             return True
         logger.info("Deleting node...")
         deleted = self._node.destroy()
+        invalidate_node_listing(self._driver)
         if deleted:
             # If the delete request was successful we can go ahead
             # and flag the node as exited.
@@ -484,9 +565,22 @@ class VMNode(Node):
         node_rep: TblNodes,
         scheduler_config: SchedulerConfig,
         is_controller=False,
+        driver: Optional[NodeDriver] = None,
+        libcloud_nodes: Optional[Dict[str, LibcloudNode]] = None,
     ) -> "Node":
-
-        driver: NodeDriver = scheduler_config.create_node_driver()
+        """Reconstructs a node from its database representation.
+
+        Args:
+            spec: The job's specification
+            node_rep: The node's database representation
+            scheduler_config: The scheduler configuration
+            is_controller: Whether the node is a job's controller
+            driver: The libcloud driver to use. A new one is created if None.
+            libcloud_nodes: A listing of the driver's nodes, keyed by name. A
+                cached listing is used if None.
+        """
+        if driver is None:
+            driver = scheduler_config.create_node_driver()
         node_config: VMNodeConfig = scheduler_config.node_config
         if is_controller:
             config = scheduler_config.controller
@@ -494,20 +588,24 @@ class VMNode(Node):
             config = scheduler_config.worker
         # If the node has only been initialized, no actual compute resource
         # has been created yet
-        if node_rep.status == NodeStatus.INITIALIZED:
+        if NodeStatus(node_rep.status) == NodeStatus.INITIALIZED:
             node = None
             image = get_image(driver, node_config.vm_image_id)
             size = lookup_size(driver, node_config.vm_size)
             name = node_rep.name
         # Otherwise we can look up the compute resource using the driver
         else:
-            node = [n for n in driver.list_nodes() if n.name == node_rep.name]
+            if libcloud_nodes is None:
+                libcloud_nodes = list_nodes_by_name(driver)
+                if node_rep.name not in libcloud_nodes:
+                    # The node might have been created after the listing was cached
+                    libcloud_nodes = list_nodes_by_name(driver, refresh=True)
+            node = libcloud_nodes.get(node_rep.name)
             if not node:
                 raise ObjectConstructionError(
                     f"Failed to find an existing node with name "
                     f"{node_rep.name} job: {node_rep.job_id}, node: {node_rep.id}"
                 )
-            node = node[0]
             size = node.size
             image = node.image
             name = node.name
@@ -525,6 +623,32 @@ class VMNode(Node):
             representation=node_rep,
         )
 
+    @classmethod
+    def from_representations(
+        cls,
+        spec: JobSpec,
+        node_reps: List[TblNodes],
+        scheduler_config: SchedulerConfig,
+    ) -> List[Optional["Node"]]:
+        # All nodes share a driver and a single, fresh listing of the provider's nodes
+        driver = scheduler_config.create_node_driver()
+        libcloud_nodes = list_nodes_by_name(driver, refresh=True)
+        nodes = []
+        for node_rep in node_reps:
+            try:
+                node = cls.from_representation(
+                    spec,
+                    node_rep,
+                    scheduler_config,
+                    is_controller=not node_rep.is_worker,
+                    driver=driver,
+                    libcloud_nodes=libcloud_nodes,
+                )
+            except ObjectConstructionError:
+                node = None
+            nodes.append(node)
+        return nodes
+
     @classmethod
     def from_config(
         cls,
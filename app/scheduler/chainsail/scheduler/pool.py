@@ -0,0 +1,159 @@
+"""
+Warm pool of generic worker nodes which are assigned to jobs on demand
+"""
+import logging
+from typing import Dict, List, Optional
+
+import shortuuid
+from sqlalchemy import text
+from chainsail.common.spec import JobSpec
+from chainsail.scheduler.config import SchedulerConfig
+from chainsail.scheduler.core import db
+from chainsail.scheduler.db import TblJobs, TblNodes
+from chainsail.scheduler.errors import NodeError, ObjectConstructionError
+from chainsail.scheduler.nodes.base import Node, NodeStatus, NodeType, create_nodes
+from chainsail.scheduler.nodes.registry import NODE_CLS_REGISTRY
+
+logger = logging.getLogger("chainsail.scheduler")
+
+# Statuses of pooled nodes which are (or will soon be) ready for use
+AVAILABLE_STATUSES = (NodeStatus.INITIALIZED, NodeStatus.CREATING, NodeStatus.RUNNING)
+
+# Key of the postgres advisory lock which serializes replenishments
+REPLENISH_LOCK_ID = 0x636861696E
+
+
+class WarmPool:
+    """
+    A pool of generic worker nodes which are created ahead of time.
+
+    Pooled nodes are stored in the nodes table with the `in_pool` flag set
+    and without a job. Jobs which are started or scaled up take running
+    nodes from the pool before creating new ones, such that they do not
+    have to wait for image pulls and the node's services to start. Once
+    assigned, a node belongs to its job and is torn down along with it.
+    """
+
+    def __init__(
+        self,
+        config: SchedulerConfig,
+        node_registry: Dict[NodeType, Node] = NODE_CLS_REGISTRY,
+    ):
+        self.config = config
+        self._node_cls = node_registry[config.node_type]
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.warm_pool_size > 0 and self._node_cls.SUPPORTS_POOLING
+
+    def _from_representation(self, node_rep: TblNodes) -> Node:
+        return self._node_cls.from_representation(None, node_rep, self.config)
+
+    def _discard(self, node_rep: TblNodes) -> None:
+        """Tears down a pooled node which can no longer be used"""
+        node_rep.in_pool = False
+        try:
+            node = self._from_representation(node_rep)
+        except ObjectConstructionError:
+            node_rep.status = NodeStatus.EXITED.value
+            return
+        if not node.delete():
+            logger.warning(f"Failed to delete unusable pooled node {node_rep.name}")
+
+    @staticmethod
+    def _lock_replenishment(session) -> None:
+        """
+        Blocks until no other replenishment is in progress.
+
+        The lock is held until the current transaction ends. Replenishments
+        can run in several Celery workers at once, so without it each would
+        count the same available nodes and create the missing ones again.
+        """
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(
+                text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": REPLENISH_LOCK_ID}
+            )
+
+    def replenish(self) -> int:
+        """
+        Creates nodes until the pool holds `warm_pool_size` nodes which are
+        running or being created. Pooled nodes which failed are torn down.
+        Concurrent replenishments are serialized from counting the available
+        nodes until the missing ones have been added.
+
+        Returns:
+            The number of nodes which were added to the pool
+        """
+        if not self.enabled:
+            return 0
+        self._lock_replenishment(db.session)
+        unusable = TblNodes.query.filter(
+            TblNodes.in_pool.is_(True),
+            TblNodes.status.notin_([s.value for s in AVAILABLE_STATUSES]),
+        ).all()
+        for node_rep in unusable:
+            self._discard(node_rep)
+        n_available = TblNodes.query.filter(
+            TblNodes.in_pool.is_(True),
+            TblNodes.status.in_([s.value for s in AVAILABLE_STATUSES]),
+        ).count()
+        n_missing = self.config.warm_pool_size - n_available
+        if n_missing <= 0:
+            db.session.commit()
+            return 0
+        logger.info(f"Adding {n_missing} nodes to the warm pool...")
+        nodes = [
+            self._node_cls.for_pool(f"node-{shortuuid.uuid()}".lower(), self.config)
+            for _ in range(n_missing)
+        ]
+        db.session.add_all([node.representation for node in nodes])
+        # Committing makes the new nodes visible to the next replenishment
+        # and releases the lock before the slow node creation
+        db.session.commit()
+        failure_logs = create_nodes(nodes, self.config.max_node_creation_threads)
+        db.session.commit()
+        if failure_logs:
+            logger.error(
+                f"Failed to start {len(failure_logs)} of {n_missing} pooled nodes. "
+                "Deployment logs: \n" + "\n".join(failure_logs)
+            )
+        return n_missing - len(failure_logs)
+
+    def acquire(self, n: int, spec: JobSpec, job_rep: Optional[TblJobs] = None) -> List[Node]:
+        """
+        Takes up to `n` running nodes out of the pool and binds them to a job.
+
+        The pooled rows are locked until the current transaction ends, so
+        concurrent jobs never get the same node.
+
+        Args:
+            n: The maximum number of nodes to take
+            spec: The specification of the job the nodes are assigned to
+            job_rep: The database representation of the job
+
+        Returns:
+            The nodes bound to the job. These can be less than `n` or none
+            at all if the pool is (partially) empty.
+        """
+        if not self.enabled or n <= 0:
+            return []
+        node_reps = (
+            TblNodes.query.filter(
+                TblNodes.in_pool.is_(True),
+                TblNodes.status == NodeStatus.RUNNING.value,
+            )
+            .with_for_update(skip_locked=True)
+            .limit(n)
+            .all()
+        )
+        nodes = []
+        for node_rep in node_reps:
+            try:
+                node = self._from_representation(node_rep)
+                node.bind(spec, job_rep)
+            except (ObjectConstructionError, NodeError) as e:
+                logger.warning(f"Unable to take node {node_rep.name} from the warm pool: {e}")
+                self._discard(node_rep)
+                continue
+            nodes.append(node)
+        return nodes
@@ -0,0 +1,53 @@
+"""
+Planning of job scaling operations
+"""
+from dataclasses import dataclass, field
+from typing import List
+
+from chainsail.scheduler.nodes.base import Node, NodeStatus
+
+
+@dataclass
+class ScalingPlan:
+    """The changes to a job's worker nodes required to reach a target size
+
+    Args:
+        keep: The nodes which remain assigned to the job
+        remove: The nodes which are to be removed from the job
+        n_add: The number of nodes which need to be added to the job
+    """
+
+    keep: List[Node] = field(default_factory=list)
+    remove: List[Node] = field(default_factory=list)
+    n_add: int = 0
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.remove and self.n_add == 0
+
+
+def plan_scaling(nodes: List[Node], n_replicas: int) -> ScalingPlan:
+    """Diffs a job's current worker nodes against the requested number of replicas.
+
+    Nodes which are not running are always replaced. Of the running nodes,
+    those which have been part of the job the longest are kept, since they
+    are the most likely to have finished installing the user's dependencies
+    and compiling their model. Consequently, nodes are removed in the reverse
+    order in which they were added.
+
+    Args:
+        nodes: The current worker nodes of the job, in the order in which
+            they were added to it. Jobs restored from the database load
+            their nodes ordered by ID, which preserves that order.
+        n_replicas: The requested number of worker nodes
+
+    Returns:
+        The scaling plan
+    """
+    if n_replicas < 0:
+        raise ValueError("Can only scale to >= 0 replicas")
+    healthy = [n for n in nodes if n.status == NodeStatus.RUNNING]
+    unhealthy = [n for n in nodes if n.status != NodeStatus.RUNNING]
+    keep = healthy[:n_replicas]
+    remove = unhealthy + healthy[n_replicas:]
+    return ScalingPlan(keep=keep, remove=remove, n_add=n_replicas - len(keep))
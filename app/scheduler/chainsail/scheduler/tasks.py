@@ -1,20 +1,23 @@
 """
 Asynchronous tasks run using celery
 """
-import zipfile
 from datetime import datetime
-from io import BytesIO
+from typing import List, Optional
 
 import grpc
+from celery import chain
 from celery.utils.log import get_task_logger
 from sqlalchemy.exc import OperationalError
 
 from chainsail.common.custom_logging import configure_logging
+from chainsail.scheduler.archive import list_objects, stream_zip_archive
 from chainsail.scheduler.config import load_scheduler_config
 from chainsail.scheduler.core import celery, db
-from chainsail.scheduler.db import TblJobs
+from chainsail.scheduler.db import TblJobs, TblNodes
 from chainsail.scheduler.errors import JobError
-from chainsail.scheduler.jobs import Job, JobStatus
+from chainsail.scheduler.export import export_production_run
+from chainsail.scheduler.jobs import Job, JobStatus, watch_control_node
+from chainsail.scheduler.pool import WarmPool
 from chainsail.scheduler.utils import (
     get_job_blob_root,
     get_s3_client_and_container,
@@ -23,11 +26,19 @@ from chainsail.scheduler.utils import (
 )
 
 RESULTS_ARCHIVE_FILENAME = "results.zip"
+# Maximum time in seconds a single watch_job_task watches a job's control node
+JOB_WATCH_TIMEOUT = 10
+# Time in seconds after which a job's control node is watched again
+JOB_WATCH_INTERVAL = 60
+# Number of consecutive failed attempts to reach a job's control node after
+# which the job is considered failed
+JOB_WATCH_MAX_FAILED_ATTEMPTS = 10
 
 logger_name = "chainsail.scheduler.tasks"
 logger = get_task_logger(logger_name)
 scheduler_config = load_scheduler_config()
 configure_logging(logger_name, "DEBUG", scheduler_config.remote_logging_config_path)
+warm_pool = WarmPool(scheduler_config)
 
 
 @celery.task()
@@ -48,7 +59,7 @@ def start_job_task(job_id):
     except OperationalError:
         # TODO: Log that the row could not be queried
         return
-    job = Job.from_representation(job_rep, scheduler_config)
+    job = Job.from_representation(job_rep, scheduler_config, pool=warm_pool)
     try:
         job.start()
         job.representation.started_at = datetime.utcnow()
@@ -59,6 +70,9 @@ def start_job_task(job_id):
         raise e
     else:
         db.session.commit()
+    finally:
+        if warm_pool.enabled:
+            replenish_pool_task.apply_async()
 
 
 @celery.task()
@@ -89,32 +103,120 @@ def stop_job_task(job_id, exit_status=None):
         db.session.commit()
 
 
-@celery.task(autoretry_for=(grpc.RpcError,), max_retries=10, retry_backoff=2)
-def watch_job_task(job_id):
-    """Watches a running job until it completes and updates its status in the database
+def get_zip_chain(job_id):
+    return chain(
+        export_results_task.si(job_id),
+        zip_results_task.si(job_id),
+        update_signed_url_task.si(job_id),
+    )
+
+
+def finish_job(job_id, exit_status: JobStatus) -> bool:
+    """Stops a running job whose control node exited
+
+    Both the control node reporting its exit and `watch_job_task` end up
+    here, so the job is only stopped by whichever comes first.
 
     Args:
-        job_id: The id of the job to start
+        job_id: The id of the job whose control node exited
+        exit_status: The final status of the job, either SUCCESS or FAILED
+
+    Returns:
+        True if the job is being stopped, False if the job was not running
 
     Raises:
-        JobError: If the job failed to start
+        OperationalError: If the job is currently locked, e.g. because it is
+            being scaled
     """
-    logger.info(f"Watching job {job_id}")
-    job_rep = TblJobs.query.filter_by(id=job_id).one()
-    job = Job.from_representation(job_rep, scheduler_config)
-    job_succeeded = job.watch()
-    if not job_succeeded:
-        raise Exception(f"Job {job_id} failed.")
+    job_rep = TblJobs.query.with_for_update(of=TblJobs, nowait=True).filter_by(id=job_id).one()
+    if job_rep.status != JobStatus.RUNNING.value:
+        db.session.commit()
+        return False
+    job_rep.status = JobStatus.STOPPING.value
+    db.session.commit()
+    logger.info(f"Job #{job_id} exited with status {exit_status.value}.", extra={"job_id": job_id})
+    stop = stop_job_task.si(job_id, exit_status=exit_status.value)
+    if exit_status == JobStatus.SUCCESS:
+        stop = stop.set(link=get_zip_chain(job_id))
+    stop.apply_async()
+    return True
 
 
 @celery.task()
-def scale_job_task(job_id, n_replicas) -> bool:
+def watch_job_task(job_id, failed_attempts=0):
+    """Watches a running job and stops it once its control node exited
+
+    Rather than occupying a worker for the whole lifetime of the job, the
+    control node is watched for at most `JOB_WATCH_TIMEOUT` seconds after
+    which the task re-schedules itself to run again in `JOB_WATCH_INTERVAL`
+    seconds. Usually, the control node reports its exit to the scheduler
+    right away and this task only serves as a fallback for control nodes
+    which die unexpectedly.
+
+    Args:
+        job_id: The id of the job to watch
+        failed_attempts: The number of consecutive failed attempts to reach
+            the job's control node
+    """
+    job_rep = TblJobs.query.filter_by(id=job_id).one()
+    if job_rep.status != JobStatus.RUNNING.value:
+        logger.info(f"Job {job_id} is not running anymore. Stop watching it.")
+        return
+    # Only the control node's address is needed to watch the job. The job
+    # itself is only reconstructed once it has to be stopped.
+    control_node_rep = TblNodes.query.filter_by(
+        job_id=job_id, in_use=True, is_worker=False
+    ).first()
+    logger.info(f"Watching job {job_id}")
+    try:
+        if control_node_rep is None or not control_node_rep.address:
+            raise JobError(f"Job {job_id} has no control node address")
+        succeeded = watch_control_node(control_node_rep.address, timeout=JOB_WATCH_TIMEOUT)
+    except (grpc.RpcError, JobError) as e:
+        failed_attempts += 1
+        logger.warning(
+            f"Failed to reach control node of job {job_id} ({failed_attempts} attempts): {e}",
+            extra={"job_id": job_id},
+        )
+        if failed_attempts >= JOB_WATCH_MAX_FAILED_ATTEMPTS:
+            succeeded = False
+        else:
+            watch_job_task.apply_async(
+                (job_id, failed_attempts), countdown=min(2**failed_attempts, 600)
+            )
+            return
+    # Release the session before waiting for the job lock
+    db.session.commit()
+    if succeeded is not None:
+        try:
+            finish_job(job_id, JobStatus.SUCCESS if succeeded else JobStatus.FAILED)
+            return
+        except OperationalError:
+            logger.info(f"Job {job_id} is locked. Retrying to stop it later.")
+    watch_job_task.apply_async((job_id,), countdown=JOB_WATCH_INTERVAL)
+
+
+def _finish_scaling_operation(job_rep: TblJobs, operation_id: str):
+    # Allows the job to be scaled again right away
+    if job_rep.scaling_operation_id == operation_id:
+        job_rep.scaling_started_at = None
+
+
+@celery.task(bind=True)
+def scale_job_task(self, job_id, n_replicas) -> Optional[List[str]]:
     """Scales a running job to have size `n_replicas`
 
     Args:
         job_id: The id of the job to scale
         n_replicas: The number of replicas to scale to
 
+    The task's ID is the ID of the job's scaling operation, whose status
+    is served by the scheduler's scaling operation endpoint.
+
+    Returns:
+        The addresses of the job's worker nodes after scaling or None if
+        the job is locked by another task
+
     Raises:
         JobError: If the job failed to be scaled
     """
@@ -124,21 +226,34 @@ def scale_job_task(job_id, n_replicas) -> bool:
     except OperationalError:
         # Another process is already scaling this job
         logger.error(f"Failed to aquire lock for job {job_id} in scale_job_task")
-        return False
+        return None
     logger.info(f"Successfully aquired lock for job {job_id}")
     # Load Job object from database entry
-    job = Job.from_representation(job_rep, scheduler_config)
+    job = Job.from_representation(job_rep, scheduler_config, pool=warm_pool)
     try:
         job.scale_to(n_replicas)
         logger.info(f"Scaled job #{job_id} to {n_replicas} replicas.", extra={"job_id": job_id})
     except JobError as e:
         logger.error(f"Failed to scale #{job_id}.", extra={"job_id": job_id})
         logger.exception(e)
+        _finish_scaling_operation(job_rep, self.request.id)
         db.session.commit()
         raise e
     else:
+        hosts = job.worker_addresses
+        _finish_scaling_operation(job_rep, self.request.id)
         db.session.commit()
-        return True
+        return hosts
+    finally:
+        if warm_pool.enabled:
+            replenish_pool_task.apply_async()
+
+
+@celery.task()
+def replenish_pool_task():
+    """Tops up the warm pool of worker nodes to its configured size"""
+    n_added = warm_pool.replenish()
+    logger.info(f"Added {n_added} nodes to the warm pool.")
 
 
 def get_results_signed_url(job_id):
@@ -162,6 +277,28 @@ def update_signed_url_task(job_id, signed_url=None):
     db.session.commit()
 
 
+@celery.task()
+def export_results_task(job_id):
+    """Export the production run of a job into one array file per replica.
+
+    A failed export does not keep the raw results from being zipped.
+
+    Args:
+        job_id: The id of the job the results of which to export
+    """
+    logger.info(f"Exporting results of job #{job_id}...", extra={"job_id": job_id})
+    s3_client, container = get_s3_client_and_container()
+    try:
+        written = export_production_run(s3_client, container, get_job_blob_root(job_id))
+    except Exception as e:
+        logger.error(f"Failed to export results of job #{job_id}.", extra={"job_id": job_id})
+        logger.exception(e)
+        return
+    logger.info(
+        f"Exported results of job #{job_id} to {len(written)} files.", extra={"job_id": job_id}
+    )
+
+
 @celery.task()
 def zip_results_task(job_id):
     """Make zip archive of all results for a given job.
@@ -170,27 +307,24 @@ def zip_results_task(job_id):
         job_id: The id of the job the results of which to zip and link to
     """
     logger.info(f"Zipping results of job #{job_id}...", extra={"job_id": job_id})
-    # FIXME: new implementation
     s3_client, container = get_s3_client_and_container()
     job_blob_root = get_job_blob_root(job_id)
 
-    objects = s3_client.list_objects(Bucket=scheduler_config.results_bucket, Prefix=job_blob_root)
-    if "Contents" not in objects:
+    # Ignore existing results archives
+    objects = [
+        obj
+        for obj in list_objects(s3_client, container, job_blob_root)
+        if not obj["Key"].endswith(RESULTS_ARCHIVE_FILENAME)
+    ]
+    if not objects:
         raise JobError("No results files found in results backend.")
 
-    archive_contents = BytesIO(b"")
-    with zipfile.ZipFile(archive_contents, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for blob in objects["Contents"]:
-            key = blob["Key"]
-            is_results_archive = key.endswith(RESULTS_ARCHIVE_FILENAME)
-            # Ignore existing results archives
-            if is_results_archive:
-                continue
-            # Note: Loading entire object into memory here
-            blob_name_no_root = key[len(job_blob_root) :]
-            contents = s3_client.get_object(Bucket=container, Key=key)["Body"].read()
-            zipf.writestr(blob_name_no_root, contents)
-    archive_contents.seek(0)
     blob_name = sanitize_object_name(f"{job_blob_root}/{RESULTS_ARCHIVE_FILENAME}")
-    s3_client.put_object(Body=archive_contents, Bucket=container, Key=blob_name)
-    logger.info(f"Zipped results of job #{job_id}.", extra={"job_id": job_id})
+    n_zipped = stream_zip_archive(
+        s3_client,
+        container,
+        objects,
+        blob_name,
+        arcname=lambda key: key[len(job_blob_root) :],
+    )
+    logger.info(f"Zipped {n_zipped} results files of job #{job_id}.", extra={"job_id": job_id})
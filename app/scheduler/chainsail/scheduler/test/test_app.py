@@ -0,0 +1,270 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+import yaml
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.types import ARRAY
+
+from chainsail.scheduler.test.test_config import VALID_CONFIG_VM_CHAINSAIL_DRIVER
+
+
+@compiles(ARRAY, "sqlite")
+def _compile_array(element, compiler, **kwargs):
+    # The jobs table has an ARRAY column, which SQLite does not support
+    return "TEXT"
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    config_path = tmp_path_factory.mktemp("config") / "scheduler.yaml"
+    config_path.write_text(
+        yaml.dump({**VALID_CONFIG_VM_CHAINSAIL_DRIVER, "remote_logging_config_path": ""})
+    )
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("CHAINSAIL_SCHEDULER_CONFIG", str(config_path))
+        from chainsail.scheduler.app import app
+        from chainsail.scheduler.core import db
+
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+
+def get_job(job_id):
+    from chainsail.scheduler.db import TblJobs
+
+    return TblJobs.query.get(job_id)
+
+
+def update_job(job_id, **fields):
+    from chainsail.scheduler.core import db
+    from chainsail.scheduler.db import TblJobs
+
+    job = TblJobs.query.get(job_id)
+    for key, value in fields.items():
+        setattr(job, key, value)
+    db.session.commit()
+    return job
+
+
+@pytest.fixture
+def job_id(app):
+    from chainsail.scheduler.core import db
+    from chainsail.scheduler.db import TblIterations, TblJobs
+
+    job = TblJobs(user_id="alice", status="running", created_at=datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+    yield job.id
+    TblIterations.query.filter_by(job_id=job.id).delete()
+    TblJobs.query.filter_by(id=job.id).delete()
+    db.session.commit()
+
+
+@pytest.fixture
+def scale_job_task():
+    with patch("chainsail.scheduler.app.scale_job_task") as task:
+        yield task
+
+
+def test_scale_job_starts_scaling_operation(app, job_id, scale_job_task):
+    response = app.test_client().post(f"/internal/job/{job_id}/scale/3")
+
+    assert response.status_code == 202
+    operation_id = response.get_json()["operation_id"]
+    scale_job_task.apply_async.assert_called_once_with((str(job_id), 3), {}, task_id=operation_id)
+    job = get_job(job_id)
+    assert job.scaling_operation_id == operation_id
+    assert job.scaling_started_at is not None
+
+
+def test_scale_job_conflicts_with_running_operation(app, job_id, scale_job_task):
+    update_job(job_id, scaling_operation_id="op", scaling_started_at=datetime.utcnow())
+    scale_job_task.AsyncResult.return_value.state = "PENDING"
+
+    response = app.test_client().post(f"/internal/job/{job_id}/scale/3")
+
+    assert response.status_code == 409
+    scale_job_task.AsyncResult.assert_called_once_with("op")
+    scale_job_task.apply_async.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "started_ago,state",
+    [
+        # The operation finished
+        (timedelta(), "SUCCESS"),
+        # The operation's result expired or its task was lost
+        (timedelta(days=2), "PENDING"),
+        (None, "PENDING"),
+    ],
+)
+def test_scale_job_ignores_finished_operations(app, job_id, scale_job_task, started_ago, state):
+    started_at = None if started_ago is None else datetime.utcnow() - started_ago
+    update_job(job_id, scaling_operation_id="op", scaling_started_at=started_at)
+    scale_job_task.AsyncResult.return_value.state = state
+
+    response = app.test_client().post(f"/internal/job/{job_id}/scale/3")
+
+    assert response.status_code == 202
+    assert get_job(job_id).scaling_operation_id != "op"
+
+
+def test_scale_job_unlocks_job_if_task_is_not_sent(app, job_id, scale_job_task):
+    scale_job_task.apply_async.side_effect = ConnectionError()
+
+    response = app.test_client().post(f"/internal/job/{job_id}/scale/3")
+
+    assert response.status_code == 500
+    job = get_job(job_id)
+    assert job.scaling_operation_id is None
+    assert job.scaling_started_at is None
+
+
+def mk_result(ready=True, failed=False, result=None):
+    return MagicMock(
+        ready=MagicMock(return_value=ready),
+        failed=MagicMock(return_value=failed),
+        result=result,
+    )
+
+
+@pytest.mark.parametrize(
+    "result,expected",
+    [
+        (mk_result(ready=False), {"status": "running"}),
+        (mk_result(result=["1.2.3.4"]), {"status": "succeeded", "hosts": ["1.2.3.4"]}),
+        (
+            mk_result(failed=True, result="JobError()"),
+            {"status": "failed", "error": "'JobError()'"},
+        ),
+        (mk_result(result=None), {"status": "conflict"}),
+    ],
+)
+def test_scaling_operation(app, job_id, scale_job_task, result, expected):
+    update_job(job_id, scaling_operation_id="op")
+    scale_job_task.AsyncResult.return_value = result
+
+    response = app.test_client().get(f"/internal/job/{job_id}/scale_operation/op")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"operation_id": "op", **expected}
+
+
+def test_scaling_operation_of_other_job(app, job_id, scale_job_task):
+    update_job(job_id, scaling_operation_id="op")
+    response = app.test_client().get(f"/internal/job/{job_id}/scale_operation/other")
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def dev_user():
+    # Authenticates requests to user-facing endpoints as the owner of the job
+    with patch("chainsail.scheduler.app.firebase_app", None), patch(
+        "chainsail.scheduler.app.use_dev_user", "alice"
+    ):
+        yield
+
+
+def get_iterations(job_id):
+    from chainsail.scheduler.db import TblIterations
+
+    return TblIterations.query.filter_by(job_id=job_id).order_by(TblIterations.id).all()
+
+
+def test_add_iteration(app, job_id):
+    response = app.test_client().post(
+        f"/internal/job/{job_id}/add_iteration/optimization_run0",
+        json={"num_replicas": 4, "schedule": {"beta": [0.1, 1.0]}},
+    )
+
+    assert response.status_code == 200
+    (iteration,) = get_iterations(job_id)
+    assert iteration.name == "optimization_run0"
+    assert iteration.started_at is not None
+    assert iteration.finished_at is None
+    assert iteration.num_replicas == 4
+    assert json.loads(iteration.schedule) == {"beta": [0.1, 1.0]}
+
+
+def test_add_iteration_without_report(app, job_id):
+    response = app.test_client().post(f"/internal/job/{job_id}/add_iteration/optimization_run0")
+
+    assert response.status_code == 200
+    (iteration,) = get_iterations(job_id)
+    assert iteration.num_replicas is None
+    assert iteration.schedule is None
+
+
+def test_add_iteration_rejects_invalid_report(app, job_id):
+    response = app.test_client().post(
+        f"/internal/job/{job_id}/add_iteration/optimization_run0",
+        json={"num_replicas": "many"},
+    )
+    assert response.status_code == 400
+    assert get_iterations(job_id) == []
+
+
+def test_finish_iteration(app, job_id):
+    client = app.test_client()
+    # Only the latest iteration of the same name is finished
+    for _ in range(2):
+        client.post(f"/internal/job/{job_id}/add_iteration/optimization_run0")
+
+    response = client.post(
+        f"/internal/job/{job_id}/finish_iteration/optimization_run0",
+        json={"dos_estimation_duration": 1.5},
+    )
+
+    assert response.status_code == 200
+    first, second = get_iterations(job_id)
+    assert first.finished_at is None
+    assert second.finished_at is not None
+    assert second.dos_estimation_duration == 1.5
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/internal/job/{other_job_id}/add_iteration/optimization_run0",
+        "/internal/job/{other_job_id}/finish_iteration/optimization_run0",
+        "/internal/job/{job_id}/finish_iteration/optimization_run0",
+        "/job/{other_job_id}/iterations",
+    ],
+)
+def test_iterations_of_unknown_job_or_iteration(app, job_id, dev_user, path):
+    response = app.test_client().open(
+        path.format(job_id=job_id, other_job_id=job_id + 1000),
+        method="GET" if path.startswith("/job") else "POST",
+    )
+    assert response.status_code == 404
+
+
+def test_get_iterations(app, job_id, dev_user):
+    from chainsail.scheduler.core import db
+    from chainsail.scheduler.db import TblIterations
+
+    now = datetime.utcnow()
+    # Recorded in a different order than they were started
+    for name, started_ago in [
+        ("production_run", 0),
+        ("optimization_run0", 2),
+        ("optimization_run1", 1),
+    ]:
+        db.session.add(
+            TblIterations(job_id=job_id, name=name, started_at=now - timedelta(hours=started_ago))
+        )
+    db.session.commit()
+
+    response = app.test_client().get(f"/job/{job_id}/iterations")
+
+    assert response.status_code == 200
+    assert [it["name"] for it in response.get_json()] == [
+        "optimization_run0",
+        "optimization_run1",
+        "production_run",
+    ]
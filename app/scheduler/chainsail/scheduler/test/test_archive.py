@@ -0,0 +1,115 @@
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+from chainsail.scheduler.archive import list_objects, stream_zip_archive
+
+
+class FakeBody:
+    def __init__(self, data):
+        self._data = data
+        self.chunked = False
+
+    def read(self):
+        return self._data
+
+    def iter_chunks(self, chunk_size):
+        self.chunked = True
+        for i in range(0, len(self._data), chunk_size):
+            yield self._data[i : i + chunk_size]
+
+
+class FakeS3:
+    """Minimal in-memory stand-in for the boto3 S3 client"""
+
+    def __init__(self, objects, page_size=1000):
+        self.objects = dict(objects)
+        self.page_size = page_size
+        self.bodies = {}
+        self.uploads = {}
+        self.aborted = []
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        s3 = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                keys = sorted(k for k in s3.objects if k.startswith(Prefix))
+                for i in range(0, len(keys), s3.page_size):
+                    page_keys = keys[i : i + s3.page_size]
+                    yield {
+                        "Contents": [
+                            {
+                                "Key": k,
+                                "Size": len(s3.objects[k]),
+                                "LastModified": datetime(2022, 1, 1),
+                            }
+                            for k in page_keys
+                        ]
+                    }
+
+        return Paginator()
+
+    def get_object(self, Bucket, Key):
+        body = FakeBody(self.objects[Key])
+        self.bodies[Key] = body
+        return {"Body": body}
+
+    def create_multipart_upload(self, Bucket, Key):
+        self.uploads[Key] = []
+        return {"UploadId": Key}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId].append(Body)
+        return {"ETag": str(PartNumber)}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        assert len(MultipartUpload["Parts"]) == len(self.uploads[UploadId])
+        self.objects[Key] = b"".join(self.uploads.pop(UploadId))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+
+def test_list_objects_paginates():
+    s3 = FakeS3({f"root/{i:04d}.pickle": b"x" for i in range(2500)}, page_size=1000)
+    assert len(list(list_objects(s3, "bucket", "root/"))) == 2500
+
+
+def test_stream_zip_archive():
+    objects = {f"root/samples/batch_{i}.pickle": bytes([i]) * 100 for i in range(20)}
+    objects["root/large.bin"] = b"large" * 10000
+    s3 = FakeS3(objects)
+    listed = list(list_objects(s3, "bucket", "root/"))
+
+    n = stream_zip_archive(
+        s3,
+        "bucket",
+        listed,
+        "root/results.zip",
+        arcname=lambda key: key[len("root/") :],
+        chunk_size=1000,
+        max_prefetch_size=1000,
+        max_concurrency=4,
+    )
+
+    assert n == 21
+    # Large objects are read in chunks
+    assert s3.bodies["root/large.bin"].chunked
+    with zipfile.ZipFile(io.BytesIO(s3.objects["root/results.zip"])) as zipf:
+        assert len(zipf.namelist()) == 21
+        for key, data in objects.items():
+            assert zipf.read(key[len("root/") :]) == data
+
+
+def test_stream_zip_archive_aborts_upload_on_failure():
+    s3 = FakeS3({"root/a": b"a"})
+    listed = list(list_objects(s3, "bucket", "root/"))
+    s3.objects.clear()
+
+    with pytest.raises(KeyError):
+        stream_zip_archive(s3, "bucket", listed, "root/results.zip", arcname=lambda key: key)
+    assert s3.aborted == ["root/results.zip"]
+    assert "root/results.zip" not in s3.objects
@@ -0,0 +1,75 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def db_session():
+    from chainsail.scheduler.auth import user_cache
+    from chainsail.scheduler.core import app, db
+    from chainsail.scheduler.db import TblUsers
+
+    with app.app_context():
+        TblUsers.__table__.create(db.engine)
+        yield db.session
+        db.session.rollback()
+        TblUsers.__table__.drop(db.engine)
+        user_cache.clear()
+
+
+def test_ttl_cache():
+    from chainsail.scheduler.cache import TTLCache
+
+    now = [0.0]
+    cache = TTLCache(max_size=2, clock=lambda: now[0])
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=20)
+    # Expired and non-positive TTLs are not cached
+    cache.set("c", 3, ttl=0)
+    assert cache.get("c") is None
+    now[0] = 15
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    # The least recently used entry is evicted once the cache is full
+    cache.set("d", 4, ttl=20)
+    cache.set("e", 5, ttl=20)
+    assert cache.get("b") is None
+    assert cache.get("d") == 4
+    cache.invalidate("d")
+    assert cache.get("d") is None
+
+
+def test_verify_token_caches_claims():
+    from chainsail.scheduler.auth import token_cache, verify_token
+
+    claims = {"user_id": "alice", "exp": time.time() + 3600}
+    with patch("chainsail.scheduler.auth.verify_id_token", return_value=claims) as verify:
+        assert verify_token("token") == claims
+        assert verify_token("token") == claims
+        verify.assert_called_once()
+    # Tokens which are about to expire are not cached
+    claims = {"user_id": "bob", "exp": time.time() - 1}
+    with patch("chainsail.scheduler.auth.verify_id_token", return_value=claims) as verify:
+        verify_token("expired")
+        verify_token("expired")
+        assert verify.call_count == 2
+    token_cache.clear()
+
+
+def test_is_user_allowed_invalidation(db_session):
+    from chainsail.scheduler.auth import is_user_allowed
+    from chainsail.scheduler.db import TblUsers
+
+    assert is_user_allowed("alice@example.com") is None
+    user = TblUsers(email="alice@example.com", is_allowed=False)
+    db_session.add(user)
+    db_session.flush()
+    assert is_user_allowed("alice@example.com") is False
+    # Cached without querying the database again
+    with patch.object(TblUsers, "query") as query:
+        assert is_user_allowed("alice@example.com") is False
+        query.filter_by.assert_not_called()
+    user.is_allowed = True
+    db_session.flush()
+    assert is_user_allowed("alice@example.com") is True
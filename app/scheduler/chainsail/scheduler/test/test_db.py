@@ -0,0 +1,30 @@
+from sqlalchemy import create_engine, inspect
+
+
+def test_upgrade_columns_adds_missing_columns(tmp_path):
+    from chainsail.scheduler.db import upgrade_columns
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'scheduler.db'}")
+    # The nodes table as it was before nodes could be pooled
+    engine.execute(
+        "CREATE TABLE nodes (id INTEGER PRIMARY KEY, job_id INTEGER NOT NULL, "
+        "name VARCHAR(50) NOT NULL, node_type VARCHAR(50) NOT NULL)"
+    )
+    engine.execute("INSERT INTO nodes (job_id, name, node_type) VALUES (1, 'node-1', 'VMNode')")
+
+    upgrade_columns(engine)
+    # Upgrading is idempotent
+    upgrade_columns(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("nodes")}
+    assert {"in_pool", "is_worker", "address"} <= columns
+    assert list(engine.execute("SELECT name, in_pool FROM nodes")) == [("node-1", None)]
+    # Tables which do not exist yet are left to `db.create_all`
+    assert "jobs" not in inspect(engine).get_table_names()
+
+
+def test_job_nodes_are_ordered_by_id():
+    from chainsail.scheduler.db import TblJobs
+
+    # The jobs table can not be created in SQLite, so only the mapping is checked
+    assert [str(c) for c in TblJobs.nodes.property.order_by] == ["nodes.id"]
@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock
+
+from chainsail.common.spec import PipDependencies
+
+
+def test_dependencies_key_ignores_package_order():
+    from chainsail.scheduler.deps import dependencies_key
+
+    key = dependencies_key([PipDependencies(["numpy", "scipy"])], "user-code:1")
+    assert key == dependencies_key([PipDependencies(["scipy", "numpy"])], "user-code:1")
+    assert key != dependencies_key([PipDependencies(["numpy"])], "user-code:1")
+    # Installed packages can not be reused across environments
+    assert key != dependencies_key([PipDependencies(["numpy", "scipy"])], "user-code:2")
+
+
+def test_install_commands_without_cache():
+    from chainsail.scheduler.deps import install_commands
+
+    deps = [PipDependencies(["numpy"])]
+    assert install_commands(deps) == "pip install numpy"
+    # The cache is only shared within a scope
+    assert install_commands(deps, cache=MagicMock(), scope=None) == "pip install numpy"
+    assert install_commands([PipDependencies([])], cache=MagicMock(), scope="alice") == ""
+
+
+def test_install_commands_with_cache():
+    from chainsail.scheduler.deps import DependencyCache, dependencies_key, install_commands
+
+    s3 = MagicMock()
+    s3.generate_presigned_url.side_effect = lambda method, **kwargs: f"https://{method}"
+    cache = DependencyCache(lambda: s3, "results", "/deps_cache/")
+    deps = [PipDependencies(["numpy"])]
+
+    commands = install_commands(deps, cache=cache, scope="alice", environment="user-code:1")
+
+    assert "wget -q -O \"$DEPS_ARCHIVE\" 'https://get_object'" in commands
+    # Dependencies of the packages are pinned to the versions of the environment
+    assert 'pip list --format=freeze > "$PIP_CONSTRAINTS"' in commands
+    assert 'pip install --target /app/deps -c "$PIP_CONSTRAINTS" numpy' in commands
+    assert "'https://put_object'" in commands
+    key = dependencies_key(deps, "user-code:1")
+    for call in s3.generate_presigned_url.call_args_list:
+        assert call.kwargs["Params"] == {
+            "Bucket": "results",
+            "Key": f"deps_cache/alice/{key}.tar.gz",
+        }
+
+
+def test_dependency_cache_creates_s3_client_lazily():
+    from chainsail.scheduler.deps import DependencyCache
+
+    create_s3 = MagicMock()
+    cache = DependencyCache(create_s3, "results", "deps_cache")
+    create_s3.assert_not_called()
+    cache.urls("alice", "key")
+    cache.urls("alice", "key")
+    create_s3.assert_called_once_with()
@@ -0,0 +1,103 @@
+import io
+import json
+import pickle
+
+import numpy as np
+import yaml
+from botocore.exceptions import ClientError
+from chainsail.scheduler.export import export_production_run
+
+
+class FakeBody:
+    def __init__(self, data):
+        self._data = data
+
+    def read(self):
+        return self._data
+
+
+class FakeS3:
+    """Minimal in-memory stand-in for the boto3 S3 client"""
+
+    def __init__(self, objects):
+        self.objects = dict(objects)
+        self.uploads = {}
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": FakeBody(self.objects[Key])}
+
+    def put_object(self, Body, Bucket, Key):
+        self.objects[Key] = Body
+
+    def create_multipart_upload(self, Bucket, Key):
+        self.uploads[Key] = []
+        return {"UploadId": Key}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId].append(Body)
+        return {"ETag": str(PartNumber)}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.objects[Key] = b"".join(self.uploads.pop(UploadId))
+
+
+def mk_production_run(n_replicas=2, n_iterations=30, dump_interval=10, n_dumped=30):
+    root = "results/1/production_run"
+    config = {
+        "general": {"num_replicas": n_replicas, "n_iterations": n_iterations},
+        "re": {"dump_interval": dump_interval},
+    }
+    objects = {f"{root}/config.yml": yaml.dump(config).encode()}
+    for r in range(1, n_replicas + 1):
+        for n in range(0, n_dumped, dump_interval):
+            samples = np.full((dump_interval, 2), r * 1000 + n, dtype=float)
+            energies = np.full(dump_interval, -r, dtype=float)
+            objects[
+                f"{root}/samples/samples_replica{r}_{n}-{n + dump_interval}.pickle"
+            ] = pickle.dumps(samples)
+            objects[
+                f"{root}/energies/energies_replica{r}_{n}-{n + dump_interval}.pickle"
+            ] = pickle.dumps(energies)
+    return objects
+
+
+def test_export_production_run():
+    s3 = FakeS3(mk_production_run())
+
+    written = export_production_run(s3, "bucket", "results/1")
+
+    assert written == [
+        "results/1/export/replica1.npz",
+        "results/1/export/replica2.npz",
+        "results/1/export/index.json",
+    ]
+    exported = np.load(io.BytesIO(s3.objects["results/1/export/replica2.npz"]))
+    assert exported["samples"].shape == (30, 2)
+    assert list(exported["samples"][::10, 0]) == [2000, 2010, 2020]
+    assert exported["energies"].shape == (30,)
+    index = json.loads(s3.objects["results/1/export/index.json"])
+    assert index["num_replicas"] == 2
+    assert index["replicas"][0]["file"] == "replica1.npz"
+    assert index["replicas"][0]["samples_shape"] == [30, 2]
+    assert index["replicas"][0]["samples_dtype"] == "float64"
+    assert index["replicas"][0]["n_samples"] == 30
+
+
+def test_export_incomplete_production_run():
+    s3 = FakeS3(mk_production_run(n_dumped=20))
+    export_production_run(s3, "bucket", "results/1")
+    exported = np.load(io.BytesIO(s3.objects["results/1/export/replica1.npz"]))
+    assert len(exported["samples"]) == 20
+
+
+def test_export_replica_without_samples():
+    s3 = FakeS3(mk_production_run(n_dumped=0))
+    export_production_run(s3, "bucket", "results/1")
+    exported = np.load(io.BytesIO(s3.objects["results/1/export/replica1.npz"]))
+    assert exported["samples"].shape == (0,)
+
+
+def test_export_without_production_run():
+    assert export_production_run(FakeS3({}), "bucket", "results/1") == []
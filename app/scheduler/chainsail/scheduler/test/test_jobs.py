@@ -1,6 +1,7 @@
 import functools
+import threading
 from datetime import datetime
-from unittest.mock import MagicMock, Mock
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 from chainsail.common.spec import JobSpec, JobSpecSchema
@@ -96,6 +97,7 @@ def mk_mock_node_cls(
         return node
 
     node_cls.from_config = from_config
+    node_cls.delete_many = Node.delete_many
     return node_cls
 
 
@@ -264,6 +266,81 @@ def test_job_scale_down(mock_config, mock_spec):
     assert all([n.status == NodeStatus.RUNNING for n in job.nodes])
 
 
+def test_job_start_creates_nodes_concurrently(mock_config, mock_spec):
+    from chainsail.scheduler.jobs import Job
+
+    node_cls = mk_mock_node_cls()
+    job = Job(
+        id=1,
+        spec=mock_spec,
+        config=mock_config,
+        node_registry={"mock": node_cls},
+    )
+    barrier = threading.Barrier(mock_spec.initial_number_of_replicas, timeout=5)
+    original_from_config = node_cls.from_config
+
+    def from_config(*args, **kwargs):
+        node = original_from_config(*args, **kwargs)
+        create = node.create
+
+        def blocking_create():
+            # Only passes once all worker nodes are being created at the same time
+            if not kwargs.get("is_controller"):
+                barrier.wait()
+            return create()
+
+        node.create = blocking_create
+        return node
+
+    node_cls.from_config = from_config
+    job.start()
+
+    assert all([n.status == NodeStatus.RUNNING for n in job.nodes])
+
+
+def test_job_stop_deletes_nodes_concurrently_and_reports_failures(mock_config, mock_spec):
+    from chainsail.scheduler.errors import JobError
+    from chainsail.scheduler.jobs import Job
+
+    job = Job(
+        id=1,
+        spec=mock_spec,
+        config=mock_config,
+        node_registry={"mock": mk_mock_node_cls()},
+    )
+    job.start()
+    nodes = job.nodes + [job.control_node]
+    barrier = threading.Barrier(len(nodes), timeout=5)
+    failing = nodes[0]
+    for node in nodes:
+        # Only passes once all nodes are being deleted at the same time
+        node.delete = lambda node=node: barrier.wait() is not None and node is not failing
+
+    with pytest.raises(JobError, match=f"1 of {len(nodes)} nodes.*{failing.name}"):
+        job.stop()
+    assert not barrier.broken
+
+
+def test_job_scale_up_failure_reports_all_nodes(mock_config, mock_spec):
+    from chainsail.scheduler.errors import JobError
+    from chainsail.scheduler.jobs import Job
+
+    node_cls = mk_mock_node_cls()
+    job = Job(
+        id=1,
+        spec=mock_spec,
+        config=mock_config,
+        node_registry={"mock": node_cls},
+    )
+    job.start()
+    failing_node_cls = mk_mock_node_cls(create_failure=True)
+    job._node_cls = failing_node_cls
+
+    with pytest.raises(JobError, match="Failed to start 3 of 3 nodes"):
+        job.scale_to(8)
+    assert all([n.status == NodeStatus.FAILED for n in job.nodes[5:]])
+
+
 def _add_nodes_to_job_rep(job_rep, num_nodes, num_controllers):
     from chainsail.scheduler.db import TblNodes
     from chainsail.scheduler.nodes.base import NodeStatus
@@ -332,3 +409,124 @@ def test_job_from_representation_preserves_status(mock_config):
     job = Job.from_representation(rep, mock_config, node_registry={"mock": mk_mock_node_cls()})
 
     assert job.status == JobStatus.STOPPED
+
+
+def test_job_start_takes_nodes_from_pool(mock_config, mock_spec):
+    from chainsail.scheduler.jobs import Job
+
+    pooled_node_cls = mk_mock_node_cls()
+    pooled_nodes = [
+        pooled_node_cls.from_config(f"pooled-{i}", mock_config, mock_spec, False) for i in range(2)
+    ]
+    for node in pooled_nodes:
+        node.create()
+        node.create = Mock(return_value=(True, SUCCESS_LOG))
+    pool = Mock()
+    pool.acquire.side_effect = [pooled_nodes, []]
+    job = Job(
+        id=1,
+        spec=mock_spec,
+        config=mock_config,
+        node_registry={"mock": mk_mock_node_cls()},
+        pool=pool,
+    )
+    job.start()
+
+    assert len(job.nodes) == mock_spec.initial_number_of_replicas
+    assert all([n.status == NodeStatus.RUNNING for n in job.nodes])
+    pool.acquire.assert_called_once_with(mock_spec.initial_number_of_replicas, mock_spec, None)
+    # Already running nodes from the pool are not created again
+    for node in pooled_nodes:
+        node.create.assert_not_called()
+
+    job.scale_to(8)
+    pool.acquire.assert_called_with(3, mock_spec, None)
+    assert len(job.nodes) == 8
+
+
+def test_job_scale_replaces_failed_nodes(mock_config, mock_spec):
+    from chainsail.scheduler.jobs import Job
+
+    job = Job(
+        id=1,
+        spec=mock_spec,
+        config=mock_config,
+        node_registry={"mock": mk_mock_node_cls()},
+    )
+    job.start()
+    failed_node = job.nodes[0]
+    failed_node.status = NodeStatus.FAILED
+    kept_nodes = job.nodes[1:]
+
+    job.scale_to(3)
+
+    assert failed_node not in job.nodes
+    # The longest running nodes are kept
+    assert job.nodes == kept_nodes[:3]
+    assert job.worker_addresses == ["127.0.0.1"] * 3
+
+
+def test_job_watch_uses_health_stream(mock_config, mock_spec):
+    import grpc
+    from chainsail.grpc import HealthCheckResponse
+    from chainsail.scheduler.jobs import Job, JobStatus
+
+    job = Job(
+        id=1,
+        spec=mock_spec,
+        config=mock_config,
+        node_registry={"mock": mk_mock_node_cls()},
+    )
+    job.start()
+    responses = [
+        HealthCheckResponse(status=HealthCheckResponse.SERVING),
+        HealthCheckResponse(status=HealthCheckResponse.SUCCESS),
+    ]
+    with patch("chainsail.scheduler.jobs.HealthStub") as mock_stub:
+        mock_stub.return_value.Watch.return_value = iter(responses)
+        assert job.watch(timeout=10)
+    mock_stub.return_value.Check.assert_not_called()
+    assert job.status == JobStatus.SUCCESS
+
+    class DeadlineExceeded(grpc.RpcError):
+        def code(self):
+            return grpc.StatusCode.DEADLINE_EXCEEDED
+
+    def still_serving(*args, **kwargs):
+        yield HealthCheckResponse(status=HealthCheckResponse.SERVING)
+        raise DeadlineExceeded()
+
+    with patch("chainsail.scheduler.jobs.HealthStub") as mock_stub:
+        mock_stub.return_value.Watch.side_effect = still_serving
+        assert job.watch(timeout=10) is None
+
+
+def test_job_sync_only_writes_changes(mock_config):
+    from chainsail.scheduler.db import TblJobs
+    from chainsail.scheduler.jobs import Job, JobStatus
+
+    spec = JobSpec(probability_definition="foobar")
+    rep = TblJobs(spec=JobSpecSchema().dumps(spec), status=JobStatus.INITIALIZED.value)
+    job = Job.from_representation(rep, mock_config, node_registry={"mock": mk_mock_node_cls()})
+    with patch("chainsail.scheduler.jobs.JobSpecSchema") as schema:
+        job.sync_representation()
+        job.status = JobStatus.RUNNING
+        job.sync_representation()
+        # The spec loaded from the representation is not serialized again
+        schema.return_value.dumps.assert_not_called()
+    assert rep.status == JobStatus.RUNNING.value
+
+    # Fields which did not change since the last sync are not written
+    rep.status = "tampered"
+    job.sync_representation()
+    assert rep.status == "tampered"
+    job.status = JobStatus.STOPPED
+    job.sync_representation()
+    assert rep.status == JobStatus.STOPPED.value
+
+    # All fields are written to a new representation
+    new_rep = TblJobs()
+    job.representation = new_rep
+    job.sync_representation()
+    assert new_rep.status == JobStatus.STOPPED.value
+    assert new_rep.spec == rep.spec
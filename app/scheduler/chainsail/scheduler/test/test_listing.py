@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+from marshmallow.exceptions import ValidationError
+from sqlalchemy import Column, Integer, MetaData, String, Table
+
+
+@pytest.fixture
+def jobs_query():
+    from chainsail.scheduler.core import app, db
+    from chainsail.scheduler.db import TblJobs
+
+    with app.app_context():
+        # The jobs table uses postgres-only column types, so only the columns
+        # which are needed for listing are created
+        table = Table(
+            TblJobs.__tablename__,
+            MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("user_id", String(50)),
+            Column("spec", String()),
+            Column("status", String(50)),
+            Column("created_at", db.DateTime()),
+        )
+        table.create(db.engine)
+        t0 = datetime(2022, 1, 1)
+        # Two jobs share a creation time to check that the cursor tells them apart
+        created_ats = [t0, t0 + timedelta(days=1), t0 + timedelta(days=1), t0 + timedelta(days=2)]
+        for i, created_at in enumerate(created_ats):
+            db.session.execute(
+                table.insert().values(
+                    id=i + 1,
+                    user_id="alice",
+                    spec="{}",
+                    status="running" if i % 2 else "success",
+                    created_at=created_at,
+                )
+            )
+        yield db.session.query(TblJobs).filter_by(user_id="alice")
+        db.session.rollback()
+        table.drop(db.engine)
+
+
+def test_list_jobs_paginates(jobs_query):
+    from chainsail.scheduler.listing import decode_cursor, list_jobs
+
+    columns = ["id", "status", "created_at"]
+    jobs, cursor = list_jobs(jobs_query, limit=3, columns=columns)
+    assert [job.id for job in jobs] == [4, 3, 2]
+    jobs, cursor = list_jobs(jobs_query, limit=3, cursor=decode_cursor(cursor), columns=columns)
+    assert [job.id for job in jobs] == [1]
+    assert cursor is None
+
+
+def test_list_jobs_filters(jobs_query):
+    from chainsail.scheduler.listing import JobListArgsSchema, list_jobs
+
+    args = JobListArgsSchema().load(
+        {"status": "running", "created_after": "2022-01-02T00:00:00", "fields": "id,status"}
+    )
+    jobs, cursor = list_jobs(jobs_query, **args)
+    assert [job.id for job in jobs] == [4, 2]
+    assert cursor is None
+
+
+def test_job_list_args_validation():
+    from chainsail.scheduler.listing import DEFAULT_PAGE_SIZE, JobListArgsSchema
+
+    schema = JobListArgsSchema()
+    assert schema.load({})["limit"] == DEFAULT_PAGE_SIZE
+    for invalid in (
+        {"status": "running,unknown"},
+        {"fields": "id,password"},
+        {"limit": "0"},
+        {"cursor": "not-a-cursor"},
+    ):
+        with pytest.raises(ValidationError):
+            schema.load(invalid)
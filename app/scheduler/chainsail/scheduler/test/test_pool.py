@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock
+
+import pytest
+from chainsail.scheduler.nodes.base import NodeStatus
+
+
+@pytest.fixture
+def db_session():
+    from chainsail.scheduler.core import app, db
+    from chainsail.scheduler.db import TblNodes
+
+    with app.app_context():
+        # The jobs table uses postgres-only column types
+        TblNodes.__table__.create(db.engine)
+        yield db.session
+        db.session.rollback()
+        TblNodes.__table__.drop(db.engine)
+
+
+def mk_pool_node_cls():
+    from chainsail.scheduler.db import TblNodes
+
+    class PoolNode:
+        SUPPORTS_POOLING = True
+
+        def __init__(self, name, node_rep):
+            self.name = name
+            self.representation = node_rep
+            self.sync_deferred = False
+            self.bind = MagicMock()
+            self.delete = MagicMock(return_value=True)
+
+        def create(self):
+            self.representation.status = NodeStatus.RUNNING.value
+            return True, ""
+
+        def sync_representation(self):
+            pass
+
+        @classmethod
+        def for_pool(cls, name, config):
+            node_rep = TblNodes(
+                name=name,
+                node_type="mock",
+                status=NodeStatus.INITIALIZED.value,
+                in_use=False,
+                is_worker=True,
+                in_pool=True,
+            )
+            return cls(name, node_rep)
+
+        @classmethod
+        def from_representation(cls, spec, node_rep, config, is_controller=False):
+            return cls(node_rep.name, node_rep)
+
+    return PoolNode
+
+
+def test_warm_pool(db_session):
+    from chainsail.scheduler.db import TblNodes
+    from chainsail.scheduler.pool import WarmPool
+
+    config = MagicMock(node_type="mock", warm_pool_size=3, max_node_creation_threads=2)
+    pool = WarmPool(config, node_registry={"mock": mk_pool_node_cls()})
+
+    assert pool.replenish() == 3
+    assert pool.replenish() == 0
+    assert TblNodes.query.filter_by(in_pool=True).count() == 3
+
+    spec = MagicMock()
+    nodes = pool.acquire(2, spec)
+    assert len(nodes) == 2
+    for node in nodes:
+        node.bind.assert_called_once_with(spec, None)
+
+    # Nodes are only taken out of the pool by the node's `bind`
+    for node in nodes:
+        node.representation.in_pool = False
+    # Failed pooled nodes are torn down and replaced
+    failed = TblNodes.query.filter_by(in_pool=True).one()
+    failed.status = NodeStatus.FAILED.value
+    assert pool.replenish() == 3
+    assert failed.in_pool is False
+    assert TblNodes.query.filter_by(in_pool=True).count() == 3
+
+
+def test_warm_pool_disabled():
+    from chainsail.scheduler.pool import WarmPool
+
+    config = MagicMock(node_type="mock", warm_pool_size=0)
+    pool = WarmPool(config, node_registry={"mock": mk_pool_node_cls()})
+    assert not pool.enabled
+    assert pool.acquire(3, MagicMock()) == []
+
+
+@pytest.mark.parametrize("dialect,locked", [("postgresql", True), ("sqlite", False)])
+def test_warm_pool_serializes_replenishments(dialect, locked):
+    from chainsail.scheduler.pool import REPLENISH_LOCK_ID, WarmPool
+
+    session = MagicMock()
+    session.get_bind.return_value.dialect.name = dialect
+    WarmPool._lock_replenishment(session)
+
+    if locked:
+        (statement, params), _ = session.execute.call_args
+        assert str(statement) == "SELECT pg_advisory_xact_lock(:lock_id)"
+        assert params == {"lock_id": REPLENISH_LOCK_ID}
+    else:
+        session.execute.assert_not_called()
@@ -0,0 +1,46 @@
+from unittest.mock import Mock
+
+import pytest
+from chainsail.scheduler.nodes.base import NodeStatus
+from chainsail.scheduler.scaling import plan_scaling
+
+
+def mk_nodes(*statuses):
+    return [Mock(status=status) for status in statuses]
+
+
+def test_plan_scaling_up():
+    nodes = mk_nodes(NodeStatus.RUNNING, NodeStatus.RUNNING)
+    plan = plan_scaling(nodes, 5)
+    assert plan.keep == nodes
+    assert plan.remove == []
+    assert plan.n_add == 3
+
+
+def test_plan_scaling_down_removes_newest():
+    nodes = mk_nodes(NodeStatus.RUNNING, NodeStatus.RUNNING, NodeStatus.RUNNING)
+    plan = plan_scaling(nodes, 1)
+    assert plan.keep == nodes[:1]
+    assert plan.remove == nodes[1:]
+    assert plan.n_add == 0
+
+
+def test_plan_scaling_replaces_unhealthy_nodes():
+    nodes = mk_nodes(NodeStatus.FAILED, NodeStatus.RUNNING, NodeStatus.RUNNING)
+    # Same size, but the failed node gets replaced
+    plan = plan_scaling(nodes, 3)
+    assert plan.keep == nodes[1:]
+    assert plan.remove == nodes[:1]
+    assert plan.n_add == 1
+    # Scaling down removes the failed node first
+    plan = plan_scaling(nodes, 2)
+    assert plan.keep == nodes[1:]
+    assert plan.remove == nodes[:1]
+    assert plan.n_add == 0
+
+
+def test_plan_scaling_noop():
+    nodes = mk_nodes(NodeStatus.RUNNING, NodeStatus.RUNNING)
+    assert plan_scaling(nodes, 2).is_noop
+    with pytest.raises(ValueError):
+        plan_scaling(nodes, -1)
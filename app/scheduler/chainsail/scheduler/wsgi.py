@@ -5,8 +5,14 @@
 ####################
 from chainsail.scheduler.app import app
 from chainsail.scheduler.core import db
+from chainsail.scheduler.db import create_missing_indexes, upgrade_columns
+from chainsail.scheduler.tasks import replenish_pool_task, warm_pool
 
 db.create_all()
+upgrade_columns()
+create_missing_indexes()
+if warm_pool.enabled:
+    replenish_pool_task.apply_async()
 
 if __name__ == "__main__":
     ####################
@@ -2,6 +2,20 @@
 
 set -ex
 
+# Pods in the scheduler's warm pool are started before they are assigned to a
+# job. The job-specific configuration is mounted into USER_JOB_CONFIG_DIR once
+# the pod has been assigned.
+if [ -n "$USER_JOB_CONFIG_DIR" ]
+then
+      echo "Waiting for job configuration in $USER_JOB_CONFIG_DIR"
+      while [ ! -f "$USER_JOB_CONFIG_DIR/prob_url" ]
+      do
+            sleep 1
+      done
+      export USER_PROB_URL=$(cat "$USER_JOB_CONFIG_DIR/prob_url")
+      export USER_INSTALL_SCRIPT="$USER_JOB_CONFIG_DIR/install_job_deps.sh"
+fi
+
 # Allow for fetching of user-defined zip file with data / PDF 
 if [ -z "$USER_PROB_URL" ]
 then
@@ -0,0 +1,144 @@
+"""
+Concatenation of a replica's batches of samples into a single .npy file
+"""
+import argparse
+import logging
+import os
+
+import numpy as np
+from chainsail.common.storage import LocalStorageBackend, SimulationStorage, load_storage_config
+
+logger = logging.getLogger(__name__)
+
+
+def _truncate(path, n_rows, chunk_size=10000):
+    """Shrinks a .npy file to its first `n_rows` rows without loading it into memory."""
+    partial = np.load(path, mmap_mode="r")
+    tmp_path = f"{path}.tmp"
+    truncated = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=partial.dtype, shape=(n_rows,) + partial.shape[1:]
+    )
+    for i in range(0, n_rows, chunk_size):
+        end = min(i + chunk_size, n_rows)
+        truncated[i:end] = partial[i:end]
+    truncated.flush()
+    del truncated, partial
+    os.replace(tmp_path, path)
+
+
+def concatenate_samples(storage: SimulationStorage, out, replica=1, burn_in=0, thin=1):
+    """
+    Writes the samples of a replica into a single .npy file.
+
+    Batches are loaded one at a time and written into a preallocated,
+    memory-mapped output file, so the samples never need to fit into memory
+    as a whole. If the simulation did not run to completion, all samples up
+    to the first missing batch are written.
+
+    Args:
+        storage(:class:`SimulationStorage`): storage of the simulation run
+          whose samples to concatenate
+        out(str): path of the output .npy file
+        replica(int): number of the replica whose samples to concatenate.
+          Replica 1 samples the target distribution.
+        burn_in(int): number of initial samples to discard
+        thin(int): only every `thin`-th sample after the burn-in is written
+
+    Returns:
+        int: the number of samples written
+    """
+    if burn_in < 0 or thin < 1:
+        raise ValueError("Burn-in has to be non-negative and thinning positive")
+    config = storage.load_config()
+    n_iterations = config["general"]["n_iterations"]
+    dump_interval = config["re"]["dump_interval"]
+    replica_name = f"replica{replica}"
+    n_selected = len(range(burn_in, n_iterations, thin))
+
+    output = None
+    n_written = 0
+    for start in range(0, n_iterations, dump_interval):
+        if start + dump_interval <= burn_in:
+            continue
+        batch = storage.load_samples(
+            replica_name, start, start + dump_interval, fail_if_not_existing=False
+        )
+        if len(batch) == 0:
+            logger.warning(
+                f"No samples found for {replica_name} from sample {start} on. "
+                "The simulation might not have run to completion."
+            )
+            break
+        batch = np.asarray(batch)
+        # Index of the first sample in this batch which is to be kept
+        first = max(start, burn_in)
+        first += (burn_in - first) % thin
+        selected = batch[first - start :: thin][: n_selected - n_written]
+        if output is None:
+            output = np.lib.format.open_memmap(
+                out, mode="w+", dtype=batch.dtype, shape=(n_selected,) + batch.shape[1:]
+            )
+        output[n_written : n_written + len(selected)] = selected
+        n_written += len(selected)
+
+    if output is None:
+        raise ValueError(f"No samples found for {replica_name} in {storage.sim_path}")
+    output.flush()
+    del output
+    if n_written < n_selected:
+        _truncate(out, n_written)
+    return n_written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Concatenate batches of MCMC samples of a replica into a single .npy file"
+    )
+    parser.add_argument("out", type=str, help="Output file")
+    parser.add_argument(
+        "--dirname",
+        type=str,
+        default=".",
+        help="Directory containing the simulation runs. Default: current directory",
+    )
+    parser.add_argument(
+        "--simulation-run",
+        type=str,
+        default="production_run",
+        help='Simulation run, e.g. "optimization_run1" or "production_run". '
+        'Default: "production_run"',
+    )
+    parser.add_argument(
+        "--replica",
+        type=int,
+        default=1,
+        help="Replica whose samples to concatenate. Replica 1 samples the target "
+        "distribution. Default: 1",
+    )
+    parser.add_argument(
+        "--burn-in", type=int, default=0, help="Number of initial samples to discard. Default: 0"
+    )
+    parser.add_argument(
+        "--thin", type=int, default=1, help="Keep only every n-th sample. Default: 1"
+    )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        default=None,
+        help="Storage backend YAML config file for reading results from cloud storage. "
+        "Default: read from the local file system",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.storage:
+        backend = load_storage_config(args.storage).get_storage_backend()
+    else:
+        backend = LocalStorageBackend()
+    storage = SimulationStorage(args.dirname, args.simulation_run, backend)
+    n_written = concatenate_samples(storage, args.out, args.replica, args.burn_in, args.thin)
+    logger.info(f"Wrote {n_written} samples to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -49,6 +49,8 @@ class RemoteLoggingConfig:
     log_level: str = "INFO"
     port: int = 80
     buffer_size: int = 5
+    flush_interval: float = 2.0
+    max_queue_size: int = 1000
     format_string: str = "[%(levelname)s] %(asctime)s - %(message)s"
 
 
@@ -58,6 +60,8 @@ class RemoteLoggingConfigSchema(Schema):
     log_level = fields.String()
     port = fields.Integer()
     buffer_size = fields.Integer()
+    flush_interval = fields.Float()
+    max_queue_size = fields.Integer()
     format_string = fields.String()
 
     @post_load
@@ -2,9 +2,13 @@
 Controller logging functionality
 """
 import json
+from collections import defaultdict
 from datetime import datetime
 import logging
-from logging.handlers import MemoryHandler
+import os
+import queue
+import threading
+import time
 from math import floor
 
 import yaml
@@ -40,25 +44,36 @@ class GraphiteHTTPHandler(logging.Handler):
             self.tags = tags
         self.job_id = job_id
 
+    def _get_job_id(self, record: logging.LogRecord):
+        """Determines the job ID to tag an event with or None if the record
+        should not be logged to Graphite."""
+        if self.job_id is not None:
+            # use job ID attribute
+            job_id = str(self.job_id)
+            if record.job_id != "n/a" and record.job_id != job_id:
+                raise ValueError("Inconsistent job IDs during log emission")
+            return job_id
+        elif record.job_id != NO_JOB_ID:
+            # use job ID in log record
+            return record.job_id
+        else:
+            # no job id given: don't log to Graphite
+            return None
+
+    def _make_payload(self, levelname: str, job_id: str, data: str) -> dict:
+        return {
+            "what": self.what,
+            "tags": self.tags + [levelname, f"job{job_id}"],
+            "when": floor(datetime.utcnow().timestamp()),
+            "data": data,
+        }
+
     def emit(self, record: logging.LogRecord):
         try:
-            if self.job_id is not None:
-                # use job ID attribute
-                job_id = str(self.job_id)
-                if record.job_id != "n/a" and record.job_id != job_id:
-                    raise ValueError("Inconsistent job IDs during log emission")
-            elif record.job_id != NO_JOB_ID:
-                # use job ID in log record
-                job_id = record.job_id
-            else:
-                # no job id given: don't log to Graphite
+            job_id = self._get_job_id(record)
+            if job_id is None:
                 return
-            payload = {
-                "what": self.what,
-                "tags": self.tags + [record.levelname, f"job{job_id}"],
-                "when": floor(datetime.utcnow().timestamp()),
-                "data": self.format(record),
-            }
+            payload = self._make_payload(record.levelname, job_id, self.format(record))
             response = requests.post(
                 url=self.url,
                 data=json.dumps(payload),
@@ -69,6 +84,140 @@ class GraphiteHTTPHandler(logging.Handler):
             self.handleError(record)
 
 
+class BatchingGraphiteHTTPHandler(GraphiteHTTPHandler):
+    """A non-blocking logging handler for writing Graphite events.
+
+    Formatted records are put in a bounded queue and sent by a background
+    thread, which combines all records with the same level and job ID
+    collected within `flush_interval` seconds (or up to `batch_size` records)
+    into a single Graphite event. Requests are made through a single
+    keep-alive session. If the queue is full, records are dropped and the
+    number of dropped records is reported with the next event.
+
+    Args:
+        url: The graphite events url
+        what: The name of the event
+        tags: An optional list of tags to give the event
+        timeout: Request timeout in seconds
+        batch_size: Maximum number of records combined into a single event
+        flush_interval: Maximum time in seconds a record waits before being sent
+        max_queue_size: Maximum number of records waiting to be sent
+    """
+
+    def __init__(
+        self,
+        url: str,
+        what="log",
+        tags=None,
+        timeout=5,
+        job_id=None,
+        batch_size=50,
+        flush_interval=2.0,
+        max_queue_size=1000,
+    ):
+        super().__init__(url, what=what, tags=tags, timeout=timeout, job_id=job_id)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._worker_lock = threading.Lock()
+        self._worker_pid = None
+        self._queue = None
+        self._worker = None
+        self._session = None
+        self._dropped = 0
+
+    def _ensure_worker(self):
+        # The worker thread (and the session) don't survive a fork, so a new
+        # one is started in every process this handler is used in.
+        with self._worker_lock:
+            if self._worker_pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue_size)
+            self._session = requests.Session()
+            self._dropped = 0
+            self._worker = threading.Thread(target=self._work, daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            job_id = self._get_job_id(record)
+            if job_id is None:
+                return
+            self._ensure_worker()
+            self._queue.put_nowait((record.levelname, job_id, self.format(record)))
+        except queue.Full:
+            self._dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _next_batch(self):
+        """Waits for records and collects them into a batch.
+
+        Returns:
+            list: (level name, job ID, formatted record) tuples; None
+              signals that the worker should stop
+        """
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # send what we have, then stop
+                self._queue.put_nowait(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _send(self, batch):
+        grouped = defaultdict(list)
+        for levelname, job_id, data in batch:
+            grouped[(levelname, job_id)].append(data)
+        dropped, self._dropped = self._dropped, 0
+        for (levelname, job_id), lines in grouped.items():
+            if dropped:
+                lines.append(f"({dropped} log messages were dropped)")
+                dropped = 0
+            payload = self._make_payload(levelname, job_id, "\n".join(lines))
+            try:
+                response = self._session.post(
+                    url=self.url, data=json.dumps(payload), timeout=self.timeout
+                )
+                response.raise_for_status()
+            except Exception:
+                # There is no single log record to pass to handleError()
+                # and failing to log must not crash the worker
+                pass
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._send(batch)
+
+    def close(self):
+        """Sends all queued records and stops the background thread."""
+        with self._worker_lock:
+            worker = self._worker if self._worker_pid == os.getpid() else None
+        if worker is not None and worker.is_alive():
+            try:
+                self._queue.put(None, timeout=self.timeout)
+                worker.join(timeout=self.timeout)
+            except queue.Full:
+                pass
+        super().close()
+
+
 def configure_logging(
     logger_name, log_level, remote_logging_config_path, format_string=None, job_id=None
 ):
@@ -107,16 +256,18 @@ def configure_logging(
         with open(remote_logging_config_path) as f:
             config = RemoteLoggingConfigSchema().load(yaml.safe_load(f))
 
-        # Add graphite remote logging
-        graphite_handler = GraphiteHTTPHandler(
+        # Add graphite remote logging. Records are sent in batches by a
+        # background thread to avoid making excessive (and blocking) calls
+        graphite_handler = BatchingGraphiteHTTPHandler(
             url=f"http://{config.address}:{config.port}/events",
             what="log",
             tags=["log"],
             job_id=job_id,
+            batch_size=config.buffer_size,
+            flush_interval=config.flush_interval,
+            max_queue_size=config.max_queue_size,
         )
         graphite_handler.setFormatter(logging.Formatter(config.format_string, datefmt="%H:%M"))
-        # Use buffering to avoid having to making excessive calls
-        buffered_graphite_handler = MemoryHandler(config.buffer_size, target=graphite_handler)
 
         # don't log debug messages to Graphite - they might contain internal
         # IP addresses / info about the service architecture
@@ -124,5 +275,5 @@ def configure_logging(
             def filter(self, log_record):
                 return log_record.levelno >= logging.INFO
 
-        buffered_graphite_handler.addFilter(InfoFilter())
-        base_logger.addHandler(buffered_graphite_handler)
+        graphite_handler.addFilter(InfoFilter())
+        base_logger.addHandler(graphite_handler)
@@ -10,8 +10,11 @@ from chainsail.common.samplers import AbstractSampler
 
 HMCSampleStats = namedtuple("HMCSampleStats", "accepted stepsize neg_log_prob")
 
+MULTIPLICATIVE_ADAPTION = "multiplicative"
+DUAL_AVERAGING_ADAPTION = "dual_averaging"
 
-def _leapfrog(q, p, gradient, stepsize, num_steps):
+
+def _leapfrog(q, p, gradient, stepsize, num_steps, inverse_mass=1.0):
     """
     Performs leap frog integration of Hamiltonian dynamics guided
     by the gradient of a potential energy
@@ -19,6 +22,7 @@ def _leapfrog(q, p, gradient, stepsize, num_steps):
     Args:
       q(np.ndarray): initial position
       p(np.ndarray): initial momentum
+      inverse_mass(float or np.ndarray): (diagonal of the) inverse mass matrix
 
     Returns:
       np.ndarray: position at the end of the trajectory
@@ -27,19 +31,124 @@ def _leapfrog(q, p, gradient, stepsize, num_steps):
     p -= 0.5 * stepsize * gradient(q)
 
     for i in range(num_steps - 1):
-        q += p * stepsize
+        q += inverse_mass * p * stepsize
         p -= stepsize * gradient(q)
 
-    q += p * stepsize
+    q += inverse_mass * p * stepsize
     p -= 0.5 * stepsize * gradient(q)
 
     return q, p
 
 
+class DualAveragingStepsizeAdapter:
+    """
+    Adapts a stepsize to reach a target acceptance rate using the dual
+    averaging scheme from Hoffman & Gelman (2014), "The No-U-Turn Sampler",
+    Section 3.2.
+    """
+
+    def __init__(self, stepsize, target_acceptance=0.65, gamma=0.05, t0=10, kappa=0.75):
+        """
+        Initializes a dual averaging stepsize adapter.
+
+        Args:
+          stepsize(float): initial stepsize
+          target_acceptance(float): acceptance rate to adapt towards
+          gamma(float): controls the amount of shrinkage towards `mu`
+          t0(float): stabilizes the first few iterations
+          kappa(float): decay rate of the weights of the averaged stepsize
+        """
+        self._target_acceptance = target_acceptance
+        self._gamma = gamma
+        self._t0 = t0
+        self._kappa = kappa
+        self.restart(stepsize)
+
+    def restart(self, stepsize, mu=None):
+        """
+        Restarts adaption from the given stepsize.
+
+        Args:
+          stepsize(float): stepsize to start from
+          mu(float): log-stepsize towards which iterates are shrunk. Defaults
+              to log(10 * stepsize), which favors large stepsizes early on.
+        """
+        self.stepsize = stepsize
+        self._mu = np.log(10 * stepsize) if mu is None else mu
+        self._log_stepsize_avg = np.log(stepsize)
+        self._h_avg = 0.0
+        self._t = 0
+
+    @property
+    def final_stepsize(self):
+        """The averaged stepsize, which is to be used once adaption is over."""
+        return np.exp(self._log_stepsize_avg)
+
+    def update(self, acceptance_probability):
+        """
+        Updates the stepsize given the Metropolis acceptance probability of
+        the last move.
+
+        Args:
+          acceptance_probability(float): acceptance probability of last move
+
+        Returns:
+          float: the updated stepsize
+        """
+        self._t += 1
+        w = 1.0 / (self._t + self._t0)
+        self._h_avg = (1 - w) * self._h_avg + w * (
+            self._target_acceptance - acceptance_probability
+        )
+        log_stepsize = self._mu - np.sqrt(self._t) / self._gamma * self._h_avg
+        eta = self._t ** (-self._kappa)
+        self._log_stepsize_avg = eta * log_stepsize + (1 - eta) * self._log_stepsize_avg
+        self.stepsize = np.exp(log_stepsize)
+
+        return self.stepsize
+
+
+class DiagonalMassMatrixEstimator:
+    """
+    Estimates a diagonal inverse mass matrix from the variances of samples
+    using Welford's online algorithm.
+    """
+
+    def __init__(self, dim):
+        self._n = 0
+        self._mean = np.zeros(dim)
+        self._m2 = np.zeros(dim)
+
+    def update(self, x):
+        """Adds a sample to the running variance estimate."""
+        self._n += 1
+        delta = x - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (x - self._mean)
+
+    def estimate(self):
+        """
+        Returns the current estimate of the inverse mass matrix diagonal.
+
+        Like Stan, this regularizes the sample variance towards a small value
+        to be robust to a low number of samples.
+        """
+        n = self._n
+        if n < 2:
+            return np.ones_like(self._mean)
+        variance = self._m2 / (n - 1)
+        return (n / (n + 5.0)) * variance + 1e-3 * (5.0 / (n + 5.0))
+
+
 class BasicHMCSampler(AbstractSampler):
     """
-    A naive HMC sampler with unit mass matrix and a simple stepsize
-    adaption scheme.
+    A naive HMC sampler with a diagonal mass matrix and stepsize adaption.
+
+    The stepsize is adapted either by dual averaging or by a simple
+    multiplicative scheme. Optionally, the diagonal of the inverse mass
+    matrix is estimated from the samples of the first half of the adaption
+    phase. The final stepsize and mass matrix are exposed via
+    `adaption_state` such that a subsequent simulation can start from them.
     """
 
     def __init__(
@@ -51,6 +160,10 @@ class BasicHMCSampler(AbstractSampler):
         num_adaption_samples=0,
         adaption_uprate=1.05,
         adaption_downrate=0.95,
+        adaption_scheme=DUAL_AVERAGING_ADAPTION,
+        adaption_target_acceptance=0.65,
+        adapt_mass_matrix=False,
+        adaption_state=None,
         integrator=_leapfrog,
     ):
         """
@@ -68,15 +181,44 @@ class BasicHMCSampler(AbstractSampler):
               size in case of rejected move
           adaption_downrate: factor with which to multiply current stepsize in
               case of accepted move
+          adaption_scheme(str): either "dual_averaging" or "multiplicative";
+              the latter uses `adaption_uprate` and `adaption_downrate`
+          adaption_target_acceptance(float): acceptance rate targeted by
+              dual averaging
+          adapt_mass_matrix(bool): whether to estimate a diagonal mass
+              matrix during the first half of the adaption phase
+          adaption_state(dict): adaption state of a previous simulation as
+              returned by `adaption_state`. If given, sampling starts from its
+              stepsize and inverse mass matrix and dual averaging shrinks
+              towards that stepsize instead of a ten times larger one.
           integrator(callable): function which performs symplectic integration
         """
         super().__init__(pdf, state)
+        if adaption_scheme not in (MULTIPLICATIVE_ADAPTION, DUAL_AVERAGING_ADAPTION):
+            raise ValueError(f"Unknown stepsize adaption scheme: {adaption_scheme}")
         self._stepsize = stepsize
+        self._inverse_mass = np.ones(state.shape)
+        if adaption_state is not None:
+            self._stepsize = adaption_state["stepsize"]
+            if adaption_state.get("inverse_mass") is not None:
+                self._inverse_mass = np.array(adaption_state["inverse_mass"], dtype=float)
         self._num_steps = num_steps
         self._num_adaption_samples = num_adaption_samples
         self._adaption_uprate = adaption_uprate
         self._adaption_downrate = adaption_downrate
+        self._adaption_scheme = adaption_scheme
+        self._stepsize_adapter = None
+        if adaption_scheme == DUAL_AVERAGING_ADAPTION:
+            self._stepsize_adapter = DualAveragingStepsizeAdapter(
+                self._stepsize, adaption_target_acceptance
+            )
+            if adaption_state is not None:
+                self._stepsize_adapter.restart(self._stepsize, mu=np.log(self._stepsize))
+        self._mass_matrix_estimator = None
+        if adapt_mass_matrix:
+            self._mass_matrix_estimator = DiagonalMassMatrixEstimator(state.shape)
         self._last_move_accepted = 0
+        self._last_acceptance_probability = 0.0
         self._n_accepted = 0
         self._samples_counter = 0
 
@@ -100,28 +242,38 @@ class BasicHMCSampler(AbstractSampler):
           np.ndarray: momentum at the end of the trajectory
         """
         return _leapfrog(
-            q, p, lambda x: -self.pdf.log_prob_gradient(x), self._stepsize, self._num_steps
+            q,
+            p,
+            lambda x: -self.pdf.log_prob_gradient(x),
+            self._stepsize,
+            self._num_steps,
+            self._inverse_mass,
         )
 
     def _total_energy(self, q, p):
-        return -self._pdf.log_prob(q) + 0.5 * np.sum(p**2)
+        return -self._pdf.log_prob(q) + 0.5 * np.sum(self._inverse_mass * p**2)
 
     def sample(self):
         """Draws a single sample."""
         q = self.state.copy()
-        p = np.random.normal(size=q.shape)
+        p = np.random.normal(size=q.shape) / np.sqrt(self._inverse_mass)
 
         E_old = self._total_energy(q, p)
         q, p = self._integrate(q, p)
-        E_new = self._total_energy(q, p)  #
-        accepted = np.log(np.random.uniform()) < -(E_new - E_old)
+        E_new = self._total_energy(q, p)
+        log_acceptance_probability = -(E_new - E_old)
+        accepted = np.log(np.random.uniform()) < log_acceptance_probability
 
         if accepted:
             self.state = q
 
         self._last_move_accepted = accepted
+        if np.isnan(log_acceptance_probability):
+            self._last_acceptance_probability = 0.0
+        else:
+            self._last_acceptance_probability = np.exp(min(0.0, log_acceptance_probability))
         if self._samples_counter < self._num_adaption_samples:
-            self._adapt_stepsize()
+            self._adapt()
         self._samples_counter += 1
 
         return self.state
@@ -143,6 +295,38 @@ class BasicHMCSampler(AbstractSampler):
             )
         }
 
+    @property
+    def adaption_state(self):
+        """Returns the adapted stepsize and inverse mass matrix diagonal.
+
+        Returns:
+          dict: stepsize under the "stepsize" key and inverse mass matrix
+              diagonal under the "inverse_mass" key
+        """
+        return {"stepsize": float(self._stepsize), "inverse_mass": self._inverse_mass.copy()}
+
+    def _adapt(self):
+        """
+        Performs a single adaption step of the mass matrix and the stepsize.
+        """
+        if self._mass_matrix_estimator is not None:
+            window_end = self._num_adaption_samples // 2
+            if self._samples_counter < window_end:
+                self._mass_matrix_estimator.update(self.state)
+            elif self._samples_counter == window_end:
+                self._inverse_mass = self._mass_matrix_estimator.estimate()
+                # the stepsize adapted so far was adapted to a different mass
+                # matrix, so adaption has to start afresh
+                if self._stepsize_adapter is not None:
+                    self._stepsize_adapter.restart(self._stepsize)
+
+        if self._stepsize_adapter is None:
+            self._adapt_stepsize()
+            return
+        self._stepsize = self._stepsize_adapter.update(self._last_acceptance_probability)
+        if self._samples_counter == self._num_adaption_samples - 1:
+            self._stepsize = self._stepsize_adapter.final_stepsize
+
     def _adapt_stepsize(self):
         """
         Increases / decreasese the leap frog stepsize depending on
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import List, Optional, Set, Union
 
-from marshmallow import Schema, fields, post_dump, post_load, pre_dump
+from marshmallow import Schema, fields, post_dump, post_load, pre_dump, validate
 from marshmallow_enum import EnumField
 
 
@@ -30,6 +30,11 @@ class Dependencies(ABC):
     def installation_script(self) -> str:
         pass
 
+    @abstractmethod
+    def installation_script_into(self, target_dir: str) -> str:
+        """The installation script, installing into `target_dir` instead of the environment"""
+        pass
+
     def __eq__(self, other) -> bool:
         return self.type == other.type and self.packages == other.packages
 
@@ -55,6 +60,23 @@ class PipDependencies(Dependencies):
         else:
             return ""
 
+    def installation_script_into(self, target_dir: str) -> str:
+        if not self.packages:
+            return ""
+        # `--target` ignores the packages of the environment, so all
+        # dependencies of the packages would be installed again at their
+        # newest versions and shadow those of the environment. Constraining
+        # them to the installed versions keeps the two consistent.
+        packages = " ".join(self.packages)
+        return "\n".join(
+            [
+                "PIP_CONSTRAINTS=$(mktemp)",
+                'pip list --format=freeze > "$PIP_CONSTRAINTS"',
+                f'pip install --target {target_dir} -c "$PIP_CONSTRAINTS" {packages}',
+                'rm -f "$PIP_CONSTRAINTS"',
+            ]
+        )
+
 
 def _load_dep(dep_type: str, pkgs: List[str]):
     if dep_type == DependenciesType.PIP:
@@ -91,6 +113,9 @@ class NaiveHMCParameters:
     num_adaption_samples: Optional[int] = None
     adaption_uprate: float = 1.05
     adaption_downrate: float = 0.95
+    adaption_scheme: str = "dual_averaging"
+    adaption_target_acceptance: float = 0.65
+    adapt_mass_matrix: bool = False
 
 
 @dataclass
@@ -124,6 +149,7 @@ class OptimizationParameters:
     max_optimization_runs: int = 5
     dos_burnin_percentage: float = 0.2
     dos_thinning_step: int = 20
+    dos_pool_runs: bool = False
 
 
 @dataclass
@@ -165,6 +191,7 @@ class OptimizationParametersSchema(Schema):
     max_optimization_runs = fields.Int()
     dos_burnin_percentage = fields.Float()
     dos_thinning_step = fields.Int()
+    dos_pool_runs = fields.Bool()
 
     @post_load
     def make_optimization_parameters(self, data, **kwargs):
@@ -177,6 +204,9 @@ class NaiveHMCParametersSchema(Schema):
     num_adaption_samples = fields.Int()
     adaption_uprate = fields.Float()
     adaption_downrate = fields.Float()
+    adaption_scheme = fields.Str(validate=validate.OneOf(["dual_averaging", "multiplicative"]))
+    adaption_target_acceptance = fields.Float()
+    adapt_mass_matrix = fields.Bool()
 
     @post_dump
     def remove_nulls(self, data, *args, **kwargs):
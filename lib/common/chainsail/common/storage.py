@@ -24,6 +24,8 @@ dir_structure = dict(
     ENERGIES_TEMPLATE="energies/energies_{}_{}-{}.pickle",
     INITIAL_STEPSIZES_FILE_NAME="initial_stepsizes.pickle",
     FINAL_STEPSIZES_FILE_NAME="final_stepsizes.pickle",
+    INITIAL_ADAPTION_STATES_FILE_NAME="initial_adaption_states.pickle",
+    FINAL_ADAPTION_STATE_TEMPLATE="adaption_states/adaption_state_{}.pickle",
     INITIAL_STATES_FILE_NAME="initial_states.pickle",
     DOS_FILE_NAME="dos.pickle",
     SCHEDULE_FILE_NAME="schedule.pickle",
@@ -196,8 +198,11 @@ class LocalStorageBackend(AbstractStorageBackend):
         elif data_type == "text":
             with open(file_name, "w") as f:
                 f.write(data)
+        elif data_type == "bytes":
+            with open(file_name, "wb") as f:
+                f.write(data)
         else:
-            raise ValueError("'data_type' has to be either 'text' or 'pickle'")
+            raise ValueError("'data_type' has to be one of 'text', 'pickle' or 'bytes'")
 
     def load(self, file_name, data_type="pickle"):
         if data_type == "pickle":
@@ -206,8 +211,11 @@ class LocalStorageBackend(AbstractStorageBackend):
         elif data_type == "text":
             with open(file_name, "r") as f:
                 return f.read()
+        elif data_type == "bytes":
+            with open(file_name, "rb") as f:
+                return f.read()
         else:
-            raise ValueError("'data_type' has to be either 'text' or 'pickle'")
+            raise ValueError("'data_type' has to be one of 'text', 'pickle' or 'bytes'")
 
     @property
     def file_not_found_exception(self):
@@ -249,8 +257,10 @@ class CloudStorageBackend(AbstractStorageBackend):
             stream = StringIO(data)
         elif data_type == "pickle":
             stream = pickle_to_stream(data)
+        elif data_type == "bytes":
+            stream = BytesIO(data)
         else:
-            raise ValueError("'data_type' has to be either 'text' or 'pickle'")
+            raise ValueError("'data_type' has to be one of 'text', 'pickle' or 'bytes'")
         self._driver.upload_object_via_stream(stream, self._container, file_name)
 
     def load(self, file_name, data_type="pickle"):
@@ -272,8 +282,10 @@ class CloudStorageBackend(AbstractStorageBackend):
             return load(bytes_iterator_to_bytesio(stream))
         elif data_type == "text":
             return bytes_iterator_to_stringio(stream).read()
+        elif data_type == "bytes":
+            return bytes_iterator_to_bytesio(stream).read()
         else:
-            raise ValueError("'data_type' has to be either 'text' or 'pickle'")
+            raise ValueError("'data_type' has to be one of 'text', 'pickle' or 'bytes'")
 
     @property
     def file_not_found_exception(self):
@@ -440,6 +452,36 @@ class SimulationStorage:
     def load_final_stepsizes(self):
         return self.load(self.dir_structure.FINAL_STEPSIZES_FILE_NAME)
 
+    def save_initial_adaption_states(self, adaption_states):
+        self.save(adaption_states, self.dir_structure.INITIAL_ADAPTION_STATES_FILE_NAME)
+
+    def load_initial_adaption_states(self):
+        return self.load(self.dir_structure.INITIAL_ADAPTION_STATES_FILE_NAME)
+
+    def save_final_adaption_state(self, adaption_state, replica_name):
+        self.save(
+            adaption_state, self.dir_structure.FINAL_ADAPTION_STATE_TEMPLATE.format(replica_name)
+        )
+
+    def load_all_final_adaption_states(self):
+        """
+        Loads the local sampler adaption states of all replicas.
+
+        Returns:
+          list: adaption states ordered by replica, or None if not all
+              replicas wrote one (e.g., because their sampler does not
+              support it)
+        """
+        n_replicas = self.load_config()["general"]["num_replicas"]
+        states = []
+        for r in range(1, n_replicas + 1):
+            file_name = self.dir_structure.FINAL_ADAPTION_STATE_TEMPLATE.format("replica" + str(r))
+            try:
+                states.append(self.load(file_name))
+            except self._storage_backend.file_not_found_exception:
+                return None
+        return states
+
     def save_initial_states(self, initial_states):
         self.save(initial_states, self.dir_structure.INITIAL_STATES_FILE_NAME)
 
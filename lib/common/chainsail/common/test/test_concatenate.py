@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from chainsail.common.concatenate import concatenate_samples
+from chainsail.common.storage import LocalStorageBackend, SimulationStorage
+
+
+def mk_storage(tmp_path, n_iterations=100, dump_interval=20, n_dumped=100):
+    storage = SimulationStorage(str(tmp_path), "production_run", LocalStorageBackend())
+    storage.save_config(
+        {
+            "general": {"num_replicas": 2, "n_iterations": n_iterations},
+            "re": {"dump_interval": dump_interval},
+        }
+    )
+    for r in (1, 2):
+        for n in range(0, n_dumped, dump_interval):
+            # Each sample holds its index and the replica number
+            batch = np.stack([np.arange(n, n + dump_interval), np.full(dump_interval, r)], axis=1)
+            storage.save_samples(batch, f"replica{r}", n, n + dump_interval)
+    return storage
+
+
+def test_concatenate_samples(tmp_path):
+    storage = mk_storage(tmp_path)
+    out = str(tmp_path / "samples.npy")
+
+    assert concatenate_samples(storage, out, replica=2) == 100
+    samples = np.load(out)
+    assert samples.shape == (100, 2)
+    assert np.all(samples[:, 0] == np.arange(100))
+    assert np.all(samples[:, 1] == 2)
+
+
+@pytest.mark.parametrize("burn_in,thin", [(0, 3), (25, 1), (25, 7), (40, 20), (99, 5)])
+def test_concatenate_samples_burn_in_and_thinning(tmp_path, burn_in, thin):
+    storage = mk_storage(tmp_path)
+    out = str(tmp_path / "samples.npy")
+
+    concatenate_samples(storage, out, burn_in=burn_in, thin=thin)
+    assert np.all(np.load(out)[:, 0] == np.arange(burn_in, 100, thin))
+
+
+def test_concatenate_samples_incomplete(tmp_path):
+    storage = mk_storage(tmp_path, n_dumped=60)
+    out = str(tmp_path / "samples.npy")
+
+    assert concatenate_samples(storage, out, thin=2) == 30
+    assert np.all(np.load(out)[:, 0] == np.arange(0, 60, 2))
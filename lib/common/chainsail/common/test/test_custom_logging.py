@@ -0,0 +1,45 @@
+import json
+import logging
+from unittest.mock import patch
+
+from chainsail.common.custom_logging import BatchingGraphiteHTTPHandler
+
+
+def _make_record(msg, levelno=logging.INFO, job_id="1"):
+    record = logging.LogRecord("chainsail.test", levelno, __file__, 0, msg, None, None)
+    record.job_id = job_id
+    return record
+
+
+@patch("chainsail.common.custom_logging.requests.Session")
+def test_batching_graphite_handler(mock_session_cls):
+    session = mock_session_cls.return_value
+    handler = BatchingGraphiteHTTPHandler(
+        "http://graphite/events", batch_size=10, flush_interval=60.0
+    )
+    handler.emit(_make_record("first"))
+    handler.emit(_make_record("second"))
+    handler.emit(_make_record("problem", levelno=logging.ERROR))
+    # records without job ID don't get logged
+    handler.emit(_make_record("no job", job_id="n/a"))
+    handler.close()
+
+    payloads = [json.loads(c.kwargs["data"]) for c in session.post.call_args_list]
+    assert len(payloads) == 2
+    assert payloads[0]["data"] == "first\nsecond"
+    assert payloads[0]["tags"] == ["log", "INFO", "job1"]
+    assert payloads[1]["data"] == "problem"
+    assert payloads[1]["tags"] == ["log", "ERROR", "job1"]
+
+
+@patch("chainsail.common.custom_logging.requests.Session")
+def test_batching_graphite_handler_drops_when_full(mock_session_cls):
+    handler = BatchingGraphiteHTTPHandler(
+        "http://graphite/events", batch_size=10, flush_interval=60.0, max_queue_size=2
+    )
+    # Keep the worker from consuming records while the queue fills up
+    with patch.object(handler, "_work"):
+        for i in range(5):
+            handler.emit(_make_record(f"message {i}"))
+    assert handler._dropped == 3
+    assert handler._queue.qsize() == 2
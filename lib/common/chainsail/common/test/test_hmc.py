@@ -72,6 +72,49 @@ class TestSamplers(unittest.TestCase):
         # practically zero, so stepsize adaption is not useful here.
         self._test_sampling(hmc, num_samples=10000, test_adaption=False)
 
+    def test_hmc_dual_averaging(self):
+        # a scaled normal distribution, for which a unit mass matrix is a
+        # bad choice
+        scales = np.array([1.0, 10.0])
+
+        class ScaledNormal(AbstractPDF):
+            def log_prob(self, x):
+                return -0.5 * np.sum((x / scales) ** 2)
+
+            def log_prob_gradient(self, x):
+                return -x / scales**2
+
+        hmc = BasicHMCSampler(
+            ScaledNormal(),
+            np.array([1.0, 1.0]),
+            0.01,
+            10,
+            2000,
+            adaption_target_acceptance=0.65,
+            adapt_mass_matrix=True,
+        )
+        stats = []
+        for _ in range(6000):
+            hmc.sample()
+            stats.append(hmc.last_draw_stats["x"])
+        acceptance_rate = np.mean([x.accepted for x in stats[2000:]])
+        self.assertTrue(0.5 < acceptance_rate < 0.85)
+        state = hmc.adaption_state
+        self.assertEqual(state["stepsize"], stats[-1].stepsize)
+        # estimated inverse mass matrix should reflect the variances
+        mass_ratio = state["inverse_mass"][1] / state["inverse_mass"][0]
+        self.assertTrue(20 < mass_ratio < 500)
+
+        # a sampler started from an adaption state uses it right away
+        warm_hmc = BasicHMCSampler(
+            ScaledNormal(), np.array([1.0, 1.0]), 0.01, 10, 0, adaption_state=state
+        )
+        warm_hmc.sample()
+        self.assertEqual(warm_hmc.last_draw_stats["x"].stepsize, state["stepsize"])
+        self.assertTrue(
+            np.allclose(warm_hmc.adaption_state["inverse_mass"], state["inverse_mass"])
+        )
+
     def test_rwmc_sampler(self):
         rwmc = RWMCSampler(self._pdf, self._initial_state.copy(), 2.0, 15000, 1.02, 0.98)
         self._test_sampling(rwmc, num_samples=50000, test_adaption=True)
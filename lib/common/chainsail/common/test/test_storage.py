@@ -202,3 +202,9 @@ class TestLocalStorage(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             self._backend.load("a/path", "invalid_data_type")
+
+    def testWriteReadBytes(self):
+        b = b"\x00\x01 some bytes"
+        full_path = os.path.join(self._tmp_dir, "somedir/archive.tar.gz")
+        self._backend.write(b, full_path, data_type="bytes")
+        self.assertEqual(self._backend.load(full_path, "bytes"), b)
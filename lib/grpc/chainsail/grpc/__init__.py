@@ -1,3 +1,5 @@
+import time
+
 from chainsail.grpc.health_checking_pb2 import HealthCheckRequest, HealthCheckResponse
 from chainsail.grpc.health_checking_pb2_grpc import (
     HealthServicer,
@@ -5,12 +7,31 @@ from chainsail.grpc.health_checking_pb2_grpc import (
     add_HealthServicer_to_server,
 )
 
+# Statuses after which the status of a service does not change anymore
+FINAL_STATUSES = (HealthCheckResponse.SUCCESS, HealthCheckResponse.FAILED)
+
 
 class Health(HealthServicer):
-    def __init__(self, callback):
+    def __init__(self, callback, watch_interval=1.0):
         super(Health, self).__init__()
         self.callback = callback
+        self.watch_interval = watch_interval
 
     def Check(self, request, context):
         status = self.callback()
         return HealthCheckResponse(status=status)
+
+    def Watch(self, request, context):
+        """
+        Streams the status of the service whenever it changes. The stream
+        ends once the service reached a final status.
+        """
+        last_status = None
+        while context.is_active():
+            response = HealthCheckResponse(status=self.callback())
+            if response.status != last_status:
+                yield response
+                last_status = response.status
+            if response.status in FINAL_STATUSES:
+                return
+            time.sleep(self.watch_interval)
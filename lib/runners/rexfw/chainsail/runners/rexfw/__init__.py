@@ -3,10 +3,10 @@ Runners which launch a rexfw simulation.
 """
 import logging
 import subprocess
-import time
 
 from chainsail.common.runners import AbstractRERunner, runner_config
 from chainsail.common.storage import SimulationStorage
+from chainsail.runners.rexfw.log_pump import MPILogPump
 
 logger = logging.getLogger("chainsail.controller")
 
@@ -28,6 +28,8 @@ class MPIRERunner(AbstractRERunner):
     DEFAULT_METRICS_PORT = 2004
     DEFAULT_USER_CODE_HOST = "localhost"
     DEFAULT_USER_CODE_PORT = 50052
+    DEFAULT_LOG_LINES_PER_INTERVAL = 20
+    DEFAULT_LOG_INTERVAL = 10.0
 
     def run_sampling(self, storage: SimulationStorage):
         # Get configuration
@@ -38,6 +40,10 @@ class MPIRERunner(AbstractRERunner):
         metrics_port = runner_config.get("metrics_port", self.DEFAULT_METRICS_PORT)
         user_code_host = runner_config.get("user_code_host", self.DEFAULT_USER_CODE_HOST)
         user_code_port = runner_config.get("user_code_port", self.DEFAULT_USER_CODE_PORT)
+        log_lines_per_interval = runner_config.get(
+            "log_lines_per_interval", self.DEFAULT_LOG_LINES_PER_INTERVAL
+        )
+        log_interval = runner_config.get("log_interval", self.DEFAULT_LOG_INTERVAL)
 
         model_config = storage.load_config()
         n_replicas = model_config["general"]["num_replicas"]
@@ -49,6 +55,8 @@ class MPIRERunner(AbstractRERunner):
             "mpirun",
             # For running in docker
             "--allow-run-as-root",
+            # Prefix each line of output with the MPI rank it stems from
+            "--tag-output",
             "--hostfile",
             hostfile,
             # "--oversubscribe",
@@ -75,18 +83,18 @@ class MPIRERunner(AbstractRERunner):
 
         logger.debug(f"Calling mpirun with: {cmd}")
         # run in subprocess, but capture both stdout and stderr and
-        # redirect them to the parent's process stdout
+        # forward them to the logger in a separate thread
         process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-
-        # https://stackoverflow.com/a/53830668/1656472
-        while True:
-            rd = process.stdout.readline()
-            logger.info(rd.decode("ascii"))
-            if not rd:  # EOF
-                return_code = process.poll()
-                if return_code is not None:
-                    break
-                time.sleep(0.1)  # cmd closed stdout, but not exited yet
+        log_pump = MPILogPump(
+            process.stdout,
+            logger,
+            max_lines_per_interval=log_lines_per_interval,
+            interval=log_interval,
+        )
+        log_pump.start()
+        return_code = process.wait()
+        # Make sure all remaining output has been forwarded
+        log_pump.join()
 
         if return_code != 0:
             raise Exception(f"MPI subprocess exited with return code {return_code}")
@@ -0,0 +1,123 @@
+"""
+Forwarding of mpirun output to the controller's logger.
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+
+# Prefix added by `mpirun --tag-output`, e.g. "[1,3]<stdout>:"
+MPI_OUTPUT_TAG = re.compile(
+    r"^\[(?P<job>\d+),(?P<rank>\d+)\]<(?P<stream>stdout|stderr)>:(?P<msg>.*)$"
+)
+
+
+def parse_mpi_output_line(line):
+    """
+    Splits a line of (possibly tagged) mpirun output into its parts.
+
+    Args:
+        line(str): a single line of output, without the trailing newline
+
+    Returns:
+        tuple: MPI rank (None if the line is not tagged, e.g. because it
+          stems from mpirun itself), stream name and message
+    """
+    match = MPI_OUTPUT_TAG.match(line)
+    if match is None:
+        return None, "stdout", line
+    return int(match.group("rank")), match.group("stream"), match.group("msg")
+
+
+class MPILogPump(threading.Thread):
+    """
+    Reads the output of an mpirun subprocess in a dedicated thread and
+    forwards it as structured log records.
+
+    Each record carries the MPI rank and the stream the line was written to
+    as `mpi_rank` and `mpi_stream` attributes. To keep chatty replicas from
+    flooding the (remote) logging handlers, at most `max_lines_per_interval`
+    stdout lines per rank are forwarded within each `interval` seconds.
+    Suppressed lines are counted and reported in a single summary record per
+    rank once the interval is over, even if no further output arrives.
+    Lines written to stderr, such as the traceback of a crashing replica,
+    are never suppressed and are logged as warnings.
+    """
+
+    def __init__(self, stream, logger, max_lines_per_interval=20, interval=10.0):
+        """
+        Initializes a log pump.
+
+        Args:
+            stream: binary file-like object to read from, e.g. the stdout of
+              a `subprocess.Popen` object
+            logger(:class:`logging.Logger`): logger to forward lines to
+            max_lines_per_interval(int): maximum number of lines forwarded
+              per rank and interval
+            interval(float): length of the rate limiting interval in seconds
+        """
+        super().__init__(daemon=True)
+        self._stream = stream
+        self._logger = logger
+        self._max_lines_per_interval = max_lines_per_interval
+        self._interval = interval
+        self._interval_start = time.monotonic()
+        self._forwarded = defaultdict(int)
+        self._suppressed = defaultdict(int)
+        # Guards the counters, which are also reset by the flushing thread
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _extra(self, rank, stream_name):
+        return {"mpi_rank": rank, "mpi_stream": stream_name}
+
+    def _report_suppressed(self):
+        for rank, num_suppressed in self._suppressed.items():
+            if num_suppressed:
+                self._logger.info(
+                    f"[rank {rank}] Suppressed {num_suppressed} lines of output",
+                    extra=self._extra(rank, "stdout"),
+                )
+        self._forwarded.clear()
+        self._suppressed.clear()
+
+    def _end_interval_if_over(self):
+        now = time.monotonic()
+        if now - self._interval_start > self._interval:
+            self._report_suppressed()
+            self._interval_start = now
+
+    def _flush_periodically(self):
+        # Reports suppressed lines of replicas which went quiet after a burst
+        while not self._done.wait(self._interval):
+            with self._lock:
+                self._end_interval_if_over()
+
+    def _forward(self, line):
+        rank, stream_name, msg = parse_mpi_output_line(line)
+        self._end_interval_if_over()
+        if rank is not None:
+            msg = f"[rank {rank}] {msg}"
+        if stream_name == "stderr":
+            self._logger.warning(msg, extra=self._extra(rank, stream_name))
+            return
+        if self._forwarded[rank] >= self._max_lines_per_interval:
+            self._suppressed[rank] += 1
+            return
+        self._forwarded[rank] += 1
+        self._logger.info(msg, extra=self._extra(rank, stream_name))
+
+    def run(self):
+        flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        flusher.start()
+        try:
+            for raw_line in iter(self._stream.readline, b""):
+                line = raw_line.decode("utf-8", errors="replace").rstrip()
+                if line:
+                    with self._lock:
+                        self._forward(line)
+        finally:
+            self._done.set()
+            flusher.join()
+            with self._lock:
+                self._report_suppressed()
@@ -232,12 +232,25 @@ def run_rexfw_mpi(
             stepsize = 0.1
 
         ls_params = config["local_sampling"]
-        sampler = get_sampler(ls_params["sampler"])
+        sampler_cls = get_sampler(ls_params["sampler"])
         ls_params.pop("sampler")
         ls_params.pop("stepsizes")
         ls_params["stepsize"] = stepsize
+        # Configs written by older controllers don't have this field
+        adaption_states = ls_params.pop("adaption_states", None)
+        if adaption_states is not None:
+            ls_params["adaption_state"] = storage.load_initial_adaption_states()[rank - 1]
+
+        # Keep a reference to the sampler rexfw instantiates such that its
+        # adaption state can be saved once sampling is done
+        samplers = []
+
+        def make_sampler(*args, **kwargs):
+            samplers.append(sampler_cls(*args, **kwargs))
+            return samplers[-1]
+
         replica = setup_default_replica(
-            init_state, tempered_pdf, sampler, ls_params, storage, comm, rank
+            init_state, tempered_pdf, make_sampler, ls_params, storage, comm, rank
         )
 
         # the slaves are relicts; originally I thought them to pass on
@@ -248,6 +261,11 @@ def run_rexfw_mpi(
         # starts infinite loop in slave to listen for messages
         slave.listen()
 
+        # write final adaption state (stepsize, mass matrix) of the local
+        # sampler to simulation storage, if it has one
+        if samplers and hasattr(samplers[-1], "adaption_state"):
+            storage.save_final_adaption_state(samplers[-1].adaption_state, replica.name)
+
 
 if __name__ == "__main__":
     run_rexfw_mpi()
@@ -0,0 +1,75 @@
+import os
+import time
+from io import BytesIO
+from unittest.mock import Mock
+
+from chainsail.runners.rexfw.log_pump import MPILogPump, parse_mpi_output_line
+
+
+def test_parse_mpi_output_line():
+    assert parse_mpi_output_line("[1,3]<stderr>:sampling...") == (3, "stderr", "sampling...")
+    assert parse_mpi_output_line("mpirun noticed something") == (
+        None,
+        "stdout",
+        "mpirun noticed something",
+    )
+
+
+def test_log_pump_rate_limits_per_rank():
+    lines = [f"[1,1]<stdout>:line {i}" for i in range(10)] + ["[1,2]<stdout>:föö", ""]
+    stream = BytesIO("\n".join(lines).encode("utf-8"))
+    logger = Mock()
+
+    pump = MPILogPump(stream, logger, max_lines_per_interval=3, interval=1000)
+    pump.start()
+    pump.join()
+
+    messages = [c.args[0] for c in logger.info.call_args_list]
+    assert messages == [
+        "[rank 1] line 0",
+        "[rank 1] line 1",
+        "[rank 1] line 2",
+        "[rank 2] föö",
+        "[rank 1] Suppressed 7 lines of output",
+    ]
+    assert logger.info.call_args_list[3].kwargs["extra"] == {
+        "mpi_rank": 2,
+        "mpi_stream": "stdout",
+    }
+
+
+def test_log_pump_reports_suppressed_lines_of_quiet_replicas():
+    read_fd, write_fd = os.pipe()
+    logger = Mock()
+    with os.fdopen(read_fd, "rb") as stream:
+        pump = MPILogPump(stream, logger, max_lines_per_interval=1, interval=0.2)
+        pump.start()
+        os.write(write_fd, b"[1,1]<stdout>:a\n[1,1]<stdout>:b\n[1,1]<stdout>:c\n")
+        # The replica goes quiet without closing its output
+        deadline = time.monotonic() + 5
+        while logger.info.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        messages = [c.args[0] for c in logger.info.call_args_list]
+        os.close(write_fd)
+        pump.join()
+
+    assert messages == ["[rank 1] a", "[rank 1] Suppressed 2 lines of output"]
+
+
+def test_log_pump_never_suppresses_stderr():
+    lines = [f"[1,1]<stderr>:Traceback line {i}" for i in range(5)] + ["[1,1]<stdout>:done"]
+    stream = BytesIO("\n".join(lines).encode("utf-8"))
+    logger = Mock()
+
+    pump = MPILogPump(stream, logger, max_lines_per_interval=1, interval=1000)
+    pump.start()
+    pump.join()
+
+    assert [c.args[0] for c in logger.warning.call_args_list] == [
+        f"[rank 1] Traceback line {i}" for i in range(5)
+    ]
+    assert logger.warning.call_args_list[0].kwargs["extra"] == {
+        "mpi_rank": 1,
+        "mpi_stream": "stderr",
+    }
+    assert [c.args[0] for c in logger.info.call_args_list] == ["[rank 1] done"]
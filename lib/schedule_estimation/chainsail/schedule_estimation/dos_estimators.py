@@ -53,6 +53,24 @@ def validate_shapes(energies, parameters):
         )
 
 
+def flatten_energies(energies):
+    """
+    Flattens energies of possibly different numbers of samples per ensemble.
+
+    Args:
+      energies(iterable): energies of states; one array per ensemble
+
+    Returns:
+      :class:`np.ndarray`: flat array of all energies
+      :class:`np.ndarray`: number of energies per ensemble
+    """
+    if isinstance(energies, np.ndarray) and energies.dtype != object and energies.ndim < 2:
+        energies = [energies]
+    per_ensemble = [np.asarray(e, dtype=float).ravel() for e in energies]
+    num_samples = np.array([len(e) for e in per_ensemble])
+    return np.concatenate(per_ensemble), num_samples
+
+
 def calculate_log_L(f, log_g):
     """
     Calculates the log-likelihood of the energies for values of the free
@@ -90,28 +108,57 @@ class WHAM:
         ensembles.
 
         Args:
-            energies(:class:`np.ndarray`): negative log-probabilities
-              ("energies") of states in their respective ensembles
+            energies(:class:`np.ndarray`): flat array of negative
+              log-probabilities ("energies")
             parameters(dict): Parameter values defining the ensemble at different
               "temperatures". The keys are the parameter names and the values
-              :class:`np.ndarray`s with the parameter values corresponding to
-              the first dimension of the ``energies`` argument
+              :class:`np.ndarray`s with the parameter values
 
         Returns:
           :class:`np.ndarray`: matrix of the log-probabilities of all energies
               in all ensembles.
         """
-        n_ensembles = energies.shape[0]
+        n_ensembles = len(next(iter(parameters.values())))
         param_dicts = [
             {param: parameters[param][i] for param in parameters} for i in range(n_ensembles)
         ]
         log_qs = np.array(
-            [self._ensemble.log_ensemble(energies.ravel(), **params) for params in param_dicts]
+            [self._ensemble.log_ensemble(energies, **params) for params in param_dicts]
         )
 
         return log_qs
 
-    def estimate_dos(self, energies, parameters, max_iterations=5000, stopping_threshold=1e-10):
+    def free_energies_from_dos(self, log_dos, dos_energies, parameters):
+        """Calculates the free energies of ensembles given a DOS estimate.
+
+        This maps the solution of a previous WHAM run onto a new (possibly
+        different) schedule and can thus be used to warm-start the WHAM
+        iteration.
+
+        Args:
+            log_dos(:class:`np.ndarray`): log-DOS estimate evaluated at
+              ``dos_energies``
+            dos_energies(:class:`np.ndarray`): energies at which the log-DOS
+              is given
+            parameters(dict): Parameter values defining the ensembles for which
+              to calculate the free energies
+
+        Returns:
+            :class:`np.ndarray`: free energies of the ensembles
+        """
+        dos_energies, _ = flatten_energies(dos_energies)
+        log_qs = self._calculate_log_qs(dos_energies, parameters)
+        return -log_sum_exp((log_qs + log_dos).T, axis=0)
+
+    def estimate_dos(
+        self,
+        energies,
+        parameters,
+        max_iterations=5000,
+        stopping_threshold=1e-10,
+        initial_dos=None,
+        pooled_runs=None,
+    ):
         """Do multiple histogram reweighting with infinitely fine binning as
         outlined in the paper "Evaluation of marginal likelihoods via the
         density of states" (Habeck, AISTATS 2012)
@@ -126,28 +173,51 @@ class WHAM:
             max_iterations(int): maximum number of WHAM iterations to perform
               stopping_threshold(float): relative difference in log-likelihoods
               of energies which measures convergence of WHAM iterations.
+            initial_dos(tuple): optional (log-DOS, energies) tuple of a previous
+              DOS estimate, which is used to initialize the free energies instead
+              of starting from zero
+            pooled_runs(list): optional list of (energies, parameters) tuples
+              from earlier simulations. Their energies are pooled with
+              ``energies`` and reweighted according to their ensembles.
 
         Returns:
             :class:`np.array`: an estimate of the DOS at the sampled energies
         """
         validate_shapes(energies, parameters)
         logger.info("Estimating density of states...")
-        f = np.zeros(energies.shape[0])
-        log_qs = self._calculate_log_qs(energies, parameters)
+        all_energies = list(energies)
+        all_parameters = {key: np.asarray(val) for key, val in parameters.items()}
+        for run_energies, run_parameters in pooled_runs or []:
+            validate_shapes(run_energies, run_parameters)
+            all_energies.extend(run_energies)
+            for key in all_parameters:
+                all_parameters[key] = np.concatenate((all_parameters[key], run_parameters[key]))
+        flat_energies, num_samples = flatten_energies(all_energies)
+        # number of energies in the ensembles of the current simulation
+        num_current = num_samples[: len(energies)].sum()
+        log_num_samples = np.log(num_samples)
+        rel_num_samples = num_samples / num_samples.mean()
+
+        if initial_dos is not None:
+            f = self.free_energies_from_dos(*initial_dos, all_parameters)
+        else:
+            f = np.zeros(len(num_samples))
+        log_qs = self._calculate_log_qs(flat_energies, all_parameters)
 
         old_log_L = 1e300
         for i in range(max_iterations):
-            log_gs = -log_sum_exp(log_qs + f[:, None], axis=0)
+            log_gs = -log_sum_exp(log_qs + (f + log_num_samples)[:, None], axis=0)
             log_gs -= log_sum_exp(log_gs)
             f = -log_sum_exp((log_qs + log_gs).T, axis=0)
 
-            log_L = calculate_log_L(f, log_gs)
+            log_L = calculate_log_L(rel_num_samples * f, log_gs)
             if i % 10 == 0:
                 logger.debug("Likelihood of energies given DOS: {}".format(log_L))
             if stopping_criterion(log_L, old_log_L, stopping_threshold):
                 break
             old_log_L = log_L
 
+        logger.debug(f"WHAM iteration stopped after {i + 1} iterations")
         if i > 0.8 * max_iterations:
             logger.warning(
                 (
@@ -156,4 +226,8 @@ class WHAM:
                 )
             )
 
+        # only return the DOS at the energies of the current simulation
+        log_gs = log_gs[:num_current]
+        log_gs -= log_sum_exp(log_gs)
+
         return log_gs
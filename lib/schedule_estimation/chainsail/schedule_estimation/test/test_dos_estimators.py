@@ -40,3 +40,28 @@ class testWHAM(unittest.TestCase):
         # Only compare lower energies since higher energies are not adequately sampled
         cutoff = 20
         assert np.allclose(expected_log_dos[:cutoff], rebinned_log_dos[:cutoff], atol=0.5)
+
+    def testWarmStart(self):
+        est_log_dos = self.wham.estimate_dos(energies, schedule, max_iterations=100)
+        # starting from the converged solution, very few iterations should suffice
+        warm_log_dos = self.wham.estimate_dos(
+            energies, schedule, max_iterations=2, initial_dos=(est_log_dos, energies)
+        )
+        assert np.allclose(est_log_dos, warm_log_dos, atol=1e-3)
+
+    def testPooledRuns(self):
+        full_log_dos = self.wham.estimate_dos(energies, schedule, max_iterations=1000)
+        # split ensembles into two "runs" and pool the first one into the estimate
+        # for the second one
+        previous_run = (energies[::2], {"beta": schedule["beta"][::2]})
+        pooled_log_dos = self.wham.estimate_dos(
+            energies[1::2],
+            {"beta": schedule["beta"][1::2]},
+            max_iterations=1000,
+            pooled_runs=[previous_run],
+        )
+        # the DOS estimated from all energies, restricted to the energies
+        # of the second run
+        expected_log_dos = full_log_dos.reshape(energies.shape)[1::2].ravel()
+        expected_log_dos -= log_sum_exp(expected_log_dos)
+        assert np.allclose(expected_log_dos, pooled_log_dos, atol=1e-3)
@@ -100,6 +100,8 @@ locals {
     results_bucket             = var.storage_bucket
     results_dirname           = "/storage"
     results_url_expiry_time    = 604800
+    warm_pool_size             = var.warm_pool_size
+    dependency_cache_dirname   = "/dependency_cache"
     node_type                  = "KubernetesPod"
     node_config = {
       # FIXME: Had to hard-code this name to avoid a cyclical dependency
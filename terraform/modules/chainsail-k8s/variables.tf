@@ -65,3 +65,9 @@ variable "image_pull_policy" {
   type        = string
   default     = "IfNotPresent"
 }
+
+variable "warm_pool_size" {
+  description = "Number of pre-created worker pods the scheduler keeps ready for new jobs"
+  type        = number
+  default     = 0
+}